@@ -0,0 +1,151 @@
+"""
+Query-latency benchmark for open_digger_metrics layouts.
+
+Builds a synthetic table (10M rows by default) in the legacy layout
+(VARCHAR month, (repo_name, metric_type) index) and/or the current layout
+(DATE month, unique (repo_name, metric_type, month) + covering index), then
+times the query shapes the backend issues and prints p50/p95 latencies.
+
+    python data/etl_scripts/benchmark_metrics.py --rows 10000000 --layout both
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+import mysql.connector
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_NAME = os.getenv("DB_NAME", "open_detective")
+
+METRICS = ["stars", "activity", "openrank", "bus_factor", "issues_new", "issues_closed"]
+MONTHS = 120
+INSERT_BATCH = 10000
+
+LAYOUTS = {
+    "legacy": """
+        CREATE TABLE {table} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            repo_name VARCHAR(255) NOT NULL,
+            metric_type VARCHAR(64) NOT NULL,
+            month VARCHAR(7) NOT NULL,
+            value DOUBLE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_repo_metric (repo_name, metric_type)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    "covering": """
+        CREATE TABLE {table} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            repo_name VARCHAR(255) NOT NULL,
+            metric_type VARCHAR(64) NOT NULL,
+            month DATE NOT NULL,
+            value DOUBLE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_repo_metric_month (repo_name, metric_type, month),
+            INDEX idx_repo_metric_month_value (repo_name, metric_type, month, value)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+}
+
+QUERIES = {
+    "series": "SELECT month, value, repo_name FROM {table} WHERE repo_name IN (%s) AND metric_type = 'stars' ORDER BY month ASC",
+    "compare_5": "SELECT month, value, repo_name FROM {table} WHERE repo_name IN (%s, %s, %s, %s, %s) AND metric_type = 'activity' ORDER BY month ASC",
+    "profile_correlated": """
+        SELECT metric_type, value FROM {table}
+        WHERE repo_name = %s AND month = (SELECT MAX(month) FROM {table} WHERE repo_name = %s)
+    """,
+    "profile_per_metric": """
+        SELECT m.metric_type, m.value FROM {table} m
+        JOIN (SELECT metric_type, MAX(month) AS month FROM {table} WHERE repo_name = %s GROUP BY metric_type) latest
+          ON latest.metric_type = m.metric_type AND latest.month = m.month
+        WHERE m.repo_name = %s
+    """,
+}
+
+def month_value(layout: str, i: int) -> str:
+    year, month = 2015 + i // 12, i % 12 + 1
+    return f"{year}-{month:02d}" if layout == "legacy" else f"{year}-{month:02d}-01"
+
+def random_repo(repos: int) -> str:
+    r = random.randrange(repos)
+    return f"owner{r}/project{r}"
+
+def populate(conn, layout: str, table: str, rows: int) -> int:
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute(LAYOUTS[layout].format(table=table))
+    repos = max(1, rows // (len(METRICS) * MONTHS))
+    started = time.perf_counter()
+    batch = []
+    for r in range(repos):
+        repo = f"owner{r}/project{r}"
+        for metric in METRICS:
+            for i in range(MONTHS):
+                batch.append((repo, metric, month_value(layout, i), random.random() * 1000))
+                if len(batch) >= INSERT_BATCH:
+                    cursor.executemany(f"INSERT INTO {table} (repo_name, metric_type, month, value) VALUES (%s, %s, %s, %s)", batch)
+                    conn.commit()
+                    batch = []
+    if batch:
+        cursor.executemany(f"INSERT INTO {table} (repo_name, metric_type, month, value) VALUES (%s, %s, %s, %s)", batch)
+        conn.commit()
+    cursor.execute(f"ANALYZE TABLE {table}")
+    cursor.fetchall()
+    cursor.close()
+    print(f"  loaded {repos * len(METRICS) * MONTHS:,} rows into {table} in {time.perf_counter() - started:.1f}s")
+    return repos
+
+def time_query(conn, sql: str, params_fn, runs: int):
+    cursor = conn.cursor()
+    samples = []
+    for _ in range(runs):
+        params = params_fn()
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    cursor.execute(f"EXPLAIN {sql}", params_fn())
+    plan = cursor.fetchall()
+    cursor.close()
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples), p95, plan
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark open_digger_metrics query latency.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--layout", choices=["legacy", "covering", "both"], default="both")
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark tables afterwards")
+    args = parser.parse_args()
+
+    layouts = ["legacy", "covering"] if args.layout == "both" else [args.layout]
+    conn = mysql.connector.connect(host=DB_HOST, user=DB_USER, password=DB_PASSWORD, database=DB_NAME)
+    try:
+        for layout in layouts:
+            table = f"open_digger_metrics_bench_{layout}"
+            print(f"📦 {layout} layout")
+            repos = populate(conn, layout, table, args.rows)
+            pick = lambda: random_repo(repos)
+            params = {
+                "series": lambda: (pick(),),
+                "compare_5": lambda: tuple(pick() for _ in range(5)),
+                "profile_correlated": lambda: (pick(),) * 2,
+                "profile_per_metric": lambda: (pick(),) * 2,
+            }
+            for name, sql in QUERIES.items():
+                p50, p95, plan = time_query(conn, sql.format(table=table), params[name], args.runs)
+                keys = ", ".join(str(row[6]) for row in plan)
+                print(f"  {name:<20} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   keys: {keys}")
+            if not args.keep:
+                cursor = conn.cursor()
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                cursor.close()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,47 @@ import requests
 import mysql.connector
 import os
 import json
+import math
+import time
+from datetime import date
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from requests.adapters import HTTPAdapter
+
+try:
+    import redis
+except ImportError:  # the backend then only notices new data when its result cache expires
+    redis = None  # type: ignore[assignment]
+
+try:
+    from data.etl_scripts.snapshot_store import SnapshotStore, DEFAULT_SNAPSHOT_DIR
+    from data.etl_scripts.materialize import materialize
+except ImportError:  # executed directly as a script
+    from snapshot_store import SnapshotStore, DEFAULT_SNAPSHOT_DIR  # type: ignore[no-redef]
+    from materialize import materialize  # type: ignore[no-redef]
 
 # Configuration
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_USER = os.getenv("DB_USER", "root")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME", "open_detective")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# The backend keys cached query results by this counter (see services/result_cache.py)
+DATASET_VERSION_KEY = "od:dataset_version"
 
 BASE_URL = "https://oss.x-lab.info/open_digger/github"
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), '../repos.json')
+# ETag / Last-Modified validators from the previous run, keyed by "repo/metric"
+STATE_PATH = os.path.join(os.path.dirname(__file__), '../etl_state.json')
+
+ETL_WORKERS = int(os.getenv("ETL_WORKERS", "16"))
+# Series loaded per transaction
+ETL_BATCH_SIZE = int(os.getenv("ETL_BATCH_SIZE", "50"))
+# Fetches in flight per worker; finished payloads are dropped once handled
+ETL_WINDOW_PER_WORKER = 4
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Set, Tuple
 
 def get_db_connection():
     return mysql.connector.connect(
@@ -32,43 +62,150 @@ def load_repos() -> List[str]:
 
 METRICS = ["stars", "activity", "openrank", "bus_factor", "issues_new", "issues_closed"]
 
-def fetch_metric(repo: str, metric: str) -> Optional[Dict[str, Any]]:
+_session: Optional[requests.Session] = None
+
+def get_http_session() -> requests.Session:
+    """Keep-alive session shared by all fetch workers."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=ETL_WORKERS, pool_maxsize=ETL_WORKERS)
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+def load_state() -> Dict[str, Dict[str, str]]:
+    try:
+        with open(STATE_PATH, 'r') as f:
+            state: Dict[str, Dict[str, str]] = json.load(f)
+        return state
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_state(state: Dict[str, Dict[str, str]]):
+    tmp_path = f"{STATE_PATH}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+@dataclass
+class FetchResult:
+    repo: str
+    metric: str
+    status: str  # "changed", "not_modified", "missing" or "error"
+    data: Optional[Dict[str, Any]] = None
+    validators: Dict[str, str] = field(default_factory=dict)
+    nbytes: int = 0
+    raw: Optional[bytes] = None
+
+def fetch_metric_conditional(repo: str, metric: str, validators: Optional[Dict[str, str]] = None) -> FetchResult:
+    """GETs one metric file, sending the stored validators so unchanged files answer 304."""
     url = f"{BASE_URL}/{repo}/{metric}.json"
+    headers = {}
+    if validators:
+        if validators.get("etag"): headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"): headers["If-Modified-Since"] = validators["last_modified"]
     try:
-        response = requests.get(url, timeout=10)
+        response = get_http_session().get(url, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return FetchResult(repo, metric, "not_modified", validators=validators or {})
         if response.status_code == 200:
-            return response.json()
+            new_validators = {}
+            if response.headers.get("ETag"): new_validators["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"): new_validators["last_modified"] = response.headers["Last-Modified"]
+            return FetchResult(repo, metric, "changed", response.json(), new_validators, len(response.content), response.content)
+        return FetchResult(repo, metric, "missing")
     except Exception as e:
         print(f"❌ Error fetching {url}: {e}")
-    return None
+    return FetchResult(repo, metric, "error")
+
+def fetch_metric(repo: str, metric: str) -> Optional[Dict[str, Any]]:
+    return fetch_metric_conditional(repo, metric).data
 
-def transform_and_load(repo: str, metric: str, data: Dict[str, Any]):
-    if not data: return
-    records = []
-    for month, value in data.items():
+def fetch_from_snapshot(store: SnapshotStore, repo: str, metric: str, validators: Optional[Dict[str, str]] = None) -> FetchResult:
+    """Replays a mirrored file; answers "not_modified" when the live validators it was saved with are unchanged."""
+    entry = store.entry(repo, metric)
+    if not entry:
+        return FetchResult(repo, metric, "missing")
+    if validators and entry.get("validators") == validators:
+        return FetchResult(repo, metric, "not_modified", validators=validators)
+    try:
+        raw = store.get_raw(repo, metric)
+    except Exception as e:
+        print(f"❌ Error reading snapshot {repo}/{metric}: {e}")
+        return FetchResult(repo, metric, "error")
+    if raw is None:
+        return FetchResult(repo, metric, "missing")
+    return FetchResult(repo, metric, "changed", json.loads(raw), entry.get("validators", {}), len(raw), raw)
+
+def transform(repo: str, metric: str, data: Dict[str, Any]) -> Dict[str, float]:
+    """Keeps the monthly (YYYY-MM) points of an OpenDigger metric file."""
+    records = {}
+    for month, value in (data or {}).items():
         if not (len(month) == 7 and month[4] == '-'): continue
-        records.append((repo, metric, month, float(value)))
+        records[month] = float(value)
+    return records
 
-    if not records: return
+def month_date(month: str) -> str:
+    """'YYYY-MM' -> the DATE literal stored in open_digger_metrics.month."""
+    return f"{month}-01"
 
-    conn = get_db_connection()
+def month_key(value: Any) -> str:
+    """DATE (or legacy 'YYYY-MM' string) read back from MySQL -> 'YYYY-MM'."""
+    return value.strftime("%Y-%m") if isinstance(value, date) else str(value)[:7]
+
+def same_value(stored: Optional[float], incoming: float) -> bool:
+    """Older schemas keep value as FLOAT, so a re-read value only matches to ~7 significant digits."""
+    return stored is not None and math.isclose(float(stored), incoming, rel_tol=1e-6, abs_tol=1e-9)
+
+def diff_records(existing: Dict[str, float], incoming: Dict[str, float]) -> Tuple[list, list, list]:
+    """Months to insert, update and delete to turn `existing` into `incoming`."""
+    inserts = [(m, v) for m, v in incoming.items() if m not in existing]
+    updates = [(m, v) for m, v in incoming.items() if m in existing and not same_value(existing[m], v)]
+    deletes = [m for m in existing if m not in incoming]
+    return inserts, updates, deletes
+
+def transform_and_load(repo: str, metric: str, data: Dict[str, Any], conn=None) -> Dict[str, int]:
+    """
+    Writes only the months that changed for one repo/metric series.
+    Commits are left to the caller when a shared connection is passed in.
+    """
+    stats = {"inserted": 0, "updated": 0, "deleted": 0}
+    records = transform(repo, metric, data)
+    if not records: return stats
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        # Delete old data
         cursor.execute(
-            "DELETE FROM open_digger_metrics WHERE repo_name = %s AND metric_type = %s",
+            "SELECT month, value FROM open_digger_metrics WHERE repo_name = %s AND metric_type = %s",
             (repo, metric)
         )
-        # MySQL use %s placeholder
-        cursor.executemany(
-            "INSERT INTO open_digger_metrics (repo_name, metric_type, month, value) VALUES (%s, %s, %s, %s)",
-            records
-        )
-        conn.commit()
-        print(f"✅ Saved {len(records)} records for {repo} - {metric}")
+        existing = {month_key(month): value for month, value in cursor.fetchall()}
+        inserts, updates, deletes = diff_records(existing, records)
+
+        if deletes:
+            cursor.executemany(
+                "DELETE FROM open_digger_metrics WHERE repo_name = %s AND metric_type = %s AND month = %s",
+                [(repo, metric, month_date(m)) for m in deletes]
+            )
+        if inserts or updates:
+            # One multi-row upsert on uq_repo_metric_month; MySQL use %s placeholder
+            cursor.executemany(
+                "INSERT INTO open_digger_metrics (repo_name, metric_type, month, value) VALUES (%s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE value = VALUES(value)",
+                [(repo, metric, month_date(m), v) for m, v in inserts + updates]
+            )
+        if own_conn:
+            conn.commit()
+        stats = {"inserted": len(inserts), "updated": len(updates), "deleted": len(deletes)}
     finally:
         cursor.close()
-        conn.close()
+        if own_conn:
+            conn.close()
+    return stats
 
 import argparse
 
@@ -83,30 +220,138 @@ def save_repo_to_config(repo: str):
         except Exception as e:
             print(f"❌ Failed to update config: {e}")
 
-def run_etl(specific_repos: Optional[List[str]] = None):
+def _flush(conn, batch: List[FetchResult], state: Dict[str, Dict[str, str]], totals: Dict[str, int]) -> bool:
+    """Loads a batch of changed series in one transaction, then records their validators."""
+    if not batch: return True
+    try:
+        for result in batch:
+            stats = transform_and_load(result.repo, result.metric, result.data or {}, conn=conn)
+            for k, v in stats.items():
+                totals[k] += v
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        totals["failed"] += len(batch)
+        print(f"❌ Batch of {len(batch)} series rolled back: {e}")
+        return False
+    for result in batch:
+        state[f"{result.repo}/{result.metric}"] = result.validators
+    return True
+
+def bump_dataset_version() -> Optional[int]:
+    """Invalidates the backend's cached query results after new data was loaded."""
+    if redis is None: return None
+    try:
+        return redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2).incr(DATASET_VERSION_KEY)
+    except Exception as e:
+        print(f"⚠️ Could not bump dataset version: {e}")
+        return None
+
+def run_etl(specific_repos: Optional[List[str]] = None, workers: int = ETL_WORKERS, full_refresh: bool = False,
+            source: str = "live", snapshot_dir: Optional[str] = None, mirror: bool = False,
+            materialize_all: bool = False) -> Dict[str, Any]:
+    """
+    source="live" reads BASE_URL (and writes every downloaded file to the snapshot
+    mirror when `mirror` is set); source="snapshot" replays the mirror with no network.
+    Afterwards the analytics tables are rebuilt for the series that changed
+    (or for every series with `materialize_all`).
+    """
     print("🚀 Starting OpenDigger MySQL ETL...")
     repos = specific_repos if specific_repos else load_repos()
-    
-    print(f"🎯 Target Repositories: {len(repos)}")
-    for repo in repos:
-        print(f"   Processing {repo}...")
-        for metric in METRICS:
-            data = fetch_metric(repo, metric)
-            if data:
-                transform_and_load(repo, metric, data)
+    state = {} if full_refresh else load_state()
+    tasks = [(repo, metric) for repo in repos for metric in METRICS]
+
+    store = SnapshotStore(snapshot_dir or DEFAULT_SNAPSHOT_DIR) if (mirror or source == "snapshot") else None
+    mirror_store = store if mirror and source == "live" else None
+    if store is not None and source == "snapshot":
+        snapshot = store
+        fetch = lambda repo, metric, validators: fetch_from_snapshot(snapshot, repo, metric, validators)
+    else:
+        fetch = fetch_metric_conditional
+
+    print(f"🎯 Target Repositories: {len(repos)} ({len(tasks)} metric files from {source}, {workers} workers)")
+    totals: Dict[str, Any] = {"changed": 0, "not_modified": 0, "missing": 0, "error": 0, "failed": 0,
+              "inserted": 0, "updated": 0, "deleted": 0, "bytes": 0}
+    started = time.perf_counter()
+
+    loaded: List[Tuple[str, str]] = []
+    conn = get_db_connection()
+    try:
+        batch: List[FetchResult] = []
+        window = max(1, workers) * ETL_WINDOW_PER_WORKER
+        todo = iter(tasks)
+        pending: Set[Future] = set()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                for repo, metric in islice(todo, window - len(pending)):
+                    pending.add(pool.submit(fetch, repo, metric, state.get(f"{repo}/{metric}")))
+                if not pending: break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    totals[result.status] += 1
+                    totals["bytes"] += result.nbytes
+                    if result.status != "changed": continue
+                    if mirror_store is not None and result.raw is not None:
+                        mirror_store.put(result.repo, result.metric, result.raw, result.validators)
+                    result.raw = None
+                    batch.append(result)
+                    if len(batch) >= ETL_BATCH_SIZE:
+                        if _flush(conn, batch, state, totals):
+                            loaded.extend((r.repo, r.metric) for r in batch)
+                        batch = []
+        if _flush(conn, batch, state, totals):
+            loaded.extend((r.repo, r.metric) for r in batch)
+
+        if materialize_all or loaded:
+            try:
+                totals["materialized"] = materialize(conn, None if materialize_all else loaded)["series"]
+            except Exception as e:
+                print(f"❌ Materialization failed: {e}")
+        if loaded or materialize_all:
+            totals["dataset_version"] = bump_dataset_version()
+    finally:
+        conn.close()
+        save_state(state)
+        if mirror_store is not None:
+            mirror_store.save()
+
+    elapsed = time.perf_counter() - started
+    rows = totals["inserted"] + totals["updated"] + totals["deleted"]
+    totals["elapsed_seconds"] = round(elapsed, 2)
+    totals["files_per_second"] = round(len(tasks) / elapsed, 1) if elapsed else 0.0
+    totals["rows_per_second"] = round(rows / elapsed, 1) if elapsed else 0.0
+    print(
+        f"📊 {len(tasks)} files in {elapsed:.1f}s ({totals['files_per_second']} files/s): "
+        f"{totals['changed']} changed, {totals['not_modified']} unchanged, "
+        f"{totals['missing']} missing, {totals['error']} errors, {totals['failed']} failed loads"
+    )
+    print(
+        f"📊 Rows: +{totals['inserted']} ~{totals['updated']} -{totals['deleted']} "
+        f"({totals['rows_per_second']} rows/s, {totals['bytes'] / 1e6:.1f} MB downloaded)"
+    )
     print("🎉 ETL Complete!")
+    return totals
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch OpenDigger metrics.")
     parser.add_argument("--repo", type=str, help="Fetch a specific repository (e.g. 'google/jax')")
     parser.add_argument("--add", action="store_true", help="Add the specific repo to repos.json")
-    
+    parser.add_argument("--workers", type=int, default=ETL_WORKERS, help="Concurrent fetch workers")
+    parser.add_argument("--full", action="store_true", help="Ignore stored ETag/Last-Modified validators and re-download everything")
+    parser.add_argument("--source", choices=["live", "snapshot"], default="live", help="Read from OpenDigger or from the local snapshot mirror")
+    parser.add_argument("--snapshot-dir", type=str, default=None, help=f"Snapshot mirror location (default: {DEFAULT_SNAPSHOT_DIR})")
+    parser.add_argument("--mirror", action="store_true", help="Write every downloaded file to the snapshot mirror")
+    parser.add_argument("--materialize-all", action="store_true", help="Rebuild forecasts/anomalies/snapshots for every series, not only changed ones")
+
     args = parser.parse_args()
-    
+    options = dict(workers=args.workers, full_refresh=args.full, source=args.source,
+                   snapshot_dir=args.snapshot_dir, mirror=args.mirror, materialize_all=args.materialize_all)
+
     if args.repo:
         target_repos = [args.repo]
         if args.add:
             save_repo_to_config(args.repo)
-        run_etl(target_repos)
+        run_etl(target_repos, **options)
     else:
-        run_etl()
\ No newline at end of file
+        run_etl(**options)
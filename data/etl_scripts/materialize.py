@@ -0,0 +1,161 @@
+"""
+ETL post-processing stage: precomputes the analytics the backend used to
+derive on every request (forecasts, anomaly flags, latest-month snapshots
+and per-series rollups) into their own tables.
+
+    python data/etl_scripts/materialize.py          # rebuild every series
+"""
+import os
+import sys
+import time
+from datetime import date
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.backend.services.analytics import forecast_next_months, detect_anomalies, detect_changes
+
+FORECAST_MONTHS = int(os.getenv("FORECAST_MONTHS", "3"))
+# Month-over-month changes are stored from this floor up. The backend filters them by its own
+# ANOMALY_THRESHOLD and recomputes from the rows when it asks for less than was stored.
+CHANGE_FLOOR = float(os.getenv("ANOMALY_CHANGE_FLOOR", "0.1"))
+Z_SCORE_THRESHOLD = 2.0
+# Series rebuilt per transaction
+MATERIALIZE_BATCH = int(os.getenv("MATERIALIZE_BATCH", "200"))
+
+TABLES = ["metric_forecasts", "metric_anomalies", "repo_metric_snapshots", "metric_rollups"]
+
+Series = Tuple[str, str]
+
+def _month_key(value: Any) -> str:
+    return value.strftime("%Y-%m") if isinstance(value, date) else str(value)[:7]
+
+def _month_date(month: str) -> str:
+    return f"{month}-01"
+
+def compute(rows: List[Dict[str, Any]]) -> Dict[str, list]:
+    """
+    Derives every materialized row for the series in `rows`
+    (dicts with repo_name, metric_type, month 'YYYY-MM', value).
+    """
+    forecasts = [
+        (f["repo_name"], f["metric_type"], _month_date(f["month"]), f["value"])
+        for f in forecast_next_months(rows, FORECAST_MONTHS)
+    ]
+
+    flags: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for c in detect_changes(rows, CHANGE_FLOOR):
+        flags[(c["repo_name"], c["metric_type"], c["month"])] = {"change": c["change"], "z": None}
+    for a in detect_anomalies(rows, Z_SCORE_THRESHOLD):
+        flags.setdefault((a["repo_name"], a["metric_type"], a["month"]), {"change": None})["z"] = a["z_score"]
+    values = {(r["repo_name"], r["metric_type"], r["month"]): r["value"] for r in rows}
+    anomalies = []
+    for (repo, metric, month), flag in flags.items():
+        direction = flag["change"] if flag["change"] is not None else flag["z"]
+        anomalies.append((
+            repo, metric, _month_date(month), values.get((repo, metric, month)),
+            flag["change"], flag["z"], "SPIKE" if direction > 0 else "DROP"
+        ))
+
+    snapshots, rollups = [], []
+    ordered = sorted(rows, key=lambda r: (r["repo_name"], r["metric_type"], r["month"]))
+    for (repo, metric), group in groupby(ordered, key=lambda r: (r["repo_name"], r["metric_type"])):
+        series = [r for r in group if r["value"] is not None]
+        if not series: continue
+        vals = [float(r["value"]) for r in series]
+        first, last = series[0], series[-1]
+        snapshots.append((repo, metric, _month_date(last["month"]), vals[-1], CHANGE_FLOOR))
+        change = (vals[-1] - vals[0]) / vals[0] if vals[0] else None
+        rollups.append((
+            repo, metric, len(vals), _month_date(first["month"]), _month_date(last["month"]),
+            min(vals), max(vals), sum(vals) / len(vals), sum(vals), change
+        ))
+
+    return {
+        "metric_forecasts": forecasts,
+        "metric_anomalies": anomalies,
+        "repo_metric_snapshots": snapshots,
+        "metric_rollups": rollups,
+    }
+
+INSERTS = {
+    "metric_forecasts":
+        "INSERT INTO metric_forecasts (repo_name, metric_type, month, value) VALUES (%s, %s, %s, %s)",
+    "metric_anomalies":
+        "INSERT INTO metric_anomalies (repo_name, metric_type, month, value, change_ratio, z_score, kind) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+    "repo_metric_snapshots":
+        "INSERT INTO repo_metric_snapshots (repo_name, metric_type, month, value, change_floor) VALUES (%s, %s, %s, %s, %s)",
+    "metric_rollups":
+        "INSERT INTO metric_rollups (repo_name, metric_type, months, first_month, last_month, "
+        "min_value, max_value, avg_value, total_value, change_ratio) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+}
+
+def _chunks(items: List[Series], size: int) -> Iterable[List[Series]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _series_filter(chunk: List[Series]) -> Tuple[str, list]:
+    placeholders = ", ".join(["(%s, %s)"] * len(chunk))
+    params = [p for series in chunk for p in series]
+    return f"(repo_name, metric_type) IN ({placeholders})", params
+
+def materialize(conn, series: Optional[List[Series]] = None) -> Dict[str, int]:
+    """
+    Rebuilds the materialized rows of `series` (every series in
+    open_digger_metrics when None), one transaction per MATERIALIZE_BATCH series.
+    """
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    totals = {table: 0 for table in TABLES}
+    totals["series"] = 0
+    try:
+        if series is None:
+            cursor.execute("SELECT DISTINCT repo_name, metric_type FROM open_digger_metrics")
+            series = [tuple(row) for row in cursor.fetchall()]
+        series = sorted(set(series))
+
+        for chunk in _chunks(series, MATERIALIZE_BATCH):
+            where, params = _series_filter(chunk)
+            cursor.execute(
+                f"SELECT repo_name, metric_type, month, value FROM open_digger_metrics WHERE {where} "
+                "ORDER BY repo_name, metric_type, month",
+                params
+            )
+            rows = [
+                {"repo_name": repo, "metric_type": metric, "month": _month_key(month), "value": value}
+                for repo, metric, month, value in cursor.fetchall()
+            ]
+            computed = compute(rows)
+            try:
+                for table in TABLES:
+                    cursor.execute(f"DELETE FROM {table} WHERE {where}", params)
+                    if computed[table]:
+                        cursor.executemany(INSERTS[table], computed[table])
+                    totals[table] += len(computed[table])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            totals["series"] += len(chunk)
+    finally:
+        cursor.close()
+
+    print(
+        f"🧮 Materialized {totals['series']} series in {time.perf_counter() - started:.1f}s: "
+        f"{totals['metric_forecasts']} forecasts, {totals['metric_anomalies']} anomalies, "
+        f"{totals['repo_metric_snapshots']} snapshots"
+    )
+    return totals
+
+if __name__ == "__main__":
+    try:
+        from data.etl_scripts.fetch_opendigger import get_db_connection
+    except ImportError:
+        from fetch_opendigger import get_db_connection  # type: ignore[no-redef]
+    conn = get_db_connection()
+    try:
+        materialize(conn)
+    finally:
+        conn.close()
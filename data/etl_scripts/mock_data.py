@@ -45,7 +45,7 @@ def seed_data():
     print("Seeding mock data...")
     repos = ['vuejs/core', 'fastapi/fastapi']
     metrics = ['stars', 'activity']
-    months = [f'2023-{m:02d}' for m in range(1, 13)]
+    months = [f'2023-{m:02d}-01' for m in range(1, 13)]
 
     data_to_insert = []
     for repo in repos:
@@ -0,0 +1,82 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '../snapshots/opendigger')
+
+class SnapshotStore:
+    """
+    On-disk mirror of OpenDigger metric files.
+
+    Payloads are stored gzip-compressed under their SHA-256 (objects/ab/abcdef....json.gz),
+    so identical files are kept once. manifest.json maps "repo/metric" to the object hash
+    plus the HTTP validators seen when it was fetched. The store is safe to write from
+    the ETL fetch threads.
+    """
+
+    def __init__(self, root: str = DEFAULT_SNAPSHOT_DIR):
+        self.root = os.path.abspath(root)
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self._lock = threading.Lock()
+        self.manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest: Dict[str, Dict[str, Any]] = json.load(f)
+            return manifest
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.json.gz")
+
+    def put(self, repo: str, metric: str, raw: bytes, validators: Optional[Dict[str, str]] = None) -> str:
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.manifest[f"{repo}/{metric}"] = {
+                "sha256": digest,
+                "size": len(raw),
+                "validators": validators or {},
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+            }
+        return digest
+
+    def entry(self, repo: str, metric: str) -> Optional[Dict[str, Any]]:
+        return self.manifest.get(f"{repo}/{metric}")
+
+    def get_raw(self, repo: str, metric: str) -> Optional[bytes]:
+        entry = self.entry(repo, metric)
+        if not entry: return None
+        try:
+            with gzip.open(self._object_path(entry["sha256"]), 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        if hashlib.sha256(raw).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Snapshot object for {repo}/{metric} is corrupt")
+        return raw
+
+    def get(self, repo: str, metric: str) -> Optional[Dict[str, Any]]:
+        raw = self.get_raw(repo, metric)
+        return json.loads(raw) if raw is not None else None
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
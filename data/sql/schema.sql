@@ -4,10 +4,59 @@ CREATE TABLE IF NOT EXISTS open_digger_metrics (
     id INT AUTO_INCREMENT PRIMARY KEY,
     repo_name VARCHAR(255) NOT NULL,
     metric_type VARCHAR(64) NOT NULL, -- e.g., 'stars', 'openrank', 'activity'
-    month VARCHAR(7) NOT NULL,       -- Format: YYYY-MM
+    month DATE NOT NULL,             -- First day of the month: YYYY-MM-01
     value DOUBLE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_repo_metric (repo_name, metric_type)
+    UNIQUE KEY uq_repo_metric_month (repo_name, metric_type, month),
+    -- Covers the generated "WHERE repo_name .. AND metric_type .. ORDER BY month" queries
+    INDEX idx_repo_metric_month_value (repo_name, metric_type, month, value)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Materialized by data/etl_scripts/materialize.py after each ETL run
+CREATE TABLE IF NOT EXISTS metric_forecasts (
+    repo_name VARCHAR(255) NOT NULL,
+    metric_type VARCHAR(64) NOT NULL,
+    month DATE NOT NULL,
+    value DOUBLE NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (repo_name, metric_type, month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS metric_anomalies (
+    repo_name VARCHAR(255) NOT NULL,
+    metric_type VARCHAR(64) NOT NULL,
+    month DATE NOT NULL,
+    value DOUBLE,
+    change_ratio DOUBLE,             -- Month-over-month relative change
+    z_score DOUBLE,                  -- Against the series' own mean / std
+    kind VARCHAR(8) NOT NULL,        -- 'SPIKE' or 'DROP'
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (repo_name, metric_type, month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS repo_metric_snapshots (
+    repo_name VARCHAR(255) NOT NULL,
+    metric_type VARCHAR(64) NOT NULL,
+    month DATE NOT NULL,             -- Latest month of the series
+    value DOUBLE,
+    change_floor DOUBLE,             -- Smallest month-over-month change kept in metric_anomalies
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (repo_name, metric_type)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS metric_rollups (
+    repo_name VARCHAR(255) NOT NULL,
+    metric_type VARCHAR(64) NOT NULL,
+    months INT NOT NULL,
+    first_month DATE NOT NULL,
+    last_month DATE NOT NULL,
+    min_value DOUBLE,
+    max_value DOUBLE,
+    avg_value DOUBLE,
+    total_value DOUBLE,
+    change_ratio DOUBLE,             -- (last - first) / first
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (repo_name, metric_type)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE IF NOT EXISTS users (
@@ -1,6 +1,15 @@
 CREATE TABLE IF NOT EXISTS sessions (
     id VARCHAR(36) PRIMARY KEY,
     title VARCHAR(255),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_sessions_created_id (created_at, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Query results shared by every message that produced the same evidence
+CREATE TABLE IF NOT EXISTS evidence_blobs (
+    hash CHAR(64) PRIMARY KEY,       -- sha256 of the serialized JSON
+    payload MEDIUMBLOB NOT NULL,     -- zlib-compressed JSON
+    raw_size INT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -10,8 +19,10 @@ CREATE TABLE IF NOT EXISTS messages (
     role VARCHAR(20) NOT NULL,
     content TEXT,
     evidence_sql TEXT,
-    evidence_data JSON, -- Store chart data snapshot if possible, or just ignore for now
+    evidence_data JSON, -- Legacy inline snapshot, new messages reference evidence_blobs
+    evidence_hash CHAR(64), -- sha256 of the serialized result, see evidence_blobs
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_session (session_id),
+    INDEX idx_messages_session_id (session_id, id),
+    INDEX idx_messages_evidence_hash (evidence_hash),
     FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
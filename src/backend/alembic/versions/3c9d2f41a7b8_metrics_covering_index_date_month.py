@@ -0,0 +1,50 @@
+"""Covering index, upsert key and DATE month for open_digger_metrics
+
+Revision ID: 3c9d2f41a7b8
+Revises: 71e25aec6397
+Create Date: 2026-10-17 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d2f41a7b8'
+down_revision: Union[str, Sequence[str], None] = '71e25aec6397'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the newest row of any duplicated month so the unique key can be built.
+    op.execute("""
+        DELETE older FROM open_digger_metrics older
+        JOIN open_digger_metrics newer
+          ON older.repo_name = newer.repo_name
+         AND older.metric_type = newer.metric_type
+         AND older.month = newer.month
+         AND older.id < newer.id
+    """)
+
+    # 'YYYY-MM' -> 'YYYY-MM-01', then switch the column to DATE.
+    op.alter_column('open_digger_metrics', 'month', existing_type=sa.String(7), type_=sa.String(10), existing_nullable=False)
+    op.execute("UPDATE open_digger_metrics SET month = CONCAT(month, '-01') WHERE LENGTH(month) = 7")
+    op.alter_column('open_digger_metrics', 'month', existing_type=sa.String(10), type_=sa.Date(), existing_nullable=False)
+
+    op.create_unique_constraint('uq_repo_metric_month', 'open_digger_metrics', ['repo_name', 'metric_type', 'month'])
+    op.create_index('idx_repo_metric_month_value', 'open_digger_metrics', ['repo_name', 'metric_type', 'month', 'value'])
+    # Left-prefix of both new indexes.
+    op.drop_index('idx_repo_metric', table_name='open_digger_metrics')
+
+
+def downgrade() -> None:
+    op.create_index('idx_repo_metric', 'open_digger_metrics', ['repo_name', 'metric_type'])
+    op.drop_index('idx_repo_metric_month_value', table_name='open_digger_metrics')
+    op.drop_constraint('uq_repo_metric_month', 'open_digger_metrics', type_='unique')
+
+    op.alter_column('open_digger_metrics', 'month', existing_type=sa.Date(), type_=sa.String(10), existing_nullable=False)
+    op.execute("UPDATE open_digger_metrics SET month = LEFT(month, 7)")
+    op.alter_column('open_digger_metrics', 'month', existing_type=sa.String(10), type_=sa.String(7), existing_nullable=False)
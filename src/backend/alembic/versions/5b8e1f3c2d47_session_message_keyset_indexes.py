@@ -0,0 +1,40 @@
+"""Keyset pagination indexes for sessions and messages
+
+Revision ID: 5b8e1f3c2d47
+Revises: a41e7c0d9b25
+Create Date: 2026-10-17 13:20:04.918342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e1f3c2d47'
+down_revision: Union[str, Sequence[str], None] = 'a41e7c0d9b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /sessions: ORDER BY created_at DESC, id DESC with a (created_at, id) cursor
+    op.create_index('idx_sessions_created_id', 'sessions', ['created_at', 'id'])
+    # GET /sessions/{id}/messages and history: session_id = ? AND id > ? ORDER BY id
+    op.create_index('idx_messages_session_id', 'messages', ['session_id', 'id'])
+    # Databases created from session_schema.sql also have idx_session (session_id), a prefix of the above.
+    if _has_index('messages', 'idx_session'):
+        op.drop_index('idx_session', table_name='messages')
+
+
+def downgrade() -> None:
+    # The session_id foreign key needs an index once idx_messages_session_id is gone.
+    if not _has_index('messages', 'idx_session'):
+        op.create_index('idx_session', 'messages', ['session_id'])
+    op.drop_index('idx_messages_session_id', table_name='messages')
+    op.drop_index('idx_sessions_created_id', table_name='sessions')
+
+
+def _has_index(table: str, name: str) -> bool:
+    return any(ix['name'] == name for ix in sa.inspect(op.get_bind()).get_indexes(table))
@@ -0,0 +1,77 @@
+"""Content-addressed, compressed evidence storage
+
+Revision ID: 8d2a6c9e4f13
+Revises: 5b8e1f3c2d47
+Create Date: 2026-10-17 14:05:51.203117
+
+"""
+import hashlib
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2a6c9e4f13'
+down_revision: Union[str, Sequence[str], None] = '5b8e1f3c2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 500
+
+
+def canonical_json(data) -> bytes:
+    # Frozen copy of services/evidence_store.canonical_json: migrations don't import app code.
+    return json.dumps(data, default=str, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def upgrade() -> None:
+    op.create_table(
+        'evidence_blobs',
+        sa.Column('hash', sa.CHAR(64), nullable=False, primary_key=True),
+        sa.Column('payload', mysql.MEDIUMBLOB(), nullable=False),
+        sa.Column('raw_size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP, server_default=sa.func.now())
+    )
+    op.add_column('messages', sa.Column('evidence_hash', sa.CHAR(64), nullable=True))
+    op.create_index('idx_messages_evidence_hash', 'messages', ['evidence_hash'])
+
+    # Move inline evidence into blobs; hashes must match services/evidence_store.encode_evidence.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, evidence_data FROM messages "
+            "WHERE id > :last_id AND evidence_data IS NOT NULL ORDER BY id LIMIT :batch"
+        ), {"last_id": last_id, "batch": BATCH}).fetchall()
+        if not rows: break
+        for message_id, evidence in rows:
+            data = json.loads(evidence) if isinstance(evidence, (str, bytes)) else evidence
+            if data:
+                raw = canonical_json(data)
+                digest = hashlib.sha256(raw).hexdigest()
+                bind.execute(sa.text(
+                    "INSERT IGNORE INTO evidence_blobs (hash, payload, raw_size) VALUES (:hash, :payload, :size)"
+                ), {"hash": digest, "payload": zlib.compress(raw, 6), "size": len(raw)})
+            else:
+                digest = None
+            bind.execute(sa.text(
+                "UPDATE messages SET evidence_hash = :hash, evidence_data = NULL WHERE id = :id"
+            ), {"hash": digest, "id": message_id})
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT hash, payload FROM evidence_blobs")).fetchall()
+    for row in rows:
+        bind.execute(sa.text(
+            "UPDATE messages SET evidence_data = :data WHERE evidence_hash = :hash"
+        ), {"data": zlib.decompress(row.payload).decode("utf-8"), "hash": row.hash})
+    op.drop_index('idx_messages_evidence_hash', table_name='messages')
+    op.drop_column('messages', 'evidence_hash')
+    op.drop_table('evidence_blobs')
@@ -0,0 +1,77 @@
+"""Materialized analytics tables written by the ETL post-processing stage
+
+Revision ID: a41e7c0d9b25
+Revises: 3c9d2f41a7b8
+Create Date: 2026-10-17 11:02:15.642871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41e7c0d9b25'
+down_revision: Union[str, Sequence[str], None] = '3c9d2f41a7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'metric_forecasts',
+        sa.Column('repo_name', sa.String(255), nullable=False),
+        sa.Column('metric_type', sa.String(64), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('value', mysql.DOUBLE(), nullable=False),
+        sa.Column('computed_at', sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('repo_name', 'metric_type', 'month')
+    )
+
+    op.create_table(
+        'metric_anomalies',
+        sa.Column('repo_name', sa.String(255), nullable=False),
+        sa.Column('metric_type', sa.String(64), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('value', mysql.DOUBLE(), nullable=True),
+        sa.Column('change_ratio', mysql.DOUBLE(), nullable=True),
+        sa.Column('z_score', mysql.DOUBLE(), nullable=True),
+        sa.Column('kind', sa.String(8), nullable=False),
+        sa.Column('computed_at', sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('repo_name', 'metric_type', 'month')
+    )
+
+    op.create_table(
+        'repo_metric_snapshots',
+        sa.Column('repo_name', sa.String(255), nullable=False),
+        sa.Column('metric_type', sa.String(64), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('value', mysql.DOUBLE(), nullable=True),
+        sa.Column('computed_at', sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('repo_name', 'metric_type')
+    )
+
+    op.create_table(
+        'metric_rollups',
+        sa.Column('repo_name', sa.String(255), nullable=False),
+        sa.Column('metric_type', sa.String(64), nullable=False),
+        sa.Column('months', sa.Integer(), nullable=False),
+        sa.Column('first_month', sa.Date(), nullable=False),
+        sa.Column('last_month', sa.Date(), nullable=False),
+        sa.Column('min_value', mysql.DOUBLE(), nullable=True),
+        sa.Column('max_value', mysql.DOUBLE(), nullable=True),
+        sa.Column('avg_value', mysql.DOUBLE(), nullable=True),
+        sa.Column('total_value', mysql.DOUBLE(), nullable=True),
+        sa.Column('change_ratio', mysql.DOUBLE(), nullable=True),
+        sa.Column('computed_at', sa.TIMESTAMP, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('repo_name', 'metric_type')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('metric_rollups')
+    op.drop_table('repo_metric_snapshots')
+    op.drop_table('metric_anomalies')
+    op.drop_table('metric_forecasts')
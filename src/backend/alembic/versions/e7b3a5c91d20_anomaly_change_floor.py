@@ -0,0 +1,40 @@
+"""Record the anomaly change floor per series and widen analytics values to DOUBLE
+
+Revision ID: e7b3a5c91d20
+Revises: 8d2a6c9e4f13
+Create Date: 2026-10-17 16:40:12.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3a5c91d20'
+down_revision: Union[str, Sequence[str], None] = '8d2a6c9e4f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Created as FLOAT by earlier builds of a41e7c0d9b25; schema.sql has always used DOUBLE.
+DOUBLE_COLUMNS = {
+    'metric_forecasts': [('value', False)],
+    'metric_anomalies': [('value', True), ('change_ratio', True), ('z_score', True)],
+    'repo_metric_snapshots': [('value', True)],
+    'metric_rollups': [('min_value', True), ('max_value', True), ('avg_value', True),
+                       ('total_value', True), ('change_ratio', True)],
+}
+
+
+def upgrade() -> None:
+    for table, columns in DOUBLE_COLUMNS.items():
+        for column, nullable in columns:
+            op.alter_column(table, column, type_=mysql.DOUBLE(), existing_nullable=nullable)
+    # NULL for series materialized before this revision: the backend recomputes their alerts.
+    op.add_column('repo_metric_snapshots', sa.Column('change_floor', mysql.DOUBLE(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('repo_metric_snapshots', 'change_floor')
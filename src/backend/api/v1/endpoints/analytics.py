@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Request
 from typing import List, Dict, Any
 from pydantic import BaseModel
 from src.backend.services.analytics import detect_anomalies
+from src.backend.core.pools import read_pool
 
 router = APIRouter()
 
@@ -53,24 +54,35 @@ async def get_suspect_dossier(request: DossierRequest):
 @router.post("/analytics/profile")
 async def get_repo_profile(payload: ProfileRequest, request: Request):
     repo = payload.repo
-    pool = request.app.state.pool
+    pool = read_pool(request.app.state, "profile", request.app.state.pool)
     
     metrics = {}
     
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            # Get latest month data
-            await cur.execute("""
-                SELECT metric_type, value 
-                FROM open_digger_metrics 
-                WHERE repo_name = %s 
-                AND month = (
-                    SELECT MAX(month) FROM open_digger_metrics WHERE repo_name = %s
-                )
-            """, (repo, repo))
+            # Latest month of each metric, materialized by the ETL.
+            await cur.execute(
+                "SELECT metric_type, value FROM repo_metric_snapshots WHERE repo_name = %s", (repo,)
+            )
             rows = await cur.fetchall()
+            if not rows:
+                # Not materialized yet: one index dive per metric on
+                # (repo_name, metric_type, month, value) instead of a correlated subquery.
+                await cur.execute("""
+                    SELECT m.metric_type, m.value
+                    FROM open_digger_metrics m
+                    JOIN (
+                        SELECT metric_type, MAX(month) AS month
+                        FROM open_digger_metrics
+                        WHERE repo_name = %s
+                        GROUP BY metric_type
+                    ) latest ON latest.metric_type = m.metric_type AND latest.month = m.month
+                    WHERE m.repo_name = %s
+                """, (repo, repo))
+                rows = await cur.fetchall()
             for row in rows:
-                metrics[row['metric_type']] = float(row['value'])
+                if row['value'] is not None:
+                    metrics[row['metric_type']] = float(row['value'])
     
     if not metrics:
         # Return mock data if repo not found (for demo purposes)
@@ -101,6 +113,23 @@ def mock_profile(name, v1, v2, v3, v4, v5):
         {"name": "Velocity", "value": v5, "max": 100},
     ]}
 
+@router.post("/analytics/rollups")
+async def get_repo_rollups(payload: ProfileRequest, request: Request):
+    pool = read_pool(request.app.state, "rollups", request.app.state.pool)
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("""
+                SELECT metric_type, months, first_month, last_month, min_value, max_value,
+                       avg_value, total_value, change_ratio
+                FROM metric_rollups WHERE repo_name = %s ORDER BY metric_type
+            """, (payload.repo,))
+            rows = await cur.fetchall()
+    rollups = [
+        {**row, "first_month": str(row['first_month'])[:7], "last_month": str(row['last_month'])[:7]}
+        for row in rows
+    ]
+    return {"repo": payload.repo, "rollups": rollups}
+
 class SentimentRequest(BaseModel):
     repo: str
 
@@ -1,27 +1,39 @@
 import json
-import csv
-import io
-from fastapi import APIRouter, Request, HTTPException, Response
+from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from src.backend.schemas.chat import ChatRequest, ChatResponse, FeedbackRequest
 from src.backend.services.chat_service import ChatService
+from src.backend.services.evidence_store import resolve_evidence
+from src.backend.services.exporters import EXPORT_FORMATS, columnar_available, iter_rows
 from src.backend.core.limiter import limiter
+from src.backend.core.config import settings
+from src.backend.core.deadline import Deadline
+from src.backend.core.pools import read_pool
 from datetime import datetime
 import os
 
 router = APIRouter()
 
+def query_pool(request: Request):
+    """Pool for generated SQL: a healthy replica, else the read-only query pool, else the primary pool."""
+    state = request.app.state
+    return read_pool(state, "chat_sql", getattr(state, "query_pool", None) or state.pool)
+
 @router.post("/chat", response_model=ChatResponse)
-@limiter.limit("10/minute")
+@limiter.limit(settings.RATE_LIMIT_CHAT)
 async def chat(request: Request, chat_request: ChatRequest):
+    deadline = Deadline(settings.CHAT_DEADLINE)
     pool = request.app.state.pool
+    writer = getattr(request.app.state, "message_writer", None)
     if chat_request.session_id:
-        await ChatService.save_user_message(pool, chat_request.session_id, chat_request.message)
+        await ChatService.save_user_message(pool, chat_request.session_id, chat_request.message, writer)
     
-    history = await ChatService.get_history(pool, chat_request.session_id) if chat_request.session_id else []
+    # History stays on the primary: the turn was just written there, a replica may not have it yet.
+    history = await ChatService.get_history(pool, chat_request.session_id, writer) if chat_request.session_id else []
     
     # Unpack 5 values
-    sql, data, engine, error, repair_logs = await ChatService.process_request(chat_request.message, history, pool)
+    sql, data, engine, error, repair_logs = await ChatService.process_request(chat_request.message, history, query_pool(request), deadline)
     
     answer = ""
     # Prepend repair logs to answer
@@ -35,11 +47,11 @@ async def chat(request: Request, chat_request: ChatRequest):
     elif not data:
         answer += "报告 Agent，在当前数据库中未搜寻到相关线索..."
     else:
-        async for chunk in ChatService.generate_answer_stream(chat_request.message, data, history, engine):
+        async for chunk in ChatService.generate_answer_stream(chat_request.message, data, history, engine, sql, deadline):
             answer += chunk
     
     if chat_request.session_id:
-        await ChatService.save_assistant_message(pool, chat_request.session_id, answer, sql, data)
+        await ChatService.save_assistant_message(pool, chat_request.session_id, answer, sql, data, writer)
         
     return ChatResponse(
         answer=answer,
@@ -49,16 +61,19 @@ async def chat(request: Request, chat_request: ChatRequest):
     )
 
 @router.post("/chat/stream")
-@limiter.limit("10/minute")
+@limiter.limit(settings.RATE_LIMIT_CHAT)
 async def chat_stream(request: Request, chat_request: ChatRequest):
+    deadline = Deadline(settings.CHAT_STREAM_DEADLINE)
     pool = request.app.state.pool
+    writer = getattr(request.app.state, "message_writer", None)
     if chat_request.session_id:
-        await ChatService.save_user_message(pool, chat_request.session_id, chat_request.message)
+        await ChatService.save_user_message(pool, chat_request.session_id, chat_request.message, writer)
     
-    history = await ChatService.get_history(pool, chat_request.session_id) if chat_request.session_id else []
+    # History stays on the primary: the turn was just written there, a replica may not have it yet.
+    history = await ChatService.get_history(pool, chat_request.session_id, writer) if chat_request.session_id else []
     
     # Unpack 5 values
-    sql, data, engine, error, repair_logs = await ChatService.process_request(chat_request.message, history, pool)
+    sql, data, engine, error, repair_logs = await ChatService.process_request(chat_request.message, history, query_pool(request), deadline)
     
     async def event_generator():
         # 1. Stream Repair Logs (Visual Self-Healing)
@@ -94,12 +109,12 @@ async def chat_stream(request: Request, chat_request: ChatRequest):
             yield json.dumps({"type": "token", "content": msg}) + "\n"
             full_answer += msg
         else:
-            async for chunk in ChatService.generate_answer_stream(chat_request.message, data, history, engine):
+            async for chunk in ChatService.generate_answer_stream(chat_request.message, data, history, engine, sql, deadline):
                 yield json.dumps({"type": "token", "content": chunk}) + "\n"
                 full_answer += chunk
         
         if chat_request.session_id:
-            await ChatService.save_assistant_message(pool, chat_request.session_id, full_answer, sql, data)
+            await ChatService.save_assistant_message(pool, chat_request.session_id, full_answer, sql, data, writer)
         
         yield json.dumps({"type": "done"}) + "\n"
 
@@ -116,24 +131,31 @@ async def collect_feedback(feedback: FeedbackRequest):
 
 @router.get("/messages/{message_id}/export")
 async def export_message_data(message_id: int, request: Request, format: str = "csv"):
+    if format != "json" and format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if format in ("arrow", "parquet") and not columnar_available():
+        raise HTTPException(status_code=501, detail=f"{format} export requires pyarrow")
+
     pool = request.app.state.pool
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("SELECT evidence_data FROM messages WHERE id = %s", (message_id,))
+            await cur.execute("SELECT id, evidence_data, evidence_hash FROM messages WHERE id = %s", (message_id,))
             row = await cur.fetchone()
+            if row:
+                await resolve_evidence(cur, [row])
             
     if not row or not row['evidence_data']:
         raise HTTPException(status_code=404, detail="No data found")
         
-    data = json.loads(row['evidence_data']) if isinstance(row['evidence_data'], str) else row['evidence_data']
+    data = row['evidence_data']
     
     if format == "json":
         return data
-        
-    output = io.StringIO()
-    if data and isinstance(data, list):
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
-        
-    return Response(content=output.getvalue(), media_type="text/csv", headers={"Content-Disposition": f"attachment; filename=data-{message_id}.csv"})
\ No newline at end of file
+
+    rows = data if isinstance(data, list) else []
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        iterate_in_threadpool(iter_rows(rows, format)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=data-{message_id}.{extension}"}
+    )
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request
 from src.backend.schemas.chat import HealthResponse
-import os
-import requests
+from src.backend.core.config import settings
+from src.backend.services.sqlbot_client import AsyncSQLBotClient, sqlbot_breaker
 
 router = APIRouter()
 
@@ -21,6 +21,9 @@ async def health_check(request: Request):
                 "size": pool.size,
                 "free": pool.freesize
             }
+            query_pool = getattr(request.app.state, "query_pool", None)
+            if query_pool:
+                pool_info["query_pool"] = {"size": query_pool.size, "free": query_pool.freesize}
     except Exception as e:
         pool_info["error"] = str(e)
     
@@ -34,9 +37,10 @@ async def health_check(request: Request):
 
 @router.get("/sqlbot-health")
 async def sqlbot_health():
-    endpoint = os.getenv("SQLBOT_ENDPOINT", "http://sqlbot:8000")
+    """Reachability of SQLBot plus the circuit breaker guarding chat calls to it."""
+    breaker = sqlbot_breaker.snapshot()
     try:
-        res = requests.get(endpoint, timeout=2)
-        return {"status": "reachable", "code": res.status_code}
+        res = await AsyncSQLBotClient._get_http().get(settings.SQLBOT_ENDPOINT, timeout=2)
+        return {"status": "reachable", "code": res.status_code, "breaker": breaker}
     except Exception as e:
-        return {"status": "unreachable", "error": str(e)}
\ No newline at end of file
+        return {"status": "unreachable", "error": str(e), "breaker": breaker}
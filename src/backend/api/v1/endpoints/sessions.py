@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from src.backend.schemas.chat import Session, Message
-from typing import List
-import uuid
+from typing import List, Optional, Tuple
+import base64
 import json
+import uuid
+from src.backend.services.history_cache import history_cache
+from src.backend.services.evidence_store import resolve_evidence
+from src.backend.services.exporters import iter_zip, message_markdown, session_markdown_header
 from datetime import datetime
 
 router = APIRouter()
@@ -17,44 +22,162 @@ async def create_session(request: Request):
             await cur.execute("INSERT INTO sessions (id, title) VALUES (%s, %s)", (session_id, title))
     return {"id": session_id, "title": title, "created_at": datetime.now()}
 
+def encode_cursor(created_at, session_id: str) -> str:
+    stamp = created_at.isoformat(sep=' ') if hasattr(created_at, 'isoformat') else str(created_at)
+    return base64.urlsafe_b64encode(f"{stamp}|{session_id}".encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        stamp, session_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return stamp, session_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+SESSION_PAGE = 50
+MESSAGE_PAGE = 200
+
 @router.get("/sessions", response_model=List[Session])
-async def list_sessions(request: Request):
+async def list_sessions(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """
+    Newest first, `limit` (default SESSION_PAGE) sessions per page, with the
+    cursor for the next page in the X-Next-Cursor header.
+    """
     pool = request.app.state.pool
+    page = limit or SESSION_PAGE
+    sql = "SELECT id, title, created_at FROM sessions"
+    params: tuple = ()
+    if cursor:
+        stamp, session_id = decode_cursor(cursor)
+        sql += " WHERE created_at < %s OR (created_at = %s AND id < %s)"
+        params = (stamp, stamp, session_id)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT %s"
+    params += (page + 1,)
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("SELECT id, title, created_at FROM sessions ORDER BY created_at DESC")
-            sessions = await cur.fetchall()
-            return sessions
+            await cur.execute(sql, params)
+            sessions = list(await cur.fetchall())
+    if len(sessions) > page:
+        sessions = sessions[:page]
+        response.headers["X-Next-Cursor"] = encode_cursor(sessions[-1]['created_at'], sessions[-1]['id'])
+    return sessions
 
-@router.get("/sessions/{session_id}/messages", response_model=List[Message])
-async def get_session_messages(session_id: str, request: Request):
-    pool = request.app.state.pool
+MESSAGE_FIELDS = ["evidence_sql", "evidence_data"]
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """id, role and content are always returned; `fields` picks the evidence columns (default: all)."""
+    if fields is None: return MESSAGE_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in MESSAGE_FIELDS + ["id", "role", "content"]]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return [f for f in MESSAGE_FIELDS if f in requested]
+
+async def fetch_messages(pool, session_id: str, after_id: int = 0, limit: Optional[int] = MESSAGE_PAGE,
+                         extra_fields: List[str] = MESSAGE_FIELDS) -> List[dict]:
+    """`limit=None` fetches every message after `after_id`."""
+    # evidence_data lives in evidence_blobs for new messages (evidence_hash) and inline for old ones.
+    columns = ["id", "role", "content"] + extra_fields + (["evidence_hash"] if "evidence_data" in extra_fields else [])
+    sql = f"SELECT {', '.join(columns)} FROM messages WHERE session_id = %s AND id > %s ORDER BY id ASC"
+    params: tuple = (session_id, after_id)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params += (limit,)
     async with pool.acquire() as conn:
         async with conn.cursor() as cur:
-            await cur.execute("SELECT id, role, content, evidence_sql, evidence_data FROM messages WHERE session_id = %s ORDER BY id ASC", (session_id,))
-            rows = await cur.fetchall()
-            for row in rows:
-                if row.get('evidence_data') and isinstance(row['evidence_data'], str):
-                     try: row['evidence_data'] = json.loads(row['evidence_data'])
-                     except: pass
-            return rows
+            await cur.execute(sql, params)
+            rows = list(await cur.fetchall())
+            if "evidence_data" in extra_fields:
+                await resolve_evidence(cur, rows)
+    return rows
+
+@router.get("/sessions/{session_id}/messages", response_model=List[Message], response_model_exclude_unset=True)
+async def get_session_messages(
+    session_id: str,
+    request: Request,
+    response: Response,
+    after_id: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fields: Optional[str] = None
+):
+    """
+    Oldest first. Paged when `limit` or `after_id` is given (`limit` messages
+    after `after_id`, X-Next-Cursor carries the next after_id); without
+    either, the whole session.
+    """
+    page = limit or (MESSAGE_PAGE if after_id else None)
+    rows = await fetch_messages(request.app.state.pool, session_id, after_id, page + 1 if page else None, parse_fields(fields))
+    if page and len(rows) > page:
+        rows = rows[:page]
+        response.headers["X-Next-Cursor"] = str(rows[-1]['id'])
+    return rows
+
+EXPORT_PAGE = 500
+
+async def iter_session_messages(pool, session_id: str, extra_fields: List[str]):
+    """All messages of a session, fetched EXPORT_PAGE rows at a time."""
+    after_id = 0
+    while True:
+        messages = await fetch_messages(pool, session_id, after_id, EXPORT_PAGE, extra_fields)
+        for msg in messages:
+            yield msg
+        if len(messages) < EXPORT_PAGE: break
+        after_id = messages[-1]['id']
+
+async def iter_session_markdown(pool, session_id: str, title: Optional[str] = None):
+    yield session_markdown_header(session_id, title)
+    async for msg in iter_session_messages(pool, session_id, ["evidence_sql"]):
+        yield message_markdown(msg)
+
+async def iter_session_ndjson(pool, session_id: str):
+    async for msg in iter_session_messages(pool, session_id, MESSAGE_FIELDS):
+        yield json.dumps({"session_id": session_id, **msg}, default=str, ensure_ascii=False) + "\n"
+
+@router.get("/sessions/export.zip")
+async def export_all_sessions(request: Request):
+    """Every session as session-<id>.md inside one zip, streamed as it is built."""
+    pool = request.app.state.pool
+
+    async def entries():
+        cursor = None
+        while True:
+            sql = "SELECT id, title, created_at FROM sessions"
+            params: tuple = ()
+            if cursor:
+                sql += " WHERE created_at < %s OR (created_at = %s AND id < %s)"
+                params = (cursor[0], cursor[0], cursor[1])
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(sql + " ORDER BY created_at DESC, id DESC LIMIT %s", params + (EXPORT_PAGE,))
+                    sessions = list(await cur.fetchall())
+            for session in sessions:
+                yield f"session-{session['id']}.md", iter_session_markdown(pool, session['id'], session.get('title'))
+            if len(sessions) < EXPORT_PAGE: break
+            cursor = (sessions[-1]['created_at'], sessions[-1]['id'])
+
+    return StreamingResponse(
+        iter_zip(entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=sessions.zip"}
+    )
 
 @router.get("/sessions/{session_id}/export")
-async def export_session(session_id: str, request: Request):
-    messages = await get_session_messages(session_id, request)
-    
-    md = f"# Investigation Session {session_id}\n\n"
-    for msg in messages:
-        role = msg['role'].upper()
-        content = msg['content']
-        md += f"### {role}\n{content}\n\n"
-        if msg.get('evidence_sql'):
-            md += f"```sql\n{msg['evidence_sql']}\n```\n\n"
-            
-    return Response(
-        content=md,
-        media_type="text/markdown",
-        headers={"Content-Disposition": f"attachment; filename=session-{session_id}.md"}
+async def export_session(session_id: str, request: Request, format: str = "md"):
+    pool = request.app.state.pool
+    if format == "md":
+        body, media_type = iter_session_markdown(pool, session_id), "text/markdown"
+    elif format == "ndjson":
+        body, media_type = iter_session_ndjson(pool, session_id), "application/x-ndjson"
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=session-{session_id}.{format}"}
     )
 
 @router.delete("/sessions/{session_id}")
@@ -67,6 +190,7 @@ async def delete_session(session_id: str, request: Request):
             await cur.execute("DELETE FROM messages WHERE session_id = %s", (session_id,))
             
             await cur.execute("DELETE FROM sessions WHERE id = %s", (session_id,))
+            await history_cache.invalidate(session_id)
             if cur.rowcount == 0:
                 # If messages existed but session didn't (unlikely), we might still want to return success or 404.
                 # If we deleted messages, we technically acted. 
@@ -0,0 +1,92 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from src.backend.core.config import settings
+from src.backend.core.metrics import BULKHEAD_IN_FLIGHT, BULKHEAD_QUEUE_DEPTH, BULKHEAD_WAIT_SECONDS, BULKHEAD_REJECTIONS
+
+class BulkheadFull(Exception):
+    """Raised when a dependency is saturated; surfaced as 503 with Retry-After."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} is saturated, retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class Bulkhead:
+    """
+    Caps concurrent calls into one dependency, with a bounded wait queue.
+
+    Callers beyond `max_concurrent` wait up to `max_wait` seconds; once
+    `max_queue` callers are already waiting, new ones are rejected at once
+    instead of piling up behind a slow dependency.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.waiting = 0
+        self.in_flight = 0
+        # Moving average of how long a slot is held, for the Retry-After estimate.
+        self._avg_hold = 1.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the running loop; rebuild if the loop changed (tests, reloads).
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+            self.waiting = 0
+            self.in_flight = 0
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + 1) / max(1, self.max_concurrent)
+        return max(1, math.ceil(self._avg_hold * backlog))
+
+    def _reject(self, reason: str):
+        BULKHEAD_REJECTIONS.labels(self.name, reason).inc()
+        raise BulkheadFull(self.name, self.retry_after())
+
+    @asynccontextmanager
+    async def acquire(self, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        """`max_wait` shortens the configured wait, e.g. to a request's remaining latency budget."""
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            self._reject("queue_full")
+
+        started = time.monotonic()
+        self.waiting += 1
+        BULKHEAD_QUEUE_DEPTH.labels(self.name).set(self.waiting)
+        try:
+            if semaphore.locked():
+                await asyncio.wait_for(semaphore.acquire(), self.max_wait if max_wait is None else min(self.max_wait, max_wait))
+            else:
+                await semaphore.acquire()  # a free slot is taken even with no wait budget left
+        except asyncio.TimeoutError:
+            self._reject("timeout")
+        finally:
+            self.waiting -= 1
+            BULKHEAD_QUEUE_DEPTH.labels(self.name).set(self.waiting)
+        BULKHEAD_WAIT_SECONDS.labels(self.name).observe(time.monotonic() - started)
+
+        acquired = time.monotonic()
+        self.in_flight += 1
+        BULKHEAD_IN_FLIGHT.labels(self.name).set(self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            BULKHEAD_IN_FLIGHT.labels(self.name).set(self.in_flight)
+            self._avg_hold = 0.8 * self._avg_hold + 0.2 * (time.monotonic() - acquired)
+            semaphore.release()
+
+# Calls into SQLBot (text-to-SQL and summaries)
+sqlbot_bulkhead = Bulkhead("sqlbot", settings.SQLBOT_MAX_CONCURRENCY, settings.SQLBOT_MAX_QUEUE, settings.SQLBOT_MAX_WAIT)
+# Execution of LLM-generated SQL on the shared MySQL pool
+query_bulkhead = Bulkhead("generated_sql", settings.DB_QUERY_MAX_CONCURRENCY, settings.DB_QUERY_MAX_QUEUE, settings.DB_QUERY_MAX_WAIT)
@@ -0,0 +1,109 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from src.backend.core.redis import redis_client
+from src.backend.core.metrics import CACHE_REQUESTS
+from src.backend.services.logger import logger
+
+# After a Redis failure every cache skips the remote tier for this long,
+# so an unreachable Redis costs one failed round trip instead of one per lookup.
+REMOTE_BACKOFF_SECONDS = 30.0
+_remote_down_until = 0.0
+
+def remote_available() -> bool:
+    return redis_client is not None and time.monotonic() >= _remote_down_until
+
+def mark_remote_down(error: Exception):
+    global _remote_down_until
+    if time.monotonic() >= _remote_down_until:
+        logger.warning("Redis unavailable, using local cache tier only", error=str(error))
+    _remote_down_until = time.monotonic() + REMOTE_BACKOFF_SECONDS
+
+class LocalLRU:
+    """Bounded in-process LRU with per-entry TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None: return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class TieredCache:
+    """
+    In-process LRU tier in front of the shared Redis client.
+
+    Values must be JSON-serializable. Redis errors never propagate: the cache
+    degrades to the local tier and retries the remote tier after a backoff.
+    """
+
+    def __init__(self, name: str, maxsize: int, local_ttl: float, remote_ttl: int):
+        self.name = name
+        self.remote_ttl = remote_ttl
+        self.local = LocalLRU(maxsize, local_ttl)
+
+    def _remote_key(self, key: str) -> str:
+        return f"od:{self.name}:{key}"
+
+    def get_local(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        CACHE_REQUESTS.labels(self.name, "hit_local" if value is not None else "miss").inc()
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_REQUESTS.labels(self.name, "hit_local").inc()
+            return value
+        if remote_available():
+            try:
+                raw = await redis_client.get(self._remote_key(key))
+                if raw is not None:
+                    value = json.loads(raw)
+                    self.local.set(key, value)
+                    CACHE_REQUESTS.labels(self.name, "hit_remote").inc()
+                    return value
+            except Exception as e:
+                mark_remote_down(e)
+        CACHE_REQUESTS.labels(self.name, "miss").inc()
+        return None
+
+    async def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        if remote_available():
+            try:
+                await redis_client.set(self._remote_key(key), json.dumps(value, default=str), ex=self.remote_ttl)
+            except Exception as e:
+                mark_remote_down(e)
+
+    async def delete(self, key: str):
+        self.local.delete(key)
+        if remote_available():
+            try:
+                await redis_client.delete(self._remote_key(key))
+            except Exception as e:
+                mark_remote_down(e)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from src.backend.core.metrics import CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+from src.backend.services.logger import logger
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream dependency.
+
+    After `failure_threshold` failures in a row the circuit opens and callers
+    take their fallback immediately. While open, a background task calls
+    `probe` every `recovery_timeout` seconds (half-open) and closes the circuit
+    on the first success. If no probe task is running, the first request after
+    `recovery_timeout` is let through as the trial instead.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: float = 30.0,
+                 probe: Optional[Callable[[], Awaitable[bool]]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_failure: Optional[str] = None
+        self.last_probe_at: Optional[float] = None
+        self._probe_task: Optional[asyncio.Task] = None
+        CIRCUIT_STATE.labels(name).set(0)
+
+    def _transition(self, state: str):
+        if state == self.state: return
+        logger.warning("Circuit breaker state change", breaker=self.name, old=self.state, new=state)
+        CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+        CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.time()
+            self._start_probe()
+        elif state == CLOSED:
+            self.failures = 0
+            self.opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self._probe_task is not None and not self._probe_task.done():
+            return False  # the background probe decides
+        if self.state == OPEN and time.time() - (self.opened_at or 0) >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+        return self.state == HALF_OPEN  # trial call, settled by record_success/record_failure
+
+    def record_success(self):
+        self._transition(CLOSED)
+        self.failures = 0
+
+    def record_failure(self, error: Any = None):
+        self.failures += 1
+        self.last_failure = str(error) if error is not None else self.last_failure
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._transition(OPEN)
+
+    def _start_probe(self):
+        if self.probe is None or (self._probe_task is not None and not self._probe_task.done()): return
+        try:
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+        except RuntimeError:
+            self._probe_task = None  # no loop (sync caller): trial requests will close it
+
+    async def _probe_loop(self):
+        while self.state != CLOSED:
+            await asyncio.sleep(self.recovery_timeout)
+            if self.state == CLOSED: break
+            self._transition(HALF_OPEN)
+            self.last_probe_at = time.time()
+            try:
+                healthy = await self.probe()
+            except Exception as e:
+                healthy, self.last_failure = False, str(e)
+            if healthy:
+                self.record_success()
+            else:
+                self._transition(OPEN)  # this task keeps probing
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "opened_at": self.opened_at,
+            "last_failure": self.last_failure,
+            "last_probe_at": self.last_probe_at,
+        }
@@ -14,11 +14,33 @@ class Settings(BaseSettings):
     DB_NAME: str = "open_detective"
     DB_POOL_MIN: int = 1
     DB_POOL_MAX: int = 20
+    # Read-only pool for LLM-generated SQL (optionally with its own SELECT-only account)
+    DB_QUERY_POOL_ENABLED: bool = True
+    DB_QUERY_POOL_MIN: int = 1
+    DB_QUERY_POOL_MAX: int = 8
+    DB_QUERY_USER: str = ""
+    DB_QUERY_PASSWORD: str = ""
+    # Generated (chat) SQL may hold at most this many connections at once
+    # (of the query pool, or of the primary pool when it is disabled).
+    DB_QUERY_MAX_CONCURRENCY: int = 8
+    DB_QUERY_MAX_QUEUE: int = 100
+    DB_QUERY_MAX_WAIT: float = 5.0
+    # Optional read replicas ("host[:port],..."), used for analytical reads while their
+    # lag (SHOW REPLICA STATUS, needs REPLICATION CLIENT) stays within DB_REPLICA_MAX_LAG
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_POOL_MIN: int = 1
+    DB_REPLICA_POOL_MAX: int = 10
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0
     REDIS_URL: str = "redis://redis:6379/0"
     
     # App
     SQL_ENGINE_TYPE: str = "mock"
     ANOMALY_THRESHOLD: float = 0.5
+    # Serve canonical metric queries from the in-process NumPy copy of open_digger_metrics
+    METRICS_STORE_ENABLED: bool = True
+    # Above this many rows the store stays disabled instead of holding the table in memory
+    METRICS_STORE_MAX_ROWS: int = 5_000_000
     
     # SQLBot
     SQLBOT_ENDPOINT: str = "http://sqlbot:8000"
@@ -26,6 +48,63 @@ class Settings(BaseSettings):
     SQLBOT_PASSWORD: str = "SQLBot@123456"
     SQLBOT_DATASOURCE_ID: int = 1
     SQLBOT_API_KEY: str = ""
+    SQLBOT_MAX_CONNECTIONS: int = 20
+    SQLBOT_MAX_CONCURRENCY: int = 10
+    SQLBOT_CONNECT_TIMEOUT: float = 5.0
+    SQLBOT_START_TIMEOUT: float = 20.0
+    SQLBOT_QUESTION_TIMEOUT: float = 30.0
+    SQLBOT_MAX_QUEUE: int = 50
+    SQLBOT_MAX_WAIT: float = 10.0
+    # Consecutive SQLBot failures before switching to the mock engine / fallback report
+    SQLBOT_BREAKER_FAILURES: int = 3
+    SQLBOT_BREAKER_RESET: float = 30.0
+
+    # Per-endpoint latency budgets (seconds) shared by SQL generation, execution and summary
+    CHAT_DEADLINE: float = 25.0
+    CHAT_STREAM_DEADLINE: float = 45.0
+    # Below this much remaining budget a SQLBot call is not started (mock SQL / fallback report instead)
+    SQLBOT_MIN_BUDGET: float = 3.0
+
+    # Validation verdicts cached per query fingerprint
+    SQL_VALIDATOR_CACHE_SIZE: int = 4096
+
+    # EXPLAIN-based guard for generated SQL
+    QUERY_GUARD_ENABLED: bool = True
+    QUERY_GUARD_MAX_COST: float = 1_000_000.0
+    QUERY_GUARD_MAX_ROWS: int = 5000
+    QUERY_GUARD_MAX_EXECUTION_TIME: float = 10.0
+    QUERY_GUARD_PLAN_CACHE_SIZE: int = 1024
+    QUERY_GUARD_PLAN_TTL: float = 600.0
+
+    # Results of generated SQL, invalidated by the ETL's dataset version
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_TTL: int = 86400
+    RESULT_CACHE_LOCAL_SIZE: int = 256
+    RESULT_CACHE_LOCAL_TTL: float = 300.0
+    RESULT_CACHE_MAX_BYTES: int = 512 * 1024
+    # How long the dataset version read from Redis is trusted before re-reading it
+    RESULT_CACHE_VERSION_TTL: float = 5.0
+
+    # Text-to-SQL cache
+    SQL_CACHE_TTL: int = 86400
+    SQL_CACHE_LOCAL_SIZE: int = 512
+    SQL_CACHE_LOCAL_TTL: float = 3600.0
+
+    # Rate limiting (token buckets in Redis)
+    RATE_LIMIT_CHAT: str = "10/minute"
+    # Extra tokens billed when a chat turn actually calls SQLBot (cache misses, summaries)
+    RATE_LIMIT_SQLBOT_COST: float = 1.0
+
+    # Session history / evidence caches
+    HISTORY_CACHE_TTL: int = 3600
+    HISTORY_CACHE_LOCAL_SIZE: int = 2048
+    EVIDENCE_CACHE_SIZE: int = 1024
+
+    # Write-behind message persistence
+    MESSAGE_WRITER_ENABLED: bool = True
+    MESSAGE_QUEUE_SIZE: int = 10000
+    MESSAGE_BATCH_SIZE: int = 200
+    MESSAGE_FLUSH_INTERVAL: float = 0.05
     
     @field_validator("ANOMALY_THRESHOLD")
     @classmethod
@@ -0,0 +1,47 @@
+import math
+import time
+from typing import Optional, overload
+from src.backend.core.metrics import DEADLINE_DEGRADATIONS
+from src.backend.services.logger import logger
+
+class Deadline:
+    """
+    Latency budget of one request, created by the endpoint and passed down the
+    chat pipeline so every stage (SQL generation, execution, summary) only uses
+    what is left instead of its own fixed timeout. `Deadline(None)` is unbounded.
+    """
+
+    def __init__(self, budget: Optional[float]):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget if budget is not None else math.inf
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at != math.inf
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @overload
+    def timeout(self, cap: float) -> float: ...
+    @overload
+    def timeout(self, cap: None = None) -> Optional[float]: ...
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """The smaller of `cap` and the remaining budget; None only when both are unbounded."""
+        if not self.bounded: return cap
+        return self.remaining() if cap is None else min(cap, self.remaining())
+
+    def allows(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def degrade(self, stage: str):
+        """Records that `stage` was skipped or cut short to stay within the budget."""
+        DEADLINE_DEGRADATIONS.labels(stage).inc()
+        logger.info("Latency budget short, degrading", stage=stage, remaining=round(self.remaining(), 3))
+
+UNBOUNDED = Deadline(None)
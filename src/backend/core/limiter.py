@@ -1,4 +1,148 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import contextvars
+import functools
+import inspect
+import math
+import time
+from typing import NamedTuple, Optional, Tuple
+from fastapi import HTTPException, Request
+from redis.commands.core import AsyncScript
+from src.backend.core.cache import LocalLRU, remote_available, mark_remote_down
+from src.backend.core.metrics import RATE_LIMIT_DECISIONS
+from src.backend.core.redis import redis_client
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["100/minute"])
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Refill, then take `cost` tokens if available (or unconditionally with force=1,
+# which lets a bucket go into debt down to -capacity). Time comes from Redis so
+# every worker sees the same clock.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost or force == 1 then
+    tokens = math.max(-capacity, tokens - cost)
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(2 * capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+class Rule(NamedTuple):
+    capacity: float
+    rate: float  # tokens per second
+    text: str
+
+def parse_rate(limit: str) -> Rule:
+    """'10/minute' -> bucket of 10 tokens refilled at 10 per minute."""
+    amount, _, period = limit.partition("/")
+    period = period.strip().lower().rstrip("s")
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported rate limit period: {limit}")
+    capacity = float(amount)
+    return Rule(capacity, capacity / PERIODS[period], limit)
+
+def get_remote_address(request: Request) -> str:
+    return request.client.host if request.client else "127.0.0.1"
+
+class _Charge(NamedTuple):
+    limiter: "TokenBucketLimiter"
+    key: str
+    rule: Rule
+    route: str
+
+_current_charge: contextvars.ContextVar[Optional[_Charge]] = contextvars.ContextVar("rate_limit_charge", default=None)
+
+class TokenBucketLimiter:
+    """
+    Token-bucket rate limiter shared by every worker through Redis (one Lua
+    script per decision). While Redis is unavailable each worker falls back to
+    its own in-process buckets.
+
+    Endpoints are decorated with `@limiter.limit("10/minute", cost=1)`; work that
+    turns out to be expensive (an SQLBot call) adds to the bill with `charge_request`.
+    """
+
+    def __init__(self, key_func=get_remote_address, prefix: str = "od:rl"):
+        self.key_func = key_func
+        self.prefix = prefix
+        self._local = LocalLRU(maxsize=100000, ttl=3600.0)
+        self._script: Optional[AsyncScript] = None
+
+    def _take_local(self, key: str, rule: Rule, cost: float, force: bool) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, ts = self._local.get(key) or (rule.capacity, now)
+        tokens = min(rule.capacity, tokens + max(0.0, now - ts) * rule.rate)
+        if tokens >= cost or force:
+            self._local.set(key, (max(-rule.capacity, tokens - cost), now))
+            return True, 0.0
+        self._local.set(key, (tokens, now))
+        return False, (cost - tokens) / rule.rate
+
+    async def take(self, key: str, rule: Rule, cost: float = 1, force: bool = False, route: str = "") -> Tuple[bool, float]:
+        """(allowed, retry_after_seconds)"""
+        backend = "local"
+        if remote_available():
+            try:
+                if self._script is None:
+                    self._script = redis_client.register_script(TOKEN_BUCKET_LUA)
+                allowed, retry_after = await self._script(
+                    keys=[f"{self.prefix}:{key}"], args=[rule.capacity, rule.rate, cost, int(force)]
+                )
+                result = (bool(int(allowed)), float(retry_after))
+                backend = "redis"
+            except Exception as e:
+                mark_remote_down(e)
+                result = self._take_local(key, rule, cost, force)
+        else:
+            result = self._take_local(key, rule, cost, force)
+        decision = "charged" if force else ("allowed" if result[0] else "limited")
+        RATE_LIMIT_DECISIONS.labels(route, decision, backend).inc()
+        return result
+
+    def limit(self, limit_value: str, cost: float = 1):
+        rule = parse_rate(limit_value)
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = kwargs.get("request")
+                if not isinstance(request, Request):
+                    request = next(a for a in args if isinstance(a, Request))
+                route = request.scope.get("route").path if request.scope.get("route") else request.url.path
+                key = f"{route}:{self.key_func(request)}"
+                allowed, retry_after = await self.take(key, rule, cost, route=route)
+                if not allowed:
+                    raise HTTPException(
+                        status_code=429,
+                        detail=f"Rate limit exceeded: {rule.text}",
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                    )
+                _current_charge.set(_Charge(self, key, rule, route))
+                return await func(*args, **kwargs)
+
+            wrapper.__signature__ = inspect.signature(func)
+            return wrapper
+        return decorator
+
+async def charge_request(cost: float):
+    """Bills extra tokens to the rate-limit bucket of the request being served, if any."""
+    charge = _current_charge.get()
+    if charge is None or cost <= 0: return
+    try:
+        await charge.limiter.take(charge.key, charge.rule, cost, force=True, route=charge.route)
+    except Exception:
+        pass
+
+limiter = TokenBucketLimiter(key_func=get_remote_address)
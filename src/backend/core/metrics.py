@@ -0,0 +1,121 @@
+"""
+Application-level Prometheus metrics.
+
+Everything registered here lands in the default registry and is served by the
+Instrumentator `/metrics` endpoint next to the HTTP metrics.
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+CACHE_REQUESTS = Counter(
+    "opendetective_cache_requests_total",
+    "Cache lookups by cache name and outcome (hit_local, hit_remote, miss).",
+    ["cache", "result"]
+)
+
+SINGLEFLIGHT_COALESCED = Counter(
+    "opendetective_singleflight_coalesced_total",
+    "Requests that joined an identical in-flight call instead of starting their own.",
+    ["flight"]
+)
+
+METRICS_STORE_QUERIES = Counter(
+    "opendetective_metrics_store_queries_total",
+    "Generated queries answered from the in-memory metrics store (hit) or sent to MySQL (fallback).",
+    ["result"]
+)
+
+MATERIALIZED_READS = Counter(
+    "opendetective_materialized_reads_total",
+    "Chat lookups served from the ETL-materialized analytics (hit) or recomputed per request (miss).",
+    ["kind", "result"]
+)
+
+MESSAGE_WRITES = Counter(
+    "opendetective_message_writes_total",
+    "Chat messages persisted by the write-behind writer (batched), directly (direct) or lost (dropped).",
+    ["result"]
+)
+
+EVIDENCE_WRITES = Counter(
+    "opendetective_evidence_blob_writes_total",
+    "Evidence blobs sent to MySQL with INSERT IGNORE (written) or skipped because this process already stored the hash (skipped).",
+    ["result"]
+)
+
+RATE_LIMIT_DECISIONS = Counter(
+    "opendetective_rate_limit_decisions_total",
+    "Token-bucket decisions by route: allowed, limited, or charged (extra cost billed after the fact).",
+    ["route", "decision", "backend"]
+)
+
+BULKHEAD_IN_FLIGHT = Gauge(
+    "opendetective_bulkhead_in_flight",
+    "Calls currently holding a bulkhead slot.",
+    ["bulkhead"]
+)
+
+BULKHEAD_QUEUE_DEPTH = Gauge(
+    "opendetective_bulkhead_queue_depth",
+    "Calls waiting for a bulkhead slot.",
+    ["bulkhead"]
+)
+
+BULKHEAD_WAIT_SECONDS = Histogram(
+    "opendetective_bulkhead_wait_seconds",
+    "Time spent waiting for a bulkhead slot.",
+    ["bulkhead"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+BULKHEAD_REJECTIONS = Counter(
+    "opendetective_bulkhead_rejections_total",
+    "Calls rejected with 503 because the queue was full or the wait timed out.",
+    ["bulkhead", "reason"]
+)
+
+CIRCUIT_STATE = Gauge(
+    "opendetective_circuit_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open).",
+    ["breaker"]
+)
+
+CIRCUIT_TRANSITIONS = Counter(
+    "opendetective_circuit_transitions_total",
+    "Circuit breaker state changes by the state entered.",
+    ["breaker", "state"]
+)
+
+DEADLINE_DEGRADATIONS = Counter(
+    "opendetective_deadline_degradations_total",
+    "Pipeline stages skipped or cut short because the request's latency budget ran low.",
+    ["stage"]
+)
+
+QUERY_GUARD_DECISIONS = Counter(
+    "opendetective_query_guard_decisions_total",
+    "Generated SQL vetted by the EXPLAIN cost guard, by outcome (allowed, limited, rejected, unplanned).",
+    ["decision"]
+)
+
+SQL_VALIDATIONS = Counter(
+    "opendetective_sql_validations_total",
+    "Generated SQL validations, by whether the verdict came from the fingerprint cache.",
+    ["cache"]
+)
+
+RESULT_CACHE_BYTES_SAVED = Counter(
+    "opendetective_result_cache_bytes_saved_total",
+    "Serialized size of query results served from the result cache instead of MySQL."
+)
+
+REPLICA_LAG = Gauge(
+    "opendetective_replica_lag_seconds",
+    "Replication lag of each read replica (-1 when unknown or replication is stopped).",
+    ["replica"]
+)
+
+DB_READ_ROUTES = Counter(
+    "opendetective_db_read_routes_total",
+    "Analytical reads by route and the pool they were sent to (replica or primary).",
+    ["route", "target"]
+)
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+from typing import Dict, List, Optional, Tuple
+import aiomysql
+from src.backend.core.config import settings
+from src.backend.core.metrics import DB_READ_ROUTES, REPLICA_LAG
+from src.backend.services.logger import logger
+
+async def create_mysql_pool(name: str, host: str, minsize: int, maxsize: int, user: Optional[str] = None,
+                            password: Optional[str] = None, init_command: Optional[str] = None,
+                            attempts: int = 5, retry_delay: float = 5.0, port: int = 3306) -> Optional[aiomysql.Pool]:
+    """Creates an aiomysql DictCursor pool, retrying while MySQL starts up. Returns None if it never connects."""
+    for i in range(attempts):
+        try:
+            logger.info("Connecting to MySQL (Async)", pool=name, attempt=i+1)
+            pool = await aiomysql.create_pool(
+                host=host,
+                port=port,
+                user=user or settings.DB_USER,
+                password=settings.DB_PASSWORD if password is None else password,
+                db=settings.DB_NAME,
+                autocommit=True,
+                cursorclass=aiomysql.DictCursor,
+                init_command=init_command,
+                minsize=minsize,
+                maxsize=maxsize
+            )
+            logger.info("Connected to MySQL.", pool=name)
+            return pool
+        except Exception as e:
+            logger.warning("MySQL connection failed", pool=name, error=str(e))
+            if i < attempts - 1:
+                await asyncio.sleep(retry_delay)
+    return None
+
+def query_session_init() -> str:
+    """
+    Session settings of the generated-SQL pool: every connection is read-only
+    and the server aborts statements after QUERY_GUARD_MAX_EXECUTION_TIME even
+    when a query reaches MySQL without the optimizer hint.
+    """
+    timeout_ms = max(1, int(settings.QUERY_GUARD_MAX_EXECUTION_TIME * 1000))
+    return f"SET SESSION transaction_read_only = ON, SESSION max_execution_time = {timeout_ms}"
+
+async def create_query_pool() -> Optional[aiomysql.Pool]:
+    """Separate pool for LLM-generated SQL, so slow queries never hold the connections sessions/messages need."""
+    return await create_mysql_pool(
+        "generated_sql", settings.DB_HOST, settings.DB_QUERY_POOL_MIN, settings.DB_QUERY_POOL_MAX,
+        user=settings.DB_QUERY_USER or None, password=settings.DB_QUERY_PASSWORD or None,
+        init_command=query_session_init(), attempts=1
+    )
+
+def parse_replica_hosts(value: str) -> List[Tuple[str, int]]:
+    """"db-r1,db-r2:3307" -> [("db-r1", 3306), ("db-r2", 3307)]"""
+    hosts = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        host, _, port = item.partition(":")
+        hosts.append((host, int(port) if port else 3306))
+    return hosts
+
+class ReplicaSet:
+    """
+    Read replicas for analytical reads, with lag-aware routing.
+
+    A background task polls each replica's replication lag; `pick()` returns a
+    replica whose lag is within DB_REPLICA_MAX_LAG (round-robin), or None so
+    the caller stays on the primary. Only reads that tolerate that much
+    staleness belong here (metrics, snapshots), not read-your-writes lookups.
+    """
+
+    def __init__(self, replicas: Dict[str, aiomysql.Pool], max_lag: float, check_interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Dict[str, Optional[float]] = {name: None for name in replicas}  # None: unknown / broken
+        self._order = itertools.cycle(list(replicas))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._monitor())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        for pool in self.replicas.values():
+            pool.close()
+            await pool.wait_closed()
+
+    async def _monitor(self):
+        while True:
+            await asyncio.gather(*(self.check(name) for name in self.replicas))
+            await asyncio.sleep(self.check_interval)
+
+    async def check(self, name: str) -> Optional[float]:
+        lag = None
+        try:
+            async with self.replicas[name].acquire() as conn:
+                async with conn.cursor() as cur:
+                    try:
+                        await cur.execute("SHOW REPLICA STATUS")
+                    except Exception:  # MySQL < 8.0.22
+                        await cur.execute("SHOW SLAVE STATUS")
+                    row = await cur.fetchone()
+            if not row:
+                lag = 0.0  # not a classic replica (e.g. a managed reader endpoint): reachable is enough
+            else:
+                seconds = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+                lag = float(seconds) if seconds is not None else None  # NULL: replication stopped
+        except Exception as e:
+            logger.warning("Replica lag check failed", replica=name, error=str(e))
+        if self.healthy(lag) != self.healthy(self.lag.get(name)):
+            logger.info("Replica routing changed", replica=name, lag=lag, healthy=self.healthy(lag))
+        self.lag[name] = lag
+        REPLICA_LAG.labels(name).set(lag if lag is not None else -1)
+        return lag
+
+    def healthy(self, lag: Optional[float]) -> bool:
+        return lag is not None and lag <= self.max_lag
+
+    def pick(self) -> Optional[aiomysql.Pool]:
+        for _ in range(len(self.replicas)):
+            name = next(self._order)
+            if self.healthy(self.lag[name]):
+                return self.replicas[name]
+        return None
+
+async def create_replica_set() -> Optional[ReplicaSet]:
+    replicas = {}
+    for host, port in parse_replica_hosts(settings.DB_REPLICA_HOSTS):
+        name = f"{host}:{port}"
+        pool = await create_mysql_pool(
+            f"replica {name}", host, settings.DB_REPLICA_POOL_MIN, settings.DB_REPLICA_POOL_MAX,
+            init_command=query_session_init(), attempts=1, port=port
+        )
+        if pool:
+            replicas[name] = pool
+    if not replicas: return None
+    return ReplicaSet(replicas, settings.DB_REPLICA_MAX_LAG, settings.DB_REPLICA_CHECK_INTERVAL)
+
+def read_pool(state, route: str, fallback):
+    """Pool for a read-only analytical query: a healthy replica when configured, else `fallback`."""
+    replicas = getattr(state, "replicas", None)
+    pool = replicas.pick() if replicas else None
+    DB_READ_ROUTES.labels(route, "replica" if pool else "primary").inc()
+    return pool or fallback
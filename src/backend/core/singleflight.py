@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+from src.backend.core.metrics import SINGLEFLIGHT_COALESCED
+
+T = TypeVar("T")
+
+class _Broadcast:
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution.
+
+    The shared work runs in its own task, so a caller that disconnects or is
+    cancelled does not cancel the call for the others still waiting on it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            SINGLEFLIGHT_COALESCED.labels(self.name).inc()
+        return await asyncio.shield(task)
+
+    async def _pump(self, key: str, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[Any]]):
+        try:
+            async for chunk in factory():
+                async with broadcast.changed:
+                    broadcast.chunks.append(chunk)
+                    broadcast.changed.notify_all()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            self._streams.pop(key, None)
+            async with broadcast.changed:
+                broadcast.done = True
+                broadcast.changed.notify_all()
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Fans one async generator out to every concurrent consumer with the same key; late joiners replay from the start."""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, factory))
+        else:
+            SINGLEFLIGHT_COALESCED.labels(self.name).inc()
+
+        i = 0
+        while True:
+            async with broadcast.changed:
+                await broadcast.changed.wait_for(lambda: len(broadcast.chunks) > i or broadcast.done)
+                ready = broadcast.chunks[i:]
+                finished = broadcast.done
+            for chunk in ready:
+                yield chunk
+            i += len(ready)
+            if finished and i >= len(broadcast.chunks):
+                if broadcast.error is not None:
+                    raise broadcast.error
+                return
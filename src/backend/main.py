@@ -2,7 +2,6 @@
 # Licensed under the MIT License. See LICENSE file for details.
 
 import os
-import aiomysql
 import json
 import sys
 import time
@@ -16,8 +15,6 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
 from asgi_correlation_id import CorrelationIdMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
@@ -26,7 +23,14 @@ from prometheus_fastapi_instrumentator import Instrumentator
 from src.backend.services.logger import configure_logger, logger
 from src.backend.api.v1.api import api_router
 from src.backend.core.limiter import limiter
+from src.backend.core.bulkhead import BulkheadFull
 from src.backend.core.config import settings
+from src.backend.core.pools import create_mysql_pool, create_query_pool, create_replica_set
+from src.backend.services.sqlbot_client import AsyncSQLBotClient
+from src.backend.services.metrics_store import metrics_store
+from src.backend.services.materialized import materialized
+from src.backend.services.result_cache import result_cache
+from src.backend.services.message_writer import MessageWriter
 
 import subprocess
 
@@ -52,6 +56,18 @@ def run_sqlbot_init():
     except Exception as e:
         logger.warning(f"SQLBot auto-config failed: {e}")
 
+async def refresh_metrics_store(pool):
+    try:
+        await metrics_store.load(pool)
+    except Exception as e:
+        logger.warning("Metrics store load failed, serving from MySQL", error=str(e))
+
+async def refresh_materialized(pool):
+    try:
+        await materialized.load(pool)
+    except Exception as e:
+        logger.warning("Materialized analytics load failed, computing per request", error=str(e))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     start_time = time.time()
@@ -61,54 +77,80 @@ async def lifespan(app: FastAPI):
     # Trigger SQLBot Init in background
     asyncio.create_task(asyncio.to_thread(run_sqlbot_init))
 
+    loop = asyncio.get_running_loop()
+
     # Lazy import ETL script to avoid sys.path issues during startup
     try:
         sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
         from data.etl_scripts.fetch_opendigger import run_etl
+
+        def scheduled_etl():
+            # Runs in the scheduler thread; hand the reload back to the event loop.
+            run_etl()
+            loop.call_soon_threadsafe(result_cache.on_dataset_changed)
+            if not getattr(app.state, "pool", None): return
+            asyncio.run_coroutine_threadsafe(refresh_materialized(app.state.pool), loop)
+            if settings.METRICS_STORE_ENABLED:
+                asyncio.run_coroutine_threadsafe(refresh_metrics_store(app.state.pool), loop)
+
         scheduler = BackgroundScheduler()
-        scheduler.add_job(run_etl, 'interval', hours=24)
+        scheduler.add_job(scheduled_etl, 'interval', hours=24)
         scheduler.start()
     except ImportError:
         logger.warning("ETL Script import failed, scheduler not started")
         scheduler = None
 
     # Async Pool
-    pool = None
-    max_retries = 5
-    for i in range(max_retries):
-        try:
-            logger.info("Connecting to MySQL (Async)", attempt=i+1)
-            pool = await aiomysql.create_pool(
-                host=settings.DB_HOST,
-                user=settings.DB_USER,
-                password=settings.DB_PASSWORD,
-                db=settings.DB_NAME,
-                autocommit=True,
-                cursorclass=aiomysql.DictCursor,
-                minsize=settings.DB_POOL_MIN,
-                maxsize=settings.DB_POOL_MAX
-            )
-            app.state.pool = pool
-            logger.info("Connected to MySQL.")
-            break
-        except Exception as e:
-            logger.warning("MySQL connection failed", error=str(e))
-            if i < max_retries - 1:
-                await asyncio.sleep(5)
-    
+    pool = await create_mysql_pool("primary", settings.DB_HOST, settings.DB_POOL_MIN, settings.DB_POOL_MAX)
     if not pool:
         logger.critical("Could not connect to MySQL after multiple attempts. Exiting.")
         raise RuntimeError("Database connection failed")
+    app.state.pool = pool
+
+    # Generated SQL runs on its own read-only pool; without it, it shares the primary pool.
+    query_pool = await create_query_pool() if settings.DB_QUERY_POOL_ENABLED else None
+    if query_pool:
+        app.state.query_pool = query_pool
+    elif settings.DB_QUERY_POOL_ENABLED:
+        logger.warning("Generated-SQL pool unavailable, using the primary pool")
+
+    # Analytical reads go to lag-checked replicas when configured.
+    replicas = await create_replica_set() if settings.DB_REPLICA_HOSTS else None
+    if replicas:
+        app.state.replicas = replicas
+        replicas.start()
+    elif settings.DB_REPLICA_HOSTS:
+        logger.warning("No read replica reachable, reads stay on the primary")
+
+    if settings.MESSAGE_WRITER_ENABLED:
+        app.state.message_writer = MessageWriter(
+            pool,
+            batch_size=settings.MESSAGE_BATCH_SIZE,
+            flush_interval=settings.MESSAGE_FLUSH_INTERVAL,
+            max_queue=settings.MESSAGE_QUEUE_SIZE
+        )
+        app.state.message_writer.start()
+
+    # Loaded in the background; until then queries fall back to MySQL / per-request analytics.
+    asyncio.create_task(refresh_materialized(pool))
+    if settings.METRICS_STORE_ENABLED:
+        asyncio.create_task(refresh_metrics_store(pool))
 
     duration = time.time() - start_time
     logger.info(f"Startup complete in {duration:.2f}s")
 
     yield
+    if getattr(app.state, "message_writer", None):
+        await app.state.message_writer.close()
+    await AsyncSQLBotClient.aclose()
     if scheduler:
         scheduler.shutdown()
-    if pool:
-        pool.close()
-        await pool.wait_closed()
+    if replicas:
+        await replicas.close()
+    for p in (query_pool, pool):
+        if p:
+            p.close()
+            await p.wait_closed()
 
 app = FastAPI(
     title="Open-Detective API",
@@ -136,6 +178,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
@@ -151,7 +194,6 @@ async def add_security_headers(request: Request, call_next):
     return response
 
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 Instrumentator().instrument(app).expose(app)
 
@@ -161,7 +203,17 @@ from src.backend.schemas.common import BaseError
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     return JSONResponse(
         content=BaseError(code=exc.status_code, message=exc.detail).model_dump(),
-        status_code=exc.status_code
+        status_code=exc.status_code,
+        headers=getattr(exc, "headers", None)
+    )
+
+@app.exception_handler(BulkheadFull)
+async def bulkhead_full_handler(request: Request, exc: BulkheadFull):
+    logger.warning("Admission rejected", bulkhead=exc.name, retry_after=exc.retry_after)
+    return JSONResponse(
+        content=BaseError(code=503, message="Service busy, please retry shortly", details=exc.name).model_dump(),
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)}
     )
 
 @app.exception_handler(Exception)
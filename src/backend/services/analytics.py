@@ -1,5 +1,5 @@
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from datetime import datetime
 
 def add_months(start_date: datetime, months: int) -> datetime:
@@ -9,88 +9,152 @@ def add_months(start_date: datetime, months: int) -> datetime:
     # Handle day overflow (though we use day=1 for YYYY-MM)
     return start_date.replace(year=year, month=month, day=1)
 
+class SeriesBatch(NamedTuple):
+    """Rows of many series laid out for vectorized math, sorted by (series, month)."""
+    keys: List[Tuple[Optional[str], Optional[str]]]  # (repo_name, metric_type) per series id
+    group: np.ndarray       # series id per row
+    values: np.ndarray      # float64 per row
+    rows: List[int]         # index into the original data per row
+    counts: np.ndarray      # rows per series
+    starts: np.ndarray      # offset of each series' first row
+
+def group_series(data: List[Dict[str, Any]], require_month: bool = True) -> Optional[SeriesBatch]:
+    """
+    Splits mixed rows (e.g. a "vue vs react" result) into (repo_name, metric_type)
+    series. Forecast rows and rows without a numeric value are skipped.
+    """
+    key_ids: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+    group, months, values, rows = [], [], [], []
+    for i, d in enumerate(data):
+        if d.get('is_forecast') or 'value' not in d: continue
+        if require_month and 'month' not in d: continue
+        try:
+            value = float(d['value'])
+        except (TypeError, ValueError):
+            continue
+        key = (d.get('repo_name'), d.get('metric_type'))
+        group.append(key_ids.setdefault(key, len(key_ids)))
+        months.append(str(d.get('month', '')))
+        values.append(value)
+        rows.append(i)
+    if not rows: return None
+
+    group_arr = np.asarray(group, dtype=np.int64)
+    order = np.lexsort((np.asarray(months), group_arr))
+    group_arr = group_arr[order]
+    counts = np.bincount(group_arr, minlength=len(key_ids))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return SeriesBatch(
+        keys=list(key_ids),
+        group=group_arr,
+        values=np.asarray(values, dtype=np.float64)[order],
+        rows=[rows[i] for i in order],
+        counts=counts,
+        starts=starts
+    )
+
 def forecast_next_months(data: List[Dict[str, Any]], months: int = 3) -> List[Dict[str, Any]]:
     """
-    Predicts next 'months' data points using simple linear regression.
+    Predicts next 'months' data points for every (repo_name, metric_type) series
+    using simple linear regression, solved for all series at once.
     """
     if not data or len(data) < 2:
         return []
+    batch = group_series(data)
+    if batch is None: return []
 
-    # Filter out entries without 'value' or 'month'
-    valid_data = [d for d in data if 'value' in d and 'month' in d]
-    if len(valid_data) < 2: return []
+    # Linear Regression (y = mx + c) per series from grouped sums
+    n = batch.counts.astype(np.float64)
+    x = np.arange(len(batch.group)) - batch.starts[batch.group]
+    sx = np.bincount(batch.group, weights=x, minlength=len(n))
+    sy = np.bincount(batch.group, weights=batch.values, minlength=len(n))
+    sxx = np.bincount(batch.group, weights=x * x, minlength=len(n))
+    sxy = np.bincount(batch.group, weights=x * batch.values, minlength=len(n))
+    denom = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m = np.where(denom != 0, (n * sxy - sx * sy) / denom, 0.0)
+        c = np.where(n > 0, (sy - m * sx) / n, 0.0)
 
-    # Sort by month
-    sorted_data = sorted(valid_data, key=lambda x: x['month'])
-    
-    values = [float(d['value']) for d in sorted_data]
-    x = np.arange(len(values))
-    y = np.array(values)
-    
-    # Linear Regression (y = mx + c)
-    A = np.vstack([x, np.ones(len(x))]).T
-    m, c = np.linalg.lstsq(A, y, rcond=None)[0]
-    
-    # Forecast
     future_points = []
-    last_date_str = sorted_data[-1]['month']
-    try:
-        # Assuming YYYY-MM
-        if len(last_date_str) == 7:
+    for g, (repo, metric) in enumerate(batch.keys):
+        if batch.counts[g] < 2: continue
+        last_row = data[batch.rows[batch.starts[g] + batch.counts[g] - 1]]
+        last_date_str = str(last_row['month'])
+        try:
+            # Assuming YYYY-MM
+            if len(last_date_str) != 7: continue
             last_date = datetime.strptime(last_date_str, "%Y-%m")
-        else:
-            return [] # Unknown format
-    except:
-        return []
+        except ValueError:
+            continue
+
+        steps = batch.counts[g] - 1 + np.arange(1, months + 1)
+        predicted = np.maximum(0.0, m[g] * steps + c[g])
+        for i in range(months):
+            future_points.append({
+                "repo_name": repo or 'Forecast',
+                "metric_type": metric or 'unknown',
+                "month": add_months(last_date, i + 1).strftime("%Y-%m"),
+                "value": float(predicted[i]),
+                "is_forecast": True
+            })
 
-    for i in range(1, months + 1):
-        next_x = len(values) - 1 + i
-        next_val = m * next_x + c
-        next_date = add_months(last_date, i)
-        future_points.append({
-            "repo_name": sorted_data[0].get('repo_name', 'Forecast'),
-            "metric_type": sorted_data[0].get('metric_type', 'unknown'),
-            "month": next_date.strftime("%Y-%m"),
-            "value": max(0, float(next_val)),
-            "is_forecast": True
-        })
-        
     return future_points
 
 def detect_anomalies(data: List[Dict[str, Any]], threshold: float = 2.0) -> List[Dict[str, Any]]:
     """
-    Detects anomalies in time-series data using Z-score.
+    Detects anomalies in time-series data using a Z-score computed per
+    (repo_name, metric_type) series.
     """
     if not data or len(data) < 3:
         return []
+    batch = group_series(data, require_month=False)
+    if batch is None: return []
 
-    valid_data = [d for d in data if 'value' in d]
-    if len(valid_data) < 3: return []
-    
-    try:
-        values = [float(d['value']) for d in valid_data]
-    except ValueError:
-        return [] # Cannot parse values
-
-    mean = np.mean(values)
-    std = np.std(values)
+    n = batch.counts.astype(np.float64)
+    mean = np.bincount(batch.group, weights=batch.values, minlength=len(n)) / np.maximum(n, 1)
+    dev = batch.values - mean[batch.group]
+    std = np.sqrt(np.bincount(batch.group, weights=dev * dev, minlength=len(n)) / np.maximum(n, 1))
+    row_std = std[batch.group]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(row_std > 0, dev / row_std, 0.0)
+    flagged = (np.abs(z) > threshold) & (batch.counts[batch.group] >= 3)
 
     anomalies = []
-    if std == 0: return []
-
-    for d in valid_data:
-        try:
-            val = float(d['value'])
-            z_score = (val - mean) / std
-            if abs(z_score) > threshold:
-                anomalies.append({
-                    **d,
-                    "z_score": float(z_score),
-                    "mean": float(mean),
-                    "std_dev": float(std),
-                    "is_anomaly": True
-                })
-        except:
-            continue
-            
+    for i in sorted(np.nonzero(flagged)[0], key=lambda i: batch.rows[i]):
+        g = batch.group[i]
+        anomalies.append({
+            **data[batch.rows[i]],
+            "z_score": float(z[i]),
+            "mean": float(mean[g]),
+            "std_dev": float(std[g]),
+            "is_anomaly": True
+        })
     return anomalies
+
+def detect_changes(data: List[Dict[str, Any]], threshold: float, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Month-over-month spikes/drops larger than `threshold` (relative change),
+    compared only within the same series, strongest first.
+    """
+    batch = group_series(data)
+    if batch is None: return []
+
+    same_series = batch.group[1:] == batch.group[:-1]
+    prev, curr = batch.values[:-1], batch.values[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(prev != 0, (curr - prev) / prev, 0.0)
+    hits = np.nonzero(same_series & (prev != 0) & (np.abs(change) > threshold))[0]
+    hits = hits[np.argsort(-np.abs(change[hits]), kind="stable")]
+    if limit is not None:
+        hits = hits[:limit]
+
+    changes = []
+    for i in hits:
+        row = data[batch.rows[i + 1]]
+        changes.append({
+            "month": row.get('month'),
+            "repo_name": row.get('repo_name'),
+            "metric_type": row.get('metric_type'),
+            "change": float(change[i])
+        })
+    return changes
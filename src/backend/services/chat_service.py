@@ -1,86 +1,134 @@
 import os
 import json
+import hashlib
 import asyncio
 from typing import Optional, Tuple, AsyncGenerator
 from src.backend.services.engine_factory import get_sql_engine
 from src.backend.services.logger import logger
 from src.backend.core.config import settings
-from src.backend.services.analytics import forecast_next_months
-from src.backend.services.sql_validator import validate_sql
+from src.backend.services.analytics import forecast_next_months, detect_changes
+from src.backend.services.sql_validator import analyze_sql
+from src.backend.services.query_guard import QueryRejected, guard_query
+from src.backend.services.result_cache import jsonable_rows, result_cache
+from src.backend.services.metrics_store import metrics_store, parse_series_query
+from src.backend.services.materialized import materialized
+from src.backend.services.sql_cache import normalize_question
+from src.backend.services.history_cache import history_cache
+from src.backend.services.message_writer import MessageWriter, message_row, commit_messages
+from src.backend.services.evidence_store import canonical_json
+from src.backend.core.singleflight import SingleFlight
+from src.backend.core.bulkhead import BulkheadFull, query_bulkhead
+from src.backend.core.deadline import Deadline, UNBOUNDED
 
-def detect_anomalies(data: list) -> list:
-    """Scans data for significant spikes or drops."""
+DRAMATIC_PAUSE = 0.5
+
+# Identical questions asked concurrently (e.g. a shared dashboard link) run one pipeline.
+_pipeline_flight = SingleFlight("chat_pipeline")
+_answer_flight = SingleFlight("chat_answer")
+
+def coalesce_key(message: str, history: list) -> str:
+    """Identity of a chat turn: the normalized question plus the full history it is answered against."""
+    digest = hashlib.sha1(json.dumps(
+        [[m.get('role'), m.get('content')] for m in history], ensure_ascii=False
+    ).encode("utf-8")).hexdigest()[:16]
+    return f"{normalize_question(message)}|{digest}"
+
+def evidence_key(sql: str, data: list) -> str:
+    """Identity of the evidence an answer is written from: the executed SQL and its rows."""
+    return hashlib.sha1(sql.encode("utf-8") + b"|" + canonical_json(data)).hexdigest()[:16]
+
+def normalize_rows(rows: list) -> list:
+    """open_digger_metrics.month is a DATE; the API and analytics speak 'YYYY-MM'."""
+    for row in rows:
+        month = row.get('month')
+        if hasattr(month, 'strftime'):
+            row['month'] = month.strftime("%Y-%m")
+    return rows
+
+def full_series_query(sql: str, data: list):
+    """The parsed query when `data` holds whole series (no LIMIT), i.e. materialized results apply."""
+    query = parse_series_query(sql) if sql else None
+    if query is None or query.limit is not None: return None
+    repos = list(dict.fromkeys(d.get('repo_name') for d in data if d.get('repo_name') and not d.get('is_forecast')))
+    return query._replace(repos=repos or query.repos)
+
+def add_forecast(data: list, sql: str = "") -> list:
+    query = full_series_query(sql, data)
+    forecast = materialized.forecasts(query.repos, query.metric) if query else None
+    if forecast is None:
+        forecast = forecast_next_months(data)
+    return forecast
+
+def detect_anomalies(data: list, sql: str = "") -> list:
+    """Scans each repo/metric series for significant spikes or drops."""
     if len(data) < 3: return []
-    threshold = settings.ANOMALY_THRESHOLD
+    query = full_series_query(sql, data)
+    changes = materialized.changes(query.repos, query.metric, settings.ANOMALY_THRESHOLD, limit=3) if query else None
+    if changes is None:
+        changes = detect_changes(data, settings.ANOMALY_THRESHOLD, limit=3)
     anomalies = []
-    for i in range(1, len(data)):
-        prev = float(data[i-1].get('value') or data[i-1].get('metric_value') or 0)
-        curr = float(data[i].get('value') or data[i].get('metric_value') or 0)
-        repo = data[i].get('repo_name') or "Unknown Repository"
-        if prev == 0: continue
-        change = (curr - prev) / prev
-        if abs(change) > threshold:
-            type_label = "SPIKE" if change > 0 else "DROP"
-            anomaly = {
-                "month": data[i].get('month'),
-                "repo": repo,
-                "type": type_label,
-                "intensity": f"{abs(change)*100:.1f}%",
-                "z_score": abs(change) * 2 # Mock Z-score for now
-            }
-            anomalies.append(anomaly)
-            logger.info("Anomaly Detected", **anomaly)
-    return anomalies[:3]
+    for c in changes:
+        anomaly = {
+            "month": c['month'],
+            "repo": c['repo_name'] or "Unknown Repository",
+            "type": "SPIKE" if c['change'] > 0 else "DROP",
+            "intensity": f"{abs(c['change'])*100:.1f}%",
+            "z_score": abs(c['z_score']) if c.get('z_score') is not None else abs(c['change']) * 2
+        }
+        anomalies.append(anomaly)
+        logger.info("Anomaly Detected", **anomaly)
+    return anomalies
 
 class ChatService:
     @staticmethod
-    async def save_user_message(pool, session_id: str, message: str):
-        async with pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute("INSERT INTO messages (session_id, role, content) VALUES (%s, %s, %s)", (session_id, 'user', message))
-                
-                await cur.execute("SELECT count(*) as cnt FROM messages WHERE session_id = %s", (session_id,))
-                res = await cur.fetchone()
-                count = res.get('cnt', 0) if res else 0
-                
-                if count <= 1:
-                    title = (message[:30] + '..') if len(message) > 30 else message
-                    await cur.execute("UPDATE sessions SET title = %s WHERE id = %s", (title, session_id))
+    async def save_user_message(pool, session_id: str, message: str, writer: Optional[MessageWriter] = None):
+        row = message_row(session_id, 'user', message)
+        if not (writer and writer.enqueue(row)):
+            async with pool.acquire() as conn:
+                await commit_messages(conn, [row])
+        await history_cache.append(session_id, 'user', message)
 
     @staticmethod
-    async def save_assistant_message(pool, session_id: str, answer: str, sql: str, data: list):
-        evidence_data_json = json.dumps(data, default=str) if data else None
-        async with pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    "INSERT INTO messages (session_id, role, content, evidence_sql, evidence_data) VALUES (%s, %s, %s, %s, %s)",
-                    (session_id, 'assistant', answer, sql, evidence_data_json)
-                )
+    async def save_assistant_message(pool, session_id: str, answer: str, sql: str, data: list, writer: Optional[MessageWriter] = None):
+        row = message_row(session_id, 'assistant', answer, sql, data)
+        if not (writer and writer.enqueue(row)):
+            async with pool.acquire() as conn:
+                await commit_messages(conn, [row])
+        await history_cache.append(session_id, 'assistant', answer)
 
     @staticmethod
-    async def get_history(pool, session_id: str) -> list:
+    async def get_history(pool, session_id: str, writer: Optional[MessageWriter] = None) -> list:
+        cached = await history_cache.get(session_id)
+        if cached is not None:
+            return cached
+        pending = writer.pending_for(session_id) if writer else []
         try:
             async with pool.acquire() as conn:
                 async with conn.cursor() as cur:
                     await cur.execute("SELECT role, content FROM messages WHERE session_id = %s ORDER BY id DESC LIMIT 5", (session_id,))
                     rows = await cur.fetchall()
-                    return list(reversed(rows))
-        except: return []
+        except Exception as e:
+            logger.warning("History lookup failed", session_id=session_id, error=str(e))
+            return pending[-5:]
+        history = (list(reversed(rows)) + pending)[-5:]
+        await history_cache.fill(session_id, history)
+        return history
 
     @staticmethod
-    async def process_request(message: str, history: list, pool) -> Tuple[str, list, str, str, list]:
+    async def process_request(message: str, history: list, pool, deadline: Deadline = UNBOUNDED) -> Tuple[str, list, str, str, list]:
+        return await _pipeline_flight.do(
+            coalesce_key(message, history),
+            lambda: ChatService._process_request(message, history, pool, deadline)
+        )
+
+    @staticmethod
+    async def _process_request(message: str, history: list, pool, deadline: Deadline = UNBOUNDED) -> Tuple[str, list, str, str, list]:
         engine_type_raw = settings.SQL_ENGINE_TYPE
         engine_type = engine_type_raw.split('#')[0].strip().lower()
         repair_logs = []
 
-        sql_query = ""
-        if engine_type == "sqlbot":
-            from src.backend.services.sqlbot_client import SQLBotClient
-            client = SQLBotClient()
-            sql_query = client.generate_sql(message, history=history)
-        else:
-            engine = get_sql_engine()
-            sql_query = engine(message)
+        engine = get_sql_engine(engine_type)
+        sql_query = await engine(message, history=history, deadline=deadline)
 
         # DEMO SABOTAGE: Intentionally break SQL for the demo
         if "sabotage" in message.lower() and sql_query:
@@ -93,26 +141,55 @@ class ChatService:
         max_retries = 2
         for attempt in range(max_retries):
             if not sql_query: break
+            if attempt > 0 and deadline.expired:
+                deadline.degrade("sql_repair")
+                break
             
             try:
-                if not validate_sql(sql_query):
-                    return "", [], engine_type, "Security Alert: Only SELECT statements are allowed.", []
-
-                async with pool.acquire() as conn:
-                    async with conn.cursor() as cur:
-                        logger.info(f"Executing SQL (Attempt {attempt+1})", sql=sql_query)
-                        await cur.execute(sql_query)
-                        data = await cur.fetchall()
+                analysis = analyze_sql(sql_query)
+                if not analysis.allowed:
+                    logger.warning("Generated SQL rejected", reason=analysis.reason, fingerprint=analysis.fingerprint)
+                    return "", [], engine_type, f"Security Alert: Only SELECT statements are allowed ({analysis.reason}).", []
+
+                # Fast path: the canonical series shape is answered from memory.
+                cached_rows = metrics_store.try_answer(sql_query) if settings.METRICS_STORE_ENABLED else None
+                # Then results of identical SQL since the last ETL load.
+                cached = await result_cache.get(sql_query) if cached_rows is None else None
+                if cached_rows is not None:
+                    data = cached_rows
+                elif cached is not None:
+                    data = cached.rows
+                    repair_logs.extend(cached.notes)
+                elif deadline.expired:
+                    # SQL generation used up the budget: report it as such, not as a saturated pool.
+                    deadline.degrade("sql_execution")
+                    error_msg = "Latency budget exhausted before the query could run."
+                    break
+                else:
+                    async with query_bulkhead.acquire(deadline.timeout()):
+                        async with pool.acquire() as conn:
+                            async with conn.cursor() as cur:
+                                guarded = await guard_query(cur, sql_query, deadline)
+                                repair_logs.extend(guarded.notes)
+                                logger.info(f"Executing SQL (Attempt {attempt+1})", sql=guarded.sql, fingerprint=analysis.fingerprint)
+                                await cur.execute(guarded.sql)
+                                data = jsonable_rows(normalize_rows(list(await cur.fetchall())))
+                    await result_cache.set(sql_query, data, guarded.notes)
                 
-                # Add Forecast
+                # Add Forecast (precomputed by the ETL when the whole series was selected)
                 if data:
-                    forecast = forecast_next_months(data)
-                    data.extend(forecast)
+                    data.extend(add_forecast(data, sql_query))
                 
                 # If success, break loop
                 error_msg = "" # Clear error if success
                 break
                 
+            except BulkheadFull:
+                raise
+            except QueryRejected as e:
+                error_msg = str(e)
+                repair_logs.append(e.note)
+                break
             except Exception as e:
                 error_msg = str(e)
                 logger.warning(f"SQL Error (Attempt {attempt+1})", error=error_msg)
@@ -159,24 +236,35 @@ class ChatService:
             return "Pattern is stable. No significant deviations observed."
 
     @staticmethod
-    async def generate_answer_stream(message: str, data: list, history: list, engine_type: str) -> AsyncGenerator[str, None]:
+    async def generate_answer_stream(message: str, data: list, history: list, engine_type: str, sql: str = "",
+                                     deadline: Deadline = UNBOUNDED) -> AsyncGenerator[str, None]:
+        # Same turn *and* same evidence: one turn may have read a cached result from before an
+        # ETL load, or repaired its SQL. The shared stream runs under the first caller's deadline.
+        key = f"{engine_type}|{coalesce_key(message, history)}|{evidence_key(sql, data)}"
+        async for chunk in _answer_flight.stream(
+            key, lambda: ChatService._generate_answer_stream(message, data, history, engine_type, sql, deadline)
+        ):
+            yield chunk
+
+    @staticmethod
+    async def _generate_answer_stream(message: str, data: list, history: list, engine_type: str, sql: str = "",
+                                      deadline: Deadline = UNBOUNDED) -> AsyncGenerator[str, None]:
         # 1. Deduction (The "Hook")
         deduction = ChatService.generate_deduction(data)
         yield f"**[NEURAL DEDUCTION]**\n> {deduction}\n\n"
-        await asyncio.sleep(0.5) # Dramatic pause
+        # Dramatic pause, only when it does not eat into the summary's budget
+        if deadline.allows(DRAMATIC_PAUSE + settings.SQLBOT_MIN_BUDGET):
+            await asyncio.sleep(DRAMATIC_PAUSE)
 
         if engine_type == "sqlbot":
-            from src.backend.services.sqlbot_client import SQLBotClient
-            client = SQLBotClient()
-            # client.generate_summary_stream is synchronous generator.
-            # We wrap it.
-            for chunk in client.generate_summary_stream(message, data, history=history):
+            from src.backend.services.sqlbot_client import AsyncSQLBotClient
+            client = AsyncSQLBotClient()
+            async for chunk in client.generate_summary_stream(message, data, history=history, deadline=deadline):
                 yield chunk
-                await asyncio.sleep(0)
         else:
             yield f"Evidence retrieved: {len(data)} records found.\n"
             
-        clues = detect_anomalies(data)
+        clues = detect_anomalies(data, sql)
         if clues:
              clue_text = "\n\n**[ANOMALY ALERT]**\n" + "\n".join([f"- {c['month']} | {c['repo']} {c['type']} detected ({c['intensity']})" for c in clues])
              yield clue_text
\ No newline at end of file
@@ -1,18 +1,22 @@
 import os
+from typing import Optional
+from src.backend.core.deadline import Deadline
 from src.backend.services.sql_engine import mock_text_to_sql
-from src.backend.services.sqlbot_client import SQLBotClient
+from src.backend.services.sqlbot_client import AsyncSQLBotClient
 
-def get_sql_engine():
+async def mock_engine(question: str, history: list = [], deadline: Optional[Deadline] = None) -> str:
+    return mock_text_to_sql(question)
+
+def get_sql_engine(engine_type: Optional[str] = None):
     """
     Factory function to return the configured SQL engine.
+    Every engine is an async callable: `await engine(question, history=history, deadline=deadline)`.
     """
-    engine_type = os.getenv("SQL_ENGINE_TYPE", "mock").lower()
+    engine_type = (engine_type or os.getenv("SQL_ENGINE_TYPE") or "mock").lower()
     
     if engine_type == "sqlbot":
-        client = SQLBotClient(
-            endpoint=os.getenv("SQLBOT_ENDPOINT", "http://localhost:8080")
-        )
+        client = AsyncSQLBotClient()
         return client.generate_sql
     
     # Default to mock
-    return mock_text_to_sql
+    return mock_engine
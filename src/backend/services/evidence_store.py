@@ -0,0 +1,99 @@
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from src.backend.core.cache import LocalLRU
+from src.backend.core.config import settings
+from src.backend.core.metrics import CACHE_REQUESTS, EVIDENCE_WRITES
+
+COMPRESSION_LEVEL = 6
+
+class EvidenceBlob(NamedTuple):
+    hash: str       # sha256 of the serialized result
+    payload: bytes  # zlib-compressed JSON
+    raw_size: int
+
+def canonical_json(data: Any) -> bytes:
+    """Key order independent, so rows read back from MySQL JSON (which reorders keys) hash like fresh ones."""
+    return json.dumps(data, default=str, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def encode_evidence(data: Any) -> Optional[EvidenceBlob]:
+    """Serializes a query result once; identical results get the same hash."""
+    if not data: return None
+    raw = canonical_json(data)
+    return EvidenceBlob(hashlib.sha256(raw).hexdigest(), zlib.compress(raw, COMPRESSION_LEVEL), len(raw))
+
+def decode_payload(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload))
+
+# Hashes this process has already written; repeats skip the INSERT entirely.
+_stored = LocalLRU(maxsize=50000, ttl=86400.0)
+# Parsed evidence by blob hash (or "m:<id>" for legacy inline JSON). Treat as read-only.
+_parsed = LocalLRU(settings.EVIDENCE_CACHE_SIZE, 3600.0)
+
+async def store_blobs(cur, blobs: Iterable[EvidenceBlob]):
+    """Dedup on write: INSERT IGNORE on the hash primary key."""
+    blobs = list(blobs)
+    new = {b.hash: b for b in blobs if _stored.get(b.hash) is None}
+    EVIDENCE_WRITES.labels("skipped").inc(len(blobs) - len(new))
+    if not new: return
+    await cur.executemany(
+        "INSERT IGNORE INTO evidence_blobs (hash, payload, raw_size) VALUES (%s, %s, %s)",
+        [(b.hash, b.payload, b.raw_size) for b in new.values()]
+    )
+    EVIDENCE_WRITES.labels("written").inc(len(new))
+    for h in new:
+        _stored.set(h, True)
+
+async def load_blobs(cur, hashes: Iterable[str]) -> Dict[str, Any]:
+    """Parsed evidence for each hash, reading only the blobs not already cached."""
+    found: Dict[str, Any] = {}
+    missing: List[str] = []
+    for h in dict.fromkeys(hashes):
+        value = _parsed.get(h)
+        if value is not None:
+            found[h] = value
+        else:
+            missing.append(h)
+    CACHE_REQUESTS.labels("evidence", "hit_local").inc(len(found))
+    if missing:
+        CACHE_REQUESTS.labels("evidence", "miss").inc(len(missing))
+        placeholders = ", ".join(["%s"] * len(missing))
+        await cur.execute(f"SELECT hash, payload FROM evidence_blobs WHERE hash IN ({placeholders})", tuple(missing))
+        for row in await cur.fetchall():
+            value = decode_payload(row['payload'])
+            _parsed.set(row['hash'], value)
+            found[row['hash']] = value
+    return found
+
+def parse_evidence(message_id: Optional[int], raw: Any) -> Any:
+    """Legacy inline evidence_data column -> Python value, parsed once per message id."""
+    if not raw or not isinstance(raw, (str, bytes)): return raw
+    key = f"m:{message_id}" if message_id is not None else None
+    if key:
+        cached = _parsed.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.labels("evidence", "hit_local").inc()
+            return cached
+    CACHE_REQUESTS.labels("evidence", "miss").inc()
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return raw
+    if key:
+        _parsed.set(key, value)
+    return value
+
+async def resolve_evidence(cur, rows: List[dict]) -> List[dict]:
+    """
+    Replaces evidence_hash with the evidence_data it points to (one blob query
+    for the whole page); rows written before the blob store keep their inline JSON.
+    """
+    blobs = await load_blobs(cur, [r['evidence_hash'] for r in rows if r.get('evidence_hash')])
+    for row in rows:
+        h = row.pop('evidence_hash', None)
+        if h:
+            row['evidence_data'] = blobs.get(h)
+        else:
+            row['evidence_data'] = parse_evidence(row.get('id'), row.get('evidence_data'))
+    return rows
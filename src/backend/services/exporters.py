@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import zipfile
+from typing import IO, Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, cast
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar exports are disabled without pyarrow
+    pa = None
+    pq = None
+
+CHUNK_ROWS = 1000
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def columnar_available() -> bool:
+    return pa is not None
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose bytes are handed out chunk by chunk by `take()`."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position: int = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def columns_of(rows: List[Dict[str, Any]]) -> List[str]:
+    """Union of keys in first-seen order; evidence mixes data rows and forecast rows."""
+    return list(dict.fromkeys(key for row in rows for key in row))
+
+def iter_csv(rows: List[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    if not rows: return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns_of(rows))
+    writer.writeheader()
+    for i in range(0, len(rows), chunk_rows):
+        writer.writerows(rows[i:i + chunk_rows])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, default=str, ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def _table(rows: List[Dict[str, Any]]):
+    columns = columns_of(rows)
+    return pa.Table.from_pylist([{c: row.get(c) for c in columns} for row in rows])
+
+def iter_arrow(rows: List[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Arrow IPC stream, one record batch per `chunk_rows` rows."""
+    if not rows: return
+    table = _table(rows)
+    sink = _Drain()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=chunk_rows):
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+def iter_parquet(rows: List[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Parquet file written one row group at a time; the footer arrives in the last chunk."""
+    if not rows: return
+    table = _table(rows)
+    sink = _Drain()
+    with pq.ParquetWriter(sink, table.schema, compression="zstd") as writer:
+        for offset in range(0, table.num_rows, chunk_rows):
+            writer.write_table(table.slice(offset, chunk_rows))
+            yield sink.take()
+    yield sink.take()
+
+def iter_rows(rows: List[Dict[str, Any]], fmt: str) -> Iterator:
+    if fmt == "csv": return iter_csv(rows)
+    if fmt == "ndjson": return iter_ndjson(rows)
+    if fmt == "arrow": return iter_arrow(rows)
+    if fmt == "parquet": return iter_parquet(rows)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+def session_markdown_header(session_id: str, title: Optional[str] = None) -> str:
+    heading = f"# Investigation Session {session_id}\n\n"
+    return heading + (f"_{title}_\n\n" if title else "")
+
+def message_markdown(msg: Dict[str, Any]) -> str:
+    md = f"### {msg['role'].upper()}\n{msg['content']}\n\n"
+    if msg.get('evidence_sql'):
+        md += f"```sql\n{msg['evidence_sql']}\n```\n\n"
+    return md
+
+async def iter_zip(entries: AsyncIterator[tuple]) -> AsyncIterator[bytes]:
+    """
+    Streams a zip archive from (name, async iterator of str/bytes) entries,
+    yielding compressed bytes as each chunk is written.
+    """
+    sink = _Drain()
+    with zipfile.ZipFile(cast(IO[bytes], sink), mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for name, chunks in entries:
+            with archive.open(name, mode="w", force_zip64=True) as member:
+                async for chunk in chunks:
+                    member.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                    data = sink.take()
+                    if data: yield data
+            data = sink.take()
+            if data: yield data
+    yield sink.take()
@@ -0,0 +1,76 @@
+import json
+from typing import Any, Dict, List, Optional
+from src.backend.core.cache import LocalLRU, remote_available, mark_remote_down
+from src.backend.core.config import settings
+from src.backend.core.metrics import CACHE_REQUESTS
+from src.backend.core.redis import redis_client
+
+HISTORY_LIMIT = 5
+
+class HistoryCache:
+    """
+    Last HISTORY_LIMIT messages ({role, content}) of each active session.
+
+    Stored as a Redis list so appends from any worker are atomic (RPUSHX + LTRIM);
+    the in-process LRU only answers while Redis is unavailable. A session is
+    cached once `fill` has been called for it, appends to uncached sessions are
+    no-ops and the next read fills from MySQL.
+    """
+
+    def __init__(self, limit: int = HISTORY_LIMIT, ttl: int = 3600, local_size: int = 2048):
+        self.limit = limit
+        self.ttl = ttl
+        self.local = LocalLRU(local_size, float(ttl))
+
+    def _key(self, session_id: str) -> str:
+        return f"od:history:{session_id}"
+
+    async def get(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        if remote_available():
+            try:
+                raw = await redis_client.lrange(self._key(session_id), 0, -1)
+                CACHE_REQUESTS.labels("history", "hit_remote" if raw else "miss").inc()
+                return [json.loads(r) for r in raw] if raw else None
+            except Exception as e:
+                mark_remote_down(e)
+        value = self.local.get(session_id)
+        CACHE_REQUESTS.labels("history", "hit_local" if value is not None else "miss").inc()
+        return list(value) if value is not None else None
+
+    async def fill(self, session_id: str, messages: List[Dict[str, Any]]):
+        messages = [{"role": m.get('role'), "content": m.get('content')} for m in messages][-self.limit:]
+        self.local.set(session_id, messages)
+        if not messages or not remote_available(): return
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(session_id))
+                pipe.rpush(self._key(session_id), *[json.dumps(m, ensure_ascii=False) for m in messages])
+                pipe.expire(self._key(session_id), self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            mark_remote_down(e)
+
+    async def append(self, session_id: str, role: str, content: str):
+        message = {"role": role, "content": content}
+        cached = self.local.get(session_id)
+        if cached is not None:
+            self.local.set(session_id, (cached + [message])[-self.limit:])
+        if not remote_available(): return
+        try:
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.rpushx(self._key(session_id), json.dumps(message, ensure_ascii=False))
+                pipe.ltrim(self._key(session_id), -self.limit, -1)
+                pipe.expire(self._key(session_id), self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            mark_remote_down(e)
+
+    async def invalidate(self, session_id: str):
+        self.local.delete(session_id)
+        if not remote_available(): return
+        try:
+            await redis_client.delete(self._key(session_id))
+        except Exception as e:
+            mark_remote_down(e)
+
+history_cache = HistoryCache(HISTORY_LIMIT, settings.HISTORY_CACHE_TTL, settings.HISTORY_CACHE_LOCAL_SIZE)
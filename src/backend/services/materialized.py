@@ -0,0 +1,106 @@
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from src.backend.core.metrics import MATERIALIZED_READS
+from src.backend.services.logger import logger
+
+def _month(value) -> str:
+    return value.strftime("%Y-%m") if isinstance(value, date) else str(value)[:7]
+
+class MaterializedAnalytics:
+    """
+    In-process copy of the forecasts and anomaly flags the ETL writes to
+    metric_forecasts / metric_anomalies (see data/etl_scripts/materialize.py).
+
+    Lookups return None whenever a requested series has not been materialized,
+    so callers can fall back to computing from the rows they already have.
+    """
+
+    def __init__(self):
+        self._forecasts: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._anomalies: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._series: set = set()
+        # Smallest change stored per series; unknown (None) for rows written before it was recorded
+        self._change_floor: Dict[Tuple[str, str], Optional[float]] = {}
+        self.loaded = False
+        self.loaded_at: Optional[float] = None
+
+    def load_rows(self, forecasts, anomalies, snapshots) -> int:
+        forecast_map: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for row in forecasts:
+            forecast_map.setdefault((row['repo_name'], row['metric_type']), []).append({
+                "repo_name": row['repo_name'],
+                "metric_type": row['metric_type'],
+                "month": _month(row['month']),
+                "value": float(row['value']),
+                "is_forecast": True
+            })
+        for rows in forecast_map.values():
+            rows.sort(key=lambda r: r['month'])
+
+        anomaly_map: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for row in anomalies:
+            anomaly_map.setdefault((row['repo_name'], row['metric_type']), []).append({
+                "month": _month(row['month']),
+                "repo_name": row['repo_name'],
+                "metric_type": row['metric_type'],
+                "change": row['change_ratio'],
+                "z_score": row['z_score'],
+                "kind": row['kind']
+            })
+
+        # Every materialized series has a snapshot row, even when it has no
+        # forecast (too short) or no anomalies.
+        series = {(row['repo_name'], row['metric_type']) for row in snapshots}
+        floors = {(row['repo_name'], row['metric_type']): row.get('change_floor') for row in snapshots}
+
+        self._forecasts, self._anomalies, self._series, self._change_floor = forecast_map, anomaly_map, series, floors
+        self.loaded = True
+        self.loaded_at = time.time()
+        return len(series)
+
+    async def load(self, pool) -> int:
+        started = time.perf_counter()
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT repo_name, metric_type, month, value FROM metric_forecasts")
+                forecasts = await cur.fetchall()
+                await cur.execute("SELECT repo_name, metric_type, month, change_ratio, z_score, kind FROM metric_anomalies")
+                anomalies = await cur.fetchall()
+                await cur.execute("SELECT repo_name, metric_type, change_floor FROM repo_metric_snapshots")
+                snapshots = await cur.fetchall()
+        count = self.load_rows(forecasts, anomalies, snapshots)
+        logger.info("Materialized analytics loaded", series=count, seconds=round(time.perf_counter() - started, 3))
+        return count
+
+    def _covers(self, repos: List[str], metric: str) -> bool:
+        return self.loaded and bool(repos) and all((repo, metric) in self._series for repo in repos)
+
+    def forecasts(self, repos: List[str], metric: str) -> Optional[List[Dict[str, Any]]]:
+        if not self._covers(repos, metric):
+            MATERIALIZED_READS.labels("forecasts", "miss").inc()
+            return None
+        MATERIALIZED_READS.labels("forecasts", "hit").inc()
+        return [dict(row) for repo in repos for row in self._forecasts.get((repo, metric), [])]
+
+    def changes(self, repos: List[str], metric: str, threshold: float, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Month-over-month changes above `threshold`, strongest first (same shape as analytics.detect_changes).
+        None also when the ETL stored only changes above a higher floor than `threshold`.
+        """
+        if not self._covers(repos, metric) or not all(self._floor_below(repo, metric, threshold) for repo in repos):
+            MATERIALIZED_READS.labels("anomalies", "miss").inc()
+            return None
+        MATERIALIZED_READS.labels("anomalies", "hit").inc()
+        hits = [
+            a for repo in repos for a in self._anomalies.get((repo, metric), [])
+            if a['change'] is not None and abs(a['change']) > threshold
+        ]
+        hits.sort(key=lambda a: -abs(a['change']))
+        return hits[:limit] if limit is not None else hits
+
+    def _floor_below(self, repo: str, metric: str, threshold: float) -> bool:
+        floor = self._change_floor.get((repo, metric))
+        return floor is not None and floor <= threshold
+
+materialized = MaterializedAnalytics()
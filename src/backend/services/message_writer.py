@@ -0,0 +1,170 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from src.backend.core.cache import LocalLRU
+from src.backend.core.metrics import MESSAGE_WRITES
+from src.backend.services.evidence_store import encode_evidence, store_blobs
+from src.backend.services.logger import logger
+
+DEFAULT_TITLE = "New Investigation"
+INSERT_MESSAGE = (
+    "INSERT INTO messages (session_id, role, content, evidence_sql, evidence_hash) "
+    "VALUES (%s, %s, %s, %s, %s)"
+)
+# Sessions only ever get their title from their first user message.
+SET_TITLE = "UPDATE sessions SET title = %s WHERE id = %s AND title = %s"
+
+def session_title(message: str) -> str:
+    return (message[:30] + '..') if len(message) > 30 else message
+
+def message_row(session_id: str, role: str, content: str, sql: Optional[str] = None, data: Optional[list] = None) -> tuple:
+    """(session_id, role, content, evidence_sql, evidence_hash, evidence blob)"""
+    blob = encode_evidence(data)
+    return (session_id, role, content, sql, blob.hash if blob else None, blob)
+
+# Sessions whose title has already been assigned, so later messages skip the UPDATE.
+_titled = LocalLRU(maxsize=50000, ttl=86400.0)
+
+async def write_messages(cur, rows: List[tuple]) -> List[str]:
+    """
+    Multi-row INSERT of message rows (after the evidence blobs they reference)
+    plus the first-message title of any session not yet titled. Returns the
+    sessions it titled; see commit_messages for running it as one transaction.
+    """
+    blobs = [row[5] for row in rows if row[5] is not None]
+    if blobs:
+        await store_blobs(cur, blobs)
+    if len(rows) == 1:
+        await cur.execute(INSERT_MESSAGE, rows[0][:5])
+    else:
+        await cur.executemany(INSERT_MESSAGE, [row[:5] for row in rows])
+    titles: Dict[str, str] = {}
+    for session_id, role, content, *_ in rows:
+        if role == 'user' and session_id not in titles and _titled.get(session_id) is None:
+            titles[session_id] = session_title(content or "")
+    for session_id, title in titles.items():
+        await cur.execute(SET_TITLE, (title, session_id, DEFAULT_TITLE))
+    return list(titles)
+
+async def commit_messages(conn, rows: List[tuple]):
+    """
+    write_messages in one explicit transaction (the pool runs in autocommit), so
+    a message is never stored without its session title or the other way round.
+    """
+    await conn.begin()
+    try:
+        async with conn.cursor() as cur:
+            titled = await write_messages(cur, rows)
+        await conn.commit()
+    except BaseException:
+        await conn.rollback()
+        raise
+    for session_id in titled:
+        _titled.set(session_id, True)
+
+class MessageWriter:
+    """
+    Write-behind persistence for chat messages.
+
+    Endpoints enqueue rows and return; one background task drains the queue and
+    writes up to MESSAGE_BATCH_SIZE rows per multi-row INSERT. Rows stay visible
+    through `pending_for` until they are committed, so history reads see them.
+    """
+
+    def __init__(self, pool, batch_size: int = 200, flush_interval: float = 0.05, max_queue: int = 10000,
+                 max_attempts: int = 3):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._queue: "asyncio.Queue[tuple]" = asyncio.Queue(maxsize=max_queue)
+        self._pending: Dict[str, List[tuple]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, row: tuple) -> bool:
+        """False when the writer is closed or full; the caller should then write directly."""
+        if self._closed: return False
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            return False
+        self._pending.setdefault(row[0], []).append(row)
+        return True
+
+    def pending_for(self, session_id: str) -> List[dict]:
+        return [{"role": r[1], "content": r[2]} for r in self._pending.get(session_id, [])]
+
+    async def _next_batch(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[tuple]):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with self.pool.acquire() as conn:
+                    await commit_messages(conn, batch)
+                MESSAGE_WRITES.labels("batched").inc(len(batch))
+                break
+            except Exception as e:
+                if attempt < self.max_attempts and len(batch) > 1:
+                    # A single bad row (e.g. a deleted session) must not sink the batch.
+                    logger.warning("Message batch failed, writing rows one by one", size=len(batch), error=str(e))
+                    for row in batch:
+                        await self._write([row])
+                    return
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(0.2 * attempt)
+                    continue
+                MESSAGE_WRITES.labels("dropped").inc(len(batch))
+                logger.error("Dropping chat messages after repeated write failures", size=len(batch), error=str(e))
+        self._forget(batch)
+
+    def _forget(self, batch: List[tuple]):
+        for row in batch:
+            rows = self._pending.get(row[0])
+            if not rows: continue
+            try:
+                rows.remove(row)
+            except ValueError:
+                pass
+            if not rows:
+                del self._pending[row[0]]
+
+    async def close(self, timeout: float = 10.0):
+        """Stops accepting rows and flushes what is queued."""
+        self._closed = True
+        if self._task is None: return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Message writer shutdown timed out", queued=self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,174 @@
+import re
+import time
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import aiomysql
+import numpy as np
+from src.backend.core.config import settings
+from src.backend.core.metrics import METRICS_STORE_QUERIES
+from src.backend.services.logger import logger
+
+SERIES_COLUMNS = {"month", "value", "repo_name", "metric_type"}
+# Rows pulled per round trip while streaming the table
+LOAD_BATCH = 10_000
+
+_SHAPE = re.compile(
+    r"^\s*SELECT\s+(?P<cols>[\w`]+(?:\s*,\s*[\w`]+)*)\s+FROM\s+`?open_digger_metrics`?\s+"
+    r"WHERE\s+(?P<where>.+?)\s+ORDER\s+BY\s+`?month`?(?:\s+(?P<dir>ASC|DESC))?"
+    r"(?:\s+LIMIT\s+(?P<limit>\d+))?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_LITERAL = r"'([^'\\]*)'"
+_REPO_EQ = re.compile(rf"^`?repo_name`?\s*=\s*{_LITERAL}$", re.IGNORECASE)
+_REPO_IN = re.compile(rf"^`?repo_name`?\s+IN\s*\(\s*({_LITERAL}(?:\s*,\s*{_LITERAL})*)\s*\)$", re.IGNORECASE)
+_METRIC_EQ = re.compile(rf"^`?metric_type`?\s*=\s*{_LITERAL}$", re.IGNORECASE)
+
+class SeriesQuery(NamedTuple):
+    columns: List[str]
+    repos: List[str]
+    metric: str
+    descending: bool = False
+    limit: Optional[int] = None
+
+def parse_series_query(sql: str) -> Optional[SeriesQuery]:
+    """
+    Recognizes the canonical metric query shape:
+    SELECT <month/value/repo_name/metric_type> FROM open_digger_metrics
+    WHERE repo_name IN (...) AND metric_type = '...' ORDER BY month [ASC|DESC] [LIMIT n]
+    """
+    if not sql: return None
+    m = _SHAPE.match(sql)
+    if not m: return None
+    columns = [c.strip().strip('`').lower() for c in m.group("cols").split(",")]
+    if not columns or any(c not in SERIES_COLUMNS for c in columns): return None
+
+    conditions = re.split(r"\s+AND\s+", m.group("where").strip(), flags=re.IGNORECASE)
+    if len(conditions) != 2: return None
+    repos, metric = None, None
+    for cond in conditions:
+        cond = cond.strip()
+        if (eq := _REPO_EQ.match(cond)):
+            repos = [eq.group(1)]
+        elif (inn := _REPO_IN.match(cond)):
+            repos = re.findall(_LITERAL, inn.group(1))
+        elif (met := _METRIC_EQ.match(cond)):
+            metric = met.group(1)
+        else:
+            return None
+    if repos is None or metric is None: return None
+
+    limit = int(m.group("limit")) if m.group("limit") else None
+    descending = (m.group("dir") or "").upper() == "DESC"
+    return SeriesQuery(columns, list(dict.fromkeys(repos)), metric, descending, limit)
+
+def _month_code(month) -> int:
+    if isinstance(month, date):
+        return month.year * 100 + month.month
+    text = str(month)
+    return int(text[:4]) * 100 + int(text[5:7])
+
+def _group(rows, grouped: Dict[Tuple[str, str], Tuple[str, str, list, list]]) -> None:
+    for row in rows:
+        repo, metric = row['repo_name'], row['metric_type']
+        _, _, months, values = grouped.setdefault((repo.lower(), metric.lower()), (repo, metric, [], []))
+        months.append(_month_code(row['month']))
+        values.append(np.nan if row['value'] is None else float(row['value']))
+
+class MetricsStore:
+    """
+    Read-only, in-process copy of open_digger_metrics.
+
+    Each (repo_name, metric_type) series is held as two NumPy arrays sorted by
+    month (yyyymm int32 codes and float64 values), so the common generated query
+    shape is answered without a pool connection. Series are keyed by lower-cased
+    (repo_name, metric_type), matching the case-insensitive collation MySQL
+    would compare them with, and keep the stored names for the rows they return.
+    """
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], Tuple[str, str, np.ndarray, np.ndarray]] = {}
+        self.loaded = False
+        self.loaded_at: Optional[float] = None
+        self.row_count = 0
+
+    def load_rows(self, rows) -> int:
+        grouped: Dict[Tuple[str, str], Tuple[str, str, list, list]] = {}
+        _group(rows, grouped)
+        return self._swap(grouped)
+
+    async def load(self, pool) -> int:
+        """
+        Streams open_digger_metrics with an unbuffered cursor. A table over
+        METRICS_STORE_MAX_ROWS leaves the store disabled (every query falls back to MySQL).
+        """
+        started = time.perf_counter()
+        max_rows = settings.METRICS_STORE_MAX_ROWS
+        grouped: Dict[Tuple[str, str], Tuple[str, str, list, list]] = {}
+        count = 0
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.SSDictCursor) as cur:
+                # LIMIT lets the server stop sending rows once the guard has tripped
+                await cur.execute("SELECT repo_name, metric_type, month, value FROM open_digger_metrics LIMIT %s", (max_rows + 1,))
+                while (batch := await cur.fetchmany(LOAD_BATCH)):
+                    count += len(batch)
+                    if count > max_rows: break
+                    _group(batch, grouped)
+        if count > max_rows:
+            self._series, self.row_count, self.loaded = {}, 0, False
+            logger.warning("Metrics store disabled, table exceeds METRICS_STORE_MAX_ROWS", max_rows=max_rows)
+            return 0
+        count = self._swap(grouped)
+        logger.info("Metrics store loaded", rows=count, series=len(self._series), seconds=round(time.perf_counter() - started, 3))
+        return count
+
+    def _swap(self, grouped) -> int:
+        series = {}
+        for key, (repo, metric, months, values) in grouped.items():
+            month_arr = np.asarray(months, dtype=np.int32)
+            order = np.argsort(month_arr, kind="stable")
+            series[key] = (repo, metric, month_arr[order], np.asarray(values, dtype=np.float64)[order])
+
+        # Swap in one assignment so readers never see a half-built store.
+        self._series = series
+        self.row_count = sum(len(s[2]) for s in series.values())
+        self.loaded = True
+        self.loaded_at = time.time()
+        return self.row_count
+
+    def answer(self, query: SeriesQuery) -> List[Dict]:
+        keys = dict.fromkeys((repo.lower(), query.metric.lower()) for repo in query.repos)
+        found = [self._series.get(key) for key in keys]
+        parts = [s for s in found if s is not None and len(s[2])]
+        if not parts: return []
+
+        months = np.concatenate([s[2] for s in parts])
+        values = np.concatenate([s[3] for s in parts])
+        repo_idx = np.concatenate([np.full(len(s[2]), i, dtype=np.int32) for i, s in enumerate(parts)])
+        order = np.argsort(-months if query.descending else months, kind="stable")
+        if query.limit is not None:
+            order = order[:query.limit]
+
+        rows = []
+        for i in order:
+            code = int(months[i])
+            value = float(values[i])
+            repo, metric = parts[repo_idx[i]][:2]
+            fields = {
+                "month": f"{code // 100:04d}-{code % 100:02d}",
+                "value": None if np.isnan(value) else value,
+                "repo_name": repo,
+                "metric_type": metric,
+            }
+            rows.append({c: fields[c] for c in query.columns})
+        return rows
+
+    def try_answer(self, sql: str) -> Optional[List[Dict]]:
+        """Rows for `sql` if it has the canonical shape and the store is loaded, else None."""
+        query = parse_series_query(sql) if self.loaded else None
+        if query is None:
+            METRICS_STORE_QUERIES.labels("fallback").inc()
+            return None
+        METRICS_STORE_QUERIES.labels("hit").inc()
+        return self.answer(query)
+
+metrics_store = MetricsStore()
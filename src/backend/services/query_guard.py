@@ -0,0 +1,115 @@
+import json
+import re
+from typing import Any, Iterator, List, NamedTuple, Optional
+from src.backend.core.cache import LocalLRU
+from src.backend.core.config import settings
+from src.backend.core.deadline import Deadline, UNBOUNDED
+from src.backend.core.metrics import QUERY_GUARD_DECISIONS
+from src.backend.services.logger import logger
+
+_LEADING_SELECT = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_TRAILING_LIMIT = re.compile(r"\bLIMIT\s+(\d+)(?:\s*,\s*(\d+))?(\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE)
+
+class QueryPlan(NamedTuple):
+    cost: float          # optimizer query_cost of the whole statement
+    rows: int            # largest rows_produced_per_join, i.e. the estimated result size of the join
+    full_scans: List[str]  # tables read with access_type ALL
+
+class GuardedQuery(NamedTuple):
+    sql: str
+    plan: Optional[QueryPlan]
+    notes: List[str]     # repair-log lines describing what the guard did
+
+class QueryRejected(Exception):
+    """The generated SQL is estimated to be too expensive to run on the shared pool."""
+
+    def __init__(self, message: str, note: str):
+        super().__init__(message)
+        self.note = note
+
+# EXPLAIN is a round-trip per query; plans of repeated SQL are reused.
+_plans = LocalLRU(settings.QUERY_GUARD_PLAN_CACHE_SIZE, settings.QUERY_GUARD_PLAN_TTL)
+
+def normalize_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql.strip().rstrip(";").strip())
+
+def with_max_execution_time(sql: str, timeout: float) -> str:
+    """Adds a MySQL MAX_EXECUTION_TIME hint so the server aborts the SELECT when the budget is spent."""
+    if "MAX_EXECUTION_TIME" in sql.upper() or not _LEADING_SELECT.match(sql): return sql
+    return _LEADING_SELECT.sub(f"SELECT /*+ MAX_EXECUTION_TIME({max(1, int(timeout * 1000))}) */", sql, count=1)
+
+def with_row_limit(sql: str, max_rows: int) -> str:
+    """Appends `LIMIT max_rows`, or lowers a larger trailing LIMIT to it."""
+    match = _TRAILING_LIMIT.search(sql)
+    if match is None:
+        return f"{sql} LIMIT {max_rows}"
+    offset, count = (match.group(1), match.group(2)) if match.group(2) else (None, match.group(1))
+    if int(count) <= max_rows: return sql
+    limit = f"LIMIT {offset}, {max_rows}" if offset else f"LIMIT {max_rows}{match.group(3) or ''}"
+    return sql[:match.start()] + limit
+
+def _tables(node: Any) -> Iterator[dict]:
+    if isinstance(node, dict):
+        if "table_name" in node:
+            yield node
+        for value in node.values():
+            yield from _tables(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _tables(item)
+
+def parse_plan(raw: str) -> QueryPlan:
+    """Reads the totals the guard needs out of MySQL's EXPLAIN FORMAT=JSON output."""
+    block = json.loads(raw)["query_block"]
+    tables = list(_tables(block))
+    return QueryPlan(
+        cost=float(block.get("cost_info", {}).get("query_cost", 0)),
+        rows=max((int(t.get("rows_produced_per_join", 0)) for t in tables), default=0),
+        full_scans=[t["table_name"] for t in tables if t.get("access_type") == "ALL"]
+    )
+
+async def explain(cur, sql: str) -> Optional[QueryPlan]:
+    key = normalize_sql(sql)
+    plan: Optional[QueryPlan] = _plans.get(key)
+    if plan is not None:
+        return plan
+    await cur.execute(f"EXPLAIN FORMAT=JSON {key}")
+    row = await cur.fetchone()
+    try:
+        raw = row.get("EXPLAIN") if isinstance(row, dict) else row[0]
+        plan = parse_plan(raw)
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        logger.warning("Unreadable EXPLAIN output", error=str(e))
+        return None
+    _plans.set(key, plan)
+    return plan
+
+async def guard_query(cur, sql: str, deadline: Deadline = UNBOUNDED) -> GuardedQuery:
+    """
+    Vets generated SQL before it runs: rejects statements whose estimated cost
+    is over QUERY_GUARD_MAX_COST, caps the result at QUERY_GUARD_MAX_ROWS rows
+    and bounds server-side execution time by the request's remaining budget.
+    """
+    timeout = deadline.timeout(settings.QUERY_GUARD_MAX_EXECUTION_TIME)
+    if not settings.QUERY_GUARD_ENABLED:
+        return GuardedQuery(with_max_execution_time(sql, timeout), None, [])
+
+    sql = normalize_sql(sql)
+    plan = await explain(cur, sql)
+    notes = []
+    if plan is not None and plan.cost > settings.QUERY_GUARD_MAX_COST:
+        QUERY_GUARD_DECISIONS.labels("rejected").inc()
+        logger.warning("Query rejected by cost guard", sql=sql, cost=plan.cost, rows=plan.rows, full_scans=plan.full_scans)
+        scans = f" (full scan of {', '.join(plan.full_scans)})" if plan.full_scans else ""
+        raise QueryRejected(
+            f"Query too expensive (estimated cost {plan.cost:,.0f}, limit {settings.QUERY_GUARD_MAX_COST:,.0f})",
+            f"🛡️ **Query Guard:** Rejected — estimated cost {plan.cost:,.0f} exceeds {settings.QUERY_GUARD_MAX_COST:,.0f}{scans}."
+        )
+
+    limited = with_row_limit(sql, settings.QUERY_GUARD_MAX_ROWS)
+    if plan is not None and plan.rows > settings.QUERY_GUARD_MAX_ROWS and limited != sql:
+        QUERY_GUARD_DECISIONS.labels("limited").inc()
+        notes.append(f"🛡️ **Query Guard:** ~{plan.rows:,} rows estimated; result capped at {settings.QUERY_GUARD_MAX_ROWS:,}.")
+    else:
+        QUERY_GUARD_DECISIONS.labels("allowed" if plan is not None else "unplanned").inc()
+    return GuardedQuery(with_max_execution_time(limited, timeout), plan, notes)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+REPOS_PATH = os.path.join(os.path.dirname(__file__), '../../../data/repos.json')
+
+# Keywords to ignore when matching repositories
+IGNORE_KEYWORDS = {'stars', 'activity', 'rank', 'openrank', 'bus', 'factor', 'risk', 'issue', 'issues', 'bug', 'bugs', 'closed', 'for', 'the', 'and', 'with', 'show', 'me', 'what', 'is', 'lang', 'core', 'git', 'compare', 'vs', 'versus', 'of'}
+
+ALIASES = {
+    "k8s": "kubernetes/kubernetes",
+}
+
+MIN_PREFIX = 3
+_SPLIT_CHARS = re.compile(r'[/\-_,.?!，？！。]')
+_SEGMENT_CHARS = re.compile(r'[/\-_]')
+_FULL_NAME = re.compile(r'[a-z0-9_.\-]+/[a-z0-9_.\-]+')
+
+class RepoIndex:
+    """
+    Precompiled lookup tables over repos.json.
+
+    Every owner/name segment maps to the repositories containing it, and every
+    prefix of at least MIN_PREFIX characters maps to the repositories with a
+    segment starting with it (so 'vue' finds 'vuejs/core' but 'react' never
+    finds 'preactjs/preact'). Lookups cost O(tokens in the question) regardless
+    of how many repositories are configured.
+    """
+
+    def __init__(self, repos: List[str]):
+        self.repos = list(repos)
+        self.version = hashlib.sha1(json.dumps(sorted(self.repos)).encode("utf-8")).hexdigest()[:12]
+        self._position: Dict[str, int] = {}
+        self._full: Dict[str, str] = {}
+        self._parts: Dict[str, str] = {}
+        self._segments: Dict[str, List[str]] = {}
+        self._prefixes: Dict[str, List[str]] = {}
+
+        for i, repo in enumerate(self.repos):
+            lower = repo.lower()
+            self._position.setdefault(repo, i)
+            self._full.setdefault(lower, repo)
+            for part in lower.split('/'):
+                self._parts.setdefault(part, repo)
+            for seg in set(_SEGMENT_CHARS.sub(' ', lower).split()):
+                self._segments.setdefault(seg, []).append(repo)
+                for n in range(MIN_PREFIX, len(seg) + 1):
+                    self._prefixes.setdefault(seg[:n], []).append(repo)
+
+    def _ordered(self, found: set) -> List[str]:
+        return sorted(found, key=lambda r: self._position.get(r, len(self.repos)))
+
+    def resolve_text(self, text: str) -> List[str]:
+        """All repositories a free-text question mentions, in repos.json order."""
+        text = text.lower()
+        found = set()
+
+        for candidate in _FULL_NAME.findall(text):
+            if candidate in self._full:
+                found.add(self._full[candidate])
+
+        for word in _SPLIT_CHARS.sub(' ', text).split():
+            if word in ALIASES:
+                found.add(ALIASES[word])
+            if word in IGNORE_KEYWORDS: continue
+            # Prefix entries include the exact segments, so 'vue' finds both 'vuejs/core' and 'vuejs/vue'.
+            found.update(self._prefixes.get(word, ()) if len(word) >= MIN_PREFIX else self._segments.get(word, ()))
+
+        return self._ordered(found)
+
+    def resolve_literal(self, value: str) -> Optional[str]:
+        """Canonical name for a SQL literal that is a full name, owner or repo name."""
+        value = value.lower()
+        return self._full.get(value) or self._parts.get(value)
+
+_index: Optional[RepoIndex] = None
+_index_mtime: Optional[float] = None
+
+def load_repo_list() -> List[str]:
+    try:
+        with open(REPOS_PATH, 'r') as f:
+            repos: List[str] = json.load(f)
+        return repos
+    except Exception:
+        return []
+
+def get_repo_index() -> RepoIndex:
+    """Returns the shared index, rebuilding it only when repos.json changes on disk."""
+    global _index, _index_mtime
+    try:
+        mtime = os.path.getmtime(REPOS_PATH)
+    except OSError:
+        mtime = None
+    if _index is None or mtime != _index_mtime:
+        _index = RepoIndex(load_repo_list())
+        _index_mtime = mtime
+    return _index
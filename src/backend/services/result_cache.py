@@ -0,0 +1,93 @@
+import hashlib
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, NamedTuple, Optional
+from src.backend.core.cache import TieredCache, mark_remote_down, remote_available
+from src.backend.core.config import settings
+from src.backend.core.metrics import RESULT_CACHE_BYTES_SAVED
+from src.backend.core.redis import redis_client
+from src.backend.services.query_guard import normalize_sql
+
+# Bumped (INCR) by the ETL after every successful load; part of every result key,
+# so a new load makes all earlier results unreachable without scanning Redis.
+DATASET_VERSION_KEY = "od:dataset_version"
+
+class CachedResult(NamedTuple):
+    rows: List[dict]
+    notes: List[str]  # query-guard repair-log lines produced when the result was computed
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Decimal): return float(value)
+    if isinstance(value, (datetime, date)): return value.isoformat()
+    return value
+
+def jsonable_rows(rows: List[dict]) -> List[dict]:
+    """Rows as they look after a JSON round trip, so hits and misses return identical data."""
+    return [{k: _plain(v) for k, v in row.items()} for row in rows]
+
+class ResultCache:
+    """
+    Rows of generated SQL, keyed by the whitespace-normalized statement and the
+    dataset version. Data only changes when the ETL runs, so identical SQL
+    (e.g. one repo's stars series) is answered without touching MySQL.
+    """
+
+    def __init__(self):
+        self.cache = TieredCache(
+            "result",
+            maxsize=settings.RESULT_CACHE_LOCAL_SIZE,
+            local_ttl=settings.RESULT_CACHE_LOCAL_TTL,
+            remote_ttl=settings.RESULT_CACHE_TTL
+        )
+        self._remote_version = "0"
+        self._local_bumps = 0
+        self._version: Optional[str] = None
+        self._version_expires = 0.0
+        self._changed_at = float("-inf")
+
+    async def dataset_version(self) -> str:
+        now = time.monotonic()
+        if self._version is not None and now < self._version_expires:
+            return self._version
+        if remote_available():
+            try:
+                remote = await redis_client.get(DATASET_VERSION_KEY) or "0"
+                if remote != self._remote_version:
+                    self._changed_at = now
+                self._remote_version = remote
+            except Exception as e:
+                mark_remote_down(e)
+        self._version = f"{self._remote_version}.{self._local_bumps}"
+        self._version_expires = now + settings.RESULT_CACHE_VERSION_TTL
+        return self._version
+
+    def on_dataset_changed(self):
+        """Called after an in-process ETL run; also covers the case where Redis is unreachable."""
+        self._local_bumps += 1
+        self._version = None
+        self._changed_at = time.monotonic()
+
+    def settling(self) -> bool:
+        """Right after a load, lagging read replicas may still return the previous data."""
+        return bool(settings.DB_REPLICA_HOSTS) and time.monotonic() - self._changed_at < settings.DB_REPLICA_MAX_LAG
+
+    async def _key(self, sql: str) -> str:
+        digest = hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:24]
+        return f"{await self.dataset_version()}:{digest}"
+
+    async def get(self, sql: str) -> Optional[CachedResult]:
+        if not settings.RESULT_CACHE_ENABLED: return None
+        entry = await self.cache.get(await self._key(sql))
+        if entry is None: return None
+        RESULT_CACHE_BYTES_SAVED.inc(entry["bytes"])
+        return CachedResult(list(entry["rows"]), entry["notes"])
+
+    async def set(self, sql: str, rows: List[dict], notes: List[str]):
+        if not settings.RESULT_CACHE_ENABLED or self.settling(): return
+        size = len(json.dumps(rows, default=str))
+        if size > settings.RESULT_CACHE_MAX_BYTES: return
+        await self.cache.set(await self._key(sql), {"rows": list(rows), "notes": notes, "bytes": size})
+
+result_cache = ResultCache()
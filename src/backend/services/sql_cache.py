@@ -0,0 +1,45 @@
+import hashlib
+import re
+from src.backend.core.cache import TieredCache
+from src.backend.core.config import settings
+from src.backend.services.sql_engine import resolve_entities
+
+# Bump whenever the text-to-SQL prompt or the metrics schema changes shape,
+# so SQL generated for the old layout is never served again.
+PROMPT_SCHEMA_VERSION = "2"
+
+sql_cache = TieredCache(
+    "sql",
+    maxsize=settings.SQL_CACHE_LOCAL_SIZE,
+    local_ttl=settings.SQL_CACHE_LOCAL_TTL,
+    remote_ttl=settings.SQL_CACHE_TTL
+)
+
+def _digest(payload: str, length: int = 16) -> str:
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:length]
+
+def normalize_question(question: str) -> str:
+    text = re.sub(r'\s+', ' ', question.strip().lower())
+    return text.rstrip('?？!！.。 ')
+
+def history_fingerprint(history: list) -> str:
+    # Mirrors the window the SQL prompt actually sees.
+    window = [f"{m.get('role')}:{m.get('content')}" for m in history[-4:]]
+    return _digest("\n".join(window)) if window else "-"
+
+def build_sql_cache_key(question: str, history: list, repo_version: str) -> str:
+    """
+    Cache key for generated SQL: the normalized question plus everything that
+    changes the answer (resolved repos/metric, prompt history, repos.json version).
+    """
+    normalized = normalize_question(question)
+    repos, metric = resolve_entities(normalized)
+    parts = [
+        PROMPT_SCHEMA_VERSION,
+        repo_version,
+        ",".join(repos) or "-",
+        metric,
+        history_fingerprint(history),
+        _digest(normalized),
+    ]
+    return ":".join(parts)
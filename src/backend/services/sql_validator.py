@@ -1,19 +1,177 @@
+import hashlib
+import re
+from typing import NamedTuple, Optional, Set, Tuple
 import sqlparse
+from sqlparse import sql as ast
+from sqlparse import tokens as T
+from src.backend.core.cache import LocalLRU
+from src.backend.core.config import settings
+from src.backend.core.metrics import SQL_VALIDATIONS
+
+# Statements and clauses a read-only analytics query never needs.
+FORBIDDEN_KEYWORDS = {
+    "INSERT", "UPDATE", "DELETE", "REPLACE", "MERGE", "UPSERT",
+    "DROP", "CREATE", "ALTER", "TRUNCATE", "RENAME", "GRANT", "REVOKE",
+    "INTO",            # SELECT ... INTO OUTFILE / DUMPFILE / @var
+    "LOCK", "UNLOCK",  # LOCK IN SHARE MODE, LOCK TABLES
+    "CALL", "HANDLER", "LOAD", "PREPARE", "EXECUTE", "DEALLOCATE",
+}
+# Functions that block the connection, touch the filesystem or take server-wide locks.
+FORBIDDEN_FUNCTIONS = {
+    "SLEEP", "BENCHMARK", "LOAD_FILE", "GET_LOCK", "RELEASE_LOCK", "RELEASE_ALL_LOCKS",
+    "IS_FREE_LOCK", "IS_USED_LOCK", "MASTER_POS_WAIT", "SOURCE_POS_WAIT",
+    "WAIT_FOR_EXECUTED_GTID_SET", "SYS_EXEC", "SYS_EVAL",
+}
+SYSTEM_SCHEMAS = {"mysql", "information_schema", "performance_schema", "sys"}
+
+# Fingerprints are built from the sqlparse lexer so quoting and comments are
+# tokenized the same way the validator sees them: only single-quoted strings and
+# numbers become '?'; identifiers, double-quoted text and comments stay verbatim,
+# so a cached verdict never covers a query whose non-literal text differs.
+_LITERAL = object()
+_LITERAL_LISTS = re.compile(r"\( ?L(?: ?, ?L)* ?\)")
+
+class SqlAnalysis(NamedTuple):
+    fingerprint: str            # digest of the query with literals replaced by '?'
+    allowed: bool
+    reason: str                 # why the statement was rejected ("" when allowed)
+    tables: Tuple[str, ...]     # referenced base tables (schema-qualified when written so), CTEs excluded
+    columns: Tuple[str, ...]    # referenced column names
+
+_verdicts = LocalLRU(settings.SQL_VALIDATOR_CACHE_SIZE, float("inf"))
+
+def _shape(sql: str) -> list:
+    parts: list = []
+    for ttype, value in sqlparse.lexer.tokenize(sql):
+        if ttype in T.Whitespace:
+            if parts and parts[-1] != " ": parts.append(" ")
+        elif ttype in T.String.Single or ttype in T.Number:
+            parts.append(_LITERAL)
+        else:
+            parts.append(value)
+    while parts and parts[-1] in (" ", ";"):
+        parts.pop()
+    return parts
+
+def normalize_literals(sql: str) -> str:
+    """The query shape: literals become '?', literal lists collapse to '(?+)', whitespace is collapsed."""
+    parts = _shape(sql)
+    # One code per token so list matching can't reach inside quoted text or comments.
+    codes = "".join("L" if p is _LITERAL else p if p in (" ", "(", ",", ")") else "x" for p in parts)
+    text, pos = [], 0
+    for m in _LITERAL_LISTS.finditer(codes):
+        text.extend(parts[pos:m.start()])
+        text.append("(?+)")
+        pos = m.end()
+    text.extend(parts[pos:])
+    return "".join("?" if p is _LITERAL else p for p in text)
+
+def fingerprint(sql: str) -> str:
+    return hashlib.sha1(normalize_literals(sql).encode("utf-8")).hexdigest()[:16]
+
+def _without_alias(ident: ast.Identifier) -> list:
+    alias = ident.get_alias()
+    return [t for t in ident.tokens if not (alias and isinstance(t, ast.Identifier) and t.value == alias)]
+
+class _Walker:
+    """Collects tables/columns from a sqlparse tree and stops at the first forbidden construct."""
+
+    def __init__(self):
+        self.tables: Set[str] = set()
+        self.columns: Set[str] = set()
+        self.ctes: Set[str] = set()
+        self.reason = ""
+
+    def reject(self, reason: str):
+        if not self.reason: self.reason = reason
+
+    def walk(self, tokens):
+        expect = None  # "table" after FROM/JOIN, "cte" after WITH
+        for tok in tokens:
+            if self.reason: return
+            if tok.is_whitespace or tok.ttype in T.Comment or tok.ttype in T.Punctuation:
+                continue
+            if tok.ttype in T.Keyword:
+                word = tok.normalized.upper()
+                if tok.ttype in T.DML and word != "SELECT" or tok.ttype in T.DDL or word in FORBIDDEN_KEYWORDS:
+                    return self.reject(f"{word} is not allowed")
+                expect = "cte" if word == "WITH" else "table" if word == "FROM" or word.endswith("JOIN") else None
+                continue
+            if expect and isinstance(tok, (ast.Identifier, ast.IdentifierList)):
+                items = tok.get_identifiers() if isinstance(tok, ast.IdentifierList) else [tok]
+                for item in items:
+                    if isinstance(item, ast.Identifier):
+                        self.cte(item) if expect == "cte" else self.table(item)
+                    elif item.is_group:
+                        self.walk(item.tokens)
+                expect = None
+                continue
+            expect = None
+            if isinstance(tok, ast.Function):
+                self.function(tok)
+            elif isinstance(tok, ast.Identifier) and not any(t.is_group for t in tok.tokens):
+                self.columns.add(tok.get_real_name())
+            elif isinstance(tok, ast.Identifier):
+                self.walk(_without_alias(tok))
+            elif tok.is_group:
+                self.walk(tok.tokens)
+
+    def function(self, tok: ast.Function):
+        name = (tok.get_real_name() or "").upper()
+        if name in FORBIDDEN_FUNCTIONS:
+            return self.reject(f"{name}() is not allowed")
+        for params in tok.get_sublists():
+            if isinstance(params, ast.Parenthesis):
+                self.walk(params.tokens)
+
+    def cte(self, ident: ast.Identifier):
+        self.ctes.add(ident.get_real_name())
+        self.walk(ident.tokens[1:])  # the body in parentheses
+
+    def table(self, ident: ast.Identifier):
+        if any(isinstance(t, (ast.Parenthesis, ast.Function)) for t in ident.tokens):
+            return self.walk(_without_alias(ident))  # derived table / table function
+        schema, name = ident.get_parent_name(), ident.get_real_name()
+        if schema and schema.strip("`").lower() in SYSTEM_SCHEMAS:
+            return self.reject(f"system schema {schema} is not accessible")
+        self.tables.add(f"{schema}.{name}" if schema else name)
+
+def _analyze(sql: str, digest: str) -> SqlAnalysis:
+    def verdict(reason: str, walker: Optional[_Walker] = None) -> SqlAnalysis:
+        tables = tuple(sorted(walker.tables - walker.ctes)) if walker else ()
+        columns = tuple(sorted(walker.columns)) if walker else ()
+        return SqlAnalysis(digest, not reason, reason, tables, columns)
+
+    if not sql.strip():
+        return verdict("empty statement")
+    if "/*!" in sql:
+        return verdict("MySQL executable comments are not allowed")
+    statements = [s for s in sqlparse.parse(sql) if s.token_first(skip_cm=True, skip_ws=True) is not None]
+    if len(statements) != 1:
+        return verdict("exactly one statement is allowed" if statements else "empty statement")
+    statement = statements[0]
+    if statement.get_type() != "SELECT":
+        return verdict("only SELECT statements are allowed")
+    walker = _Walker()
+    walker.walk(statement.tokens)
+    return verdict(walker.reason, walker)
+
+def analyze_sql(sql: str) -> SqlAnalysis:
+    """
+    Parse-tree check that `sql` is a single read-only SELECT (CTEs allowed),
+    plus the tables/columns it references. Verdicts are cached by fingerprint,
+    which does not depend on literal values.
+    """
+    digest = fingerprint(sql)
+    analysis = _verdicts.get(digest)
+    SQL_VALIDATIONS.labels("hit" if analysis is not None else "miss").inc()
+    if analysis is None:
+        analysis = _analyze(sql, digest)
+        _verdicts.set(digest, analysis)
+    return analysis
 
 def validate_sql(sql: str) -> bool:
     """
     Validates that the SQL query is a read-only SELECT statement.
     """
-    # 1. Explicit Keyword Blacklist (Defense in Depth)
-    forbidden = {"DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "TRUNCATE", "GRANT", "REVOKE"}
-    upper_sql = sql.upper()
-    for word in forbidden:
-        if f" {word} " in f" {upper_sql} ": # Check distinct words
-            return False
-
-    # 2. Parser Validation
-    parsed = sqlparse.parse(sql)
-    for statement in parsed:
-        if statement.get_type().upper() != 'SELECT':
-            return False
-    return True
+    return analyze_sql(sql).allowed
@@ -1,19 +1,109 @@
+import asyncio
 import requests
-from tenacity import retry, stop_after_attempt, wait_fixed
+import httpx
+from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
+from tenacity.stop import stop_base
 import os
 from datetime import datetime
 import json
 import re
 import base64
+from contextlib import aclosing
 from typing import Optional
 from dotenv import dotenv_values
 from Crypto.PublicKey import RSA
 from Crypto.Cipher import PKCS1_v1_5
-
-class SQLBotClient:
-    _cached_token = None
-    _repo_list = []
-    _sql_cache = {}
+from src.backend.core.config import settings
+from src.backend.core.limiter import charge_request
+from src.backend.core.bulkhead import BulkheadFull, sqlbot_bulkhead
+from src.backend.core.circuit_breaker import CircuitBreaker
+from src.backend.core.deadline import Deadline, UNBOUNDED
+from src.backend.services.sql_engine import mock_text_to_sql
+from src.backend.services.sql_cache import sql_cache, build_sql_cache_key
+from src.backend.services.repo_index import get_repo_index
+
+REFUSAL_KEYWORDS = [
+    '{"success":false', '"message":', "小助手", "我无法", "I cannot",
+    "超出了我的能力范围", "beyond my capabilities", "unable to generate",
+    "I can only", "valid SQL", "specific query"
+]
+
+CHART_SIGNATURES = ['"axis":', '"type":', '"series":']
+SYSTEM_WORDS = re.compile(r'execute-success|\[DONE\]|智能问数小助手|抱歉|无法', flags=re.IGNORECASE)
+
+class SummaryStreamSanitizer:
+    """
+    Incremental counterpart of `sanitize_text` + refusal detection for streamed summaries.
+
+    Text is released as soon as it is known to be safe. The last few characters are
+    always held back so that a refusal keyword or code fence split across two chunks
+    is still caught before any part of it reaches the user. Once `rejected` is set the
+    caller should stop reading and switch to the rule-based fallback report.
+    """
+    HOLDBACK = max(len(k) for k in REFUSAL_KEYWORDS + CHART_SIGNATURES + ["智能问数小助手", "execute-success"])
+    PREFIX_WINDOW = 24
+
+    def __init__(self):
+        self._pending = ""
+        self.emitted = False
+        self.rejected = False
+
+    def _check(self) -> bool:
+        if any(k in self._pending for k in REFUSAL_KEYWORDS):
+            self.rejected = True
+        else:
+            visible = re.sub(r'```.*?```', '', self._pending, flags=re.DOTALL)
+            visible = re.sub(r'```.*$', '', visible, flags=re.DOTALL)  # block still streaming in
+            if any(k in visible for k in CHART_SIGNATURES):
+                self.rejected = True
+        return not self.rejected
+
+    def _clean(self, text: str) -> str:
+        text = SYSTEM_WORDS.sub('', text)
+        text = re.sub(r'[\[\]\{\}]', '', text)
+        if not self.emitted:
+            text = re.sub(r'^[,":\s]+', '', text)
+        if text:
+            self.emitted = True
+        return text
+
+    def _release(self, upto: int) -> str:
+        # Never release the inside of an unterminated code block.
+        head = self._pending[:upto]
+        if head.count("```") % 2 == 1:
+            upto = head.rfind("```")
+        else:
+            upto -= (len(head) - len(head.rstrip("`"))) % 3  # a partial fence, not a closing one
+        safe, self._pending = self._pending[:upto], self._pending[upto:]
+        safe = re.sub(r'```.*?```', '', safe, flags=re.DOTALL)
+        return self._clean(safe)
+
+    def feed(self, chunk: str) -> str:
+        if self.rejected or not chunk: return ""
+        self._pending += chunk
+        if not self._check(): return ""
+        if not self.emitted and len(self._pending.strip()) < self.PREFIX_WINDOW: return ""
+        upto = len(self._pending) - self.HOLDBACK
+        if upto <= 0: return ""
+        return self._release(upto)
+
+    def finish(self) -> str:
+        if self.rejected or not self._check(): return ""
+        text = re.sub(r'```.*?(```|$)', '', self._pending, flags=re.DOTALL)
+        self._pending = ""
+        text = re.sub(r'[,":\s]+$', '', self._clean(text))
+        return text
+
+def parse_sse_line(line: str) -> Optional[str]:
+    """Returns the content of one SQLBot SSE line, "" for noise, None on [DONE]."""
+    if not line.startswith("data:"): return ""
+    js = line[5:].strip()
+    if js == "[DONE]": return None
+    try: return json.loads(js).get("content", "") or ""
+    except: return ""
+
+class _SQLBotBase:
+    """Prompt building and answer post-processing shared by the sync and async SQLBot clients."""
 
     def __init__(self, endpoint: Optional[str] = None):
         self.endpoint = endpoint or os.getenv("SQLBOT_ENDPOINT", "http://sqlbot:8000")
@@ -21,27 +111,6 @@ class SQLBotClient:
         self.password = os.getenv("SQLBOT_PASSWORD") or "SQLBot@123456"
         self.datasource_id = int(os.getenv("SQLBOT_DATASOURCE_ID", "1"))
         self.static_token = os.getenv("SQLBOT_API_KEY")
-        
-        if not SQLBotClient._repo_list:
-            try:
-                repo_path = os.path.join(os.path.dirname(__file__), '../../../data/repos.json')
-                if os.path.exists(repo_path):
-                    with open(repo_path, 'r') as f:
-                        SQLBotClient._repo_list = json.load(f)
-            except:
-                pass
-
-    def _get_public_key(self) -> str:
-        url = f"{self.endpoint}/api/v1/system/config/key"
-        try:
-            res = requests.get(url, timeout=5)
-            if res.status_code == 200:
-                data = res.json().get("data")
-                if isinstance(data, dict):
-                    return data.get("public_key") or data.get("publicKey") or ""
-                return data
-        except: pass
-        return ""
 
     def _encrypt_rsa(self, text: str, public_key_str: str) -> str:
         if not public_key_str or not isinstance(public_key_str, str): return text
@@ -52,28 +121,6 @@ class SQLBotClient:
             return base64.b64encode(encrypted).decode('utf-8')
         except: return text
 
-    def _login(self) -> Optional[str]:
-        pk = self._get_public_key()
-        if not pk: return None
-        payload = {
-            "username": self._encrypt_rsa(self.username, pk),
-            "password": self._encrypt_rsa(self.password, pk),
-            "grant_type": "password"
-        }
-        try:
-            res = requests.post(f"{self.endpoint}/api/v1/login/access-token", data=payload, timeout=10)
-            if res.status_code == 200:
-                token = res.json().get("data", {}).get("access_token") or res.json().get("access_token")
-                SQLBotClient._cached_token = token
-                return token
-        except: pass
-        return None
-
-    def _get_headers(self):
-        token = self.static_token or SQLBotClient._cached_token or self._login()
-        if token and not token.startswith("Bearer "): token = f"Bearer {token}"
-        return {"X-SQLBOT-TOKEN": token, "Content-Type": "application/json"}
-
     def _extract_sql(self, text: str) -> str:
         if not text: return ""
         # 1. Clean JSON artifacts first
@@ -102,12 +149,10 @@ class SQLBotClient:
         for k, v in metric_map.items():
             sql = sql.replace(k, v)
 
+        index = get_repo_index()
         def repl(m):
             v = m.group(1)
-            for p in SQLBotClient._repo_list:
-                if v.lower() in p.lower().replace('/', ' ').split() or v.lower() == p.lower():
-                    return f"'{p}'"
-            return f"'{v}'"
+            return f"'{index.resolve_literal(v) or v}'"
         return re.sub(r"'(.*?)'", repl, sql).strip()
 
     def sanitize_text(self, text: str) -> str:
@@ -134,63 +179,10 @@ class SQLBotClient:
         
         return text.strip()
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-    def _ask_ai(self, prompt: str) -> str:
-        headers = self._get_headers()
-        try:
-            res = requests.post(f"{self.endpoint}/api/v1/chat/start", json={"question": prompt, "datasource": self.datasource_id}, headers=headers, timeout=20)
-            if res.status_code != 200: return ""
-            data = res.json().get("data", res.json())
-            chat_id = data.get("id")
-            if not chat_id: return data.get("records", [{}])[0].get("content", "")
-            
-            res = requests.post(f"{self.endpoint}/api/v1/chat/question", json={"question": prompt, "chat_id": chat_id}, headers=headers, timeout=30, stream=True)
-            full = ""
-            for line in res.iter_lines():
-                if line:
-                    d = line.decode('utf-8')
-                    if d.startswith("data:"):
-                        js = d[5:].strip()
-                        if js == "[DONE]": break
-                        try: full += json.loads(js).get("content", "")
-                        except: pass
-            return full
-        except: return ""
-
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-    def _ask_ai_stream(self, prompt: str):
-        headers = self._get_headers()
-        try:
-            res = requests.post(f"{self.endpoint}/api/v1/chat/start", json={"question": prompt, "datasource": self.datasource_id}, headers=headers, timeout=20)
-            if res.status_code != 200: return
-            
-            data = res.json().get("data", res.json())
-            chat_id = data.get("id")
-            if not chat_id:
-                yield data.get("records", [{}])[0].get("content", "")
-                return
-            
-            res = requests.post(f"{self.endpoint}/api/v1/chat/question", json={"question": prompt, "chat_id": chat_id}, headers=headers, timeout=30, stream=True)
-            for line in res.iter_lines():
-                if line:
-                    d = line.decode('utf-8')
-                    if d.startswith("data:"):
-                        js = d[5:].strip()
-                        if js == "[DONE]": break
-                        try:
-                            content = json.loads(js).get("content", "")
-                            if content: yield content
-                        except: pass
-        except: pass
-
-    def generate_summary_stream(self, question: str, data: list, history: list = []):
-        # Use robust non-streaming generation to ensure fallback is applied
-        full_response = self.generate_summary(question, data, history)
-        
-        # Simulate streaming for UX
-        chunk_size = 20
-        for i in range(0, len(full_response), chunk_size):
-            yield full_response[i:i+chunk_size]
+    def _fallback_suffix(self, question: str, data: list, sanitizer: SummaryStreamSanitizer) -> str:
+        # Already-streamed text cannot be retracted, so the report is appended after it.
+        report = self._generate_fallback_report(question, data)
+        return f"\n\n{report}" if sanitizer.emitted else report
 
     def _generate_fallback_report(self, question: str, data: list) -> str:
         """Rule-based detective report when AI fails, formatted as clean Markdown."""
@@ -239,10 +231,8 @@ class SQLBotClient:
 """
         return report
 
-    def generate_summary(self, question: str, data: list, history: list = []) -> str:
-        if not data: return "线索已断，数据库中未发现匹配记录。"
-        
-        prompt = f"""
+    def _build_summary_prompt(self, question: str, data: list) -> str:
+        return f"""
 请分析以下开源项目数据并生成一份专业的Markdown分析报告。
 
 要求：
@@ -252,18 +242,13 @@ class SQLBotClient:
 4. 语言风格专业、客观。
 
 用户问题："{question}"
-数据片段: {json.dumps(data[:15])}
+数据片段: {json.dumps(data[:15], default=str)}
 """
-        ans = self._ask_ai(prompt)
-        
+
+    def _finalize_summary(self, question: str, data: list, ans: str) -> str:
         # Aggressive Refusal/Error Check
         # If it looks like JSON error or contains refusal words, kill it.
-        refusal_keywords = [
-            '{"success":false', '"message":', "小助手", "我无法", "I cannot",
-            "超出了我的能力范围", "beyond my capabilities", "unable to generate",
-            "I can only", "valid SQL", "specific query"
-        ]
-        if any(k in ans for k in refusal_keywords):
+        if any(k in ans for k in REFUSAL_KEYWORDS):
              return self._generate_fallback_report(question, data)
 
         cleaned_ans = self.sanitize_text(ans)
@@ -283,12 +268,7 @@ class SQLBotClient:
         except: pass
         return ""
 
-    def generate_sql(self, question: str, history: list = []) -> Optional[str]:
-        # Cache Check
-        cache_key = f"{question.strip().lower()}|{len(history)}"
-        if cache_key in SQLBotClient._sql_cache:
-            return SQLBotClient._sql_cache[cache_key]
-
+    def _build_sql_prompt(self, question: str, history: list) -> str:
         history_text = ""
         if history:
             history_text = "Conversation History:\n" + "\n".join([f"{m['role']}: {m['content']}" for m in history[-4:]]) + "\n"
@@ -298,13 +278,13 @@ Table: open_digger_metrics
 Columns:
 - repo_name (VARCHAR): Full GitHub repository name (e.g. 'vuejs/core', 'facebook/react')
 - metric_type (VARCHAR): Metric being measured. Valid values: 'stars', 'activity', 'openrank', 'bus_factor', 'issues_new', 'issues_closed'
-- month (VARCHAR): Time period in 'YYYY-MM' format
+- month (DATE): First day of the month, e.g. '2023-01-01'. Filter with date ranges such as month >= '2023-01-01'
 - value (DOUBLE): The numeric value of the metric
 """
 
         examples = self._get_few_shot_examples()
 
-        prompt = f"""
+        return f"""
 <System>
 You are Open-Detective, an expert data analyst specializing in Open Source Software metrics.
 Your goal is to generate a valid MySQL query to answer the user's question.
@@ -314,7 +294,7 @@ Current Date: {datetime.now().strftime('%Y-%m-%d')}
 Schema Context:
 {schema_context}
 
-Supported Repositories: {", ".join(SQLBotClient._repo_list)}
+Supported Repositories: {", ".join(get_repo_index().repos)}
 
 Few-Shot Examples:
 {examples}
@@ -330,15 +310,371 @@ Instructions:
 {history_text}
 Question: {question}
 """
-        result = self.repair_sql(self._extract_sql(self._ask_ai(prompt)))
+
+class SQLBotClient(_SQLBotBase):
+    _cached_token: Optional[str] = None
+
+    def _get_public_key(self) -> str:
+        url = f"{self.endpoint}/api/v1/system/config/key"
+        try:
+            res = requests.get(url, timeout=5)
+            if res.status_code == 200:
+                data = res.json().get("data")
+                if isinstance(data, dict):
+                    return data.get("public_key") or data.get("publicKey") or ""
+                return str(data or "")
+        except: pass
+        return ""
+
+    def _login(self) -> Optional[str]:
+        pk = self._get_public_key()
+        if not pk: return None
+        payload = {
+            "username": self._encrypt_rsa(self.username, pk),
+            "password": self._encrypt_rsa(self.password, pk),
+            "grant_type": "password"
+        }
+        try:
+            res = requests.post(f"{self.endpoint}/api/v1/login/access-token", data=payload, timeout=10)
+            if res.status_code == 200:
+                token: Optional[str] = res.json().get("data", {}).get("access_token") or res.json().get("access_token")
+                SQLBotClient._cached_token = token
+                return token
+        except: pass
+        return None
+
+    def _get_headers(self):
+        token = self.static_token or SQLBotClient._cached_token or self._login()
+        if token and not token.startswith("Bearer "): token = f"Bearer {token}"
+        return {"X-SQLBOT-TOKEN": token, "Content-Type": "application/json"}
+
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
+    def _ask_ai(self, prompt: str) -> str:
+        headers = self._get_headers()
+        try:
+            res = requests.post(f"{self.endpoint}/api/v1/chat/start", json={"question": prompt, "datasource": self.datasource_id}, headers=headers, timeout=20)
+            if res.status_code != 200: return ""
+            data = res.json().get("data", res.json())
+            chat_id = data.get("id")
+            if not chat_id: return str(data.get("records", [{}])[0].get("content", ""))
+            
+            res = requests.post(f"{self.endpoint}/api/v1/chat/question", json={"question": prompt, "chat_id": chat_id}, headers=headers, timeout=30, stream=True)
+            full = ""
+            for line in res.iter_lines():
+                if line:
+                    content = parse_sse_line(line.decode('utf-8'))
+                    if content is None: break
+                    full += content
+            return full
+        except: return ""
+
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
+    def _ask_ai_stream(self, prompt: str):
+        headers = self._get_headers()
+        try:
+            res = requests.post(f"{self.endpoint}/api/v1/chat/start", json={"question": prompt, "datasource": self.datasource_id}, headers=headers, timeout=20)
+            if res.status_code != 200: return
+            
+            data = res.json().get("data", res.json())
+            chat_id = data.get("id")
+            if not chat_id:
+                yield data.get("records", [{}])[0].get("content", "")
+                return
+            
+            res = requests.post(f"{self.endpoint}/api/v1/chat/question", json={"question": prompt, "chat_id": chat_id}, headers=headers, timeout=30, stream=True)
+            for line in res.iter_lines():
+                if line:
+                    content = parse_sse_line(line.decode('utf-8'))
+                    if content is None: break
+                    if content: yield content
+        except: pass
+
+    def generate_summary_stream(self, question: str, data: list, history: list = []):
+        if not data:
+            yield "线索已断，数据库中未发现匹配记录。"
+            return
+
+        sanitizer = SummaryStreamSanitizer()
+        for chunk in self._ask_ai_stream(self._build_summary_prompt(question, data)):
+            text = sanitizer.feed(chunk)
+            if text: yield text
+            if sanitizer.rejected: break
+        tail = sanitizer.finish()
+        if tail: yield tail
+        if sanitizer.rejected or not sanitizer.emitted:
+            yield self._fallback_suffix(question, data, sanitizer)
+
+    def generate_summary(self, question: str, data: list, history: list = []) -> str:
+        if not data: return "线索已断，数据库中未发现匹配记录。"
         
-        # Cache Result
+        ans = self._ask_ai(self._build_summary_prompt(question, data))
+        return self._finalize_summary(question, data, ans)
+
+    def generate_sql(self, question: str, history: list = []) -> Optional[str]:
+        # Sync callers only see the in-process tier; the Redis tier needs the event loop.
+        cache_key = build_sql_cache_key(question, history, get_repo_index().version)
+        cached: Optional[str] = sql_cache.get_local(cache_key)
+        if cached is not None:
+            return cached
+
+        result = self.repair_sql(self._extract_sql(self._ask_ai(self._build_sql_prompt(question, history))))
         if result:
-            if len(SQLBotClient._sql_cache) > 200:
-                SQLBotClient._sql_cache.pop(next(iter(SQLBotClient._sql_cache)))
-            SQLBotClient._sql_cache[cache_key] = result
-            
+            sql_cache.local.set(cache_key, result)
         return result
 
+# Trips after repeated SQLBot transport failures / 5xx answers; while open, SQL
+# generation uses the mock engine and summaries the rule-based fallback report.
+sqlbot_breaker = CircuitBreaker("sqlbot", settings.SQLBOT_BREAKER_FAILURES, settings.SQLBOT_BREAKER_RESET)
+
+class _StopWhenOpen(stop_base):
+    def __call__(self, retry_state) -> bool:
+        return sqlbot_breaker.is_open
+
+_stop_when_open = _StopWhenOpen()
+
+RETRY_WAIT = 2
+
+class _StopWhenOutOfBudget(stop_base):
+    """Skips the retry when the wait plus another attempt no longer fits the caller's deadline."""
+    def __call__(self, retry_state) -> bool:
+        deadline = retry_state.kwargs.get("deadline") or UNBOUNDED
+        return not deadline.allows(RETRY_WAIT + settings.SQLBOT_MIN_BUDGET)
+
+_stop_when_out_of_budget = _StopWhenOutOfBudget()
+
+def _record_attempt(retry_state):
+    if retry_state.outcome is not None and retry_state.outcome.failed:
+        sqlbot_breaker.record_failure(retry_state.outcome.exception())
+
+class AsyncSQLBotClient(_SQLBotBase):
+    """
+    Non-blocking SQLBot client for use inside the event loop.
+
+    All instances share one keep-alive httpx connection pool, and in-flight
+    SQLBot calls are capped by `sqlbot_bulkhead`, so concurrent chat requests
+    multiplex over the same connections instead of serializing behind blocking
+    `requests` calls.
+    """
+    _http: Optional[httpx.AsyncClient] = None
+    _http_loop = None
+
+    @classmethod
+    def _get_http(cls) -> httpx.AsyncClient:
+        # The pool is bound to the running loop; rebuild it if the loop changed.
+        loop = asyncio.get_running_loop()
+        if cls._http is None or cls._http_loop is not loop:
+            cls._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.SQLBOT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SQLBOT_MAX_CONNECTIONS
+                ),
+                timeout=httpx.Timeout(settings.SQLBOT_QUESTION_TIMEOUT, connect=settings.SQLBOT_CONNECT_TIMEOUT)
+            )
+            cls._http_loop = loop
+        return cls._http
+
+    @classmethod
+    async def aclose(cls):
+        """Closes the shared connection pool (called from the app lifespan)."""
+        if cls._http is not None:
+            await cls._http.aclose()
+        cls._http = None
+        cls._http_loop = None
+
+    async def _get_public_key(self) -> str:
+        url = f"{self.endpoint}/api/v1/system/config/key"
+        try:
+            res = await self._get_http().get(url, timeout=settings.SQLBOT_CONNECT_TIMEOUT)
+            if res.status_code == 200:
+                data = res.json().get("data")
+                if isinstance(data, dict):
+                    return data.get("public_key") or data.get("publicKey") or ""
+                return str(data or "")
+        except (httpx.HTTPError, ValueError, AttributeError): pass  # unreachable or malformed; cancellation propagates
+        return ""
+
+    async def _login(self) -> Optional[str]:
+        pk = await self._get_public_key()
+        if not pk: return None
+        payload = {
+            "username": self._encrypt_rsa(self.username, pk),
+            "password": self._encrypt_rsa(self.password, pk),
+            "grant_type": "password"
+        }
+        try:
+            res = await self._get_http().post(f"{self.endpoint}/api/v1/login/access-token", data=payload, timeout=settings.SQLBOT_START_TIMEOUT)
+            if res.status_code == 200:
+                token: Optional[str] = res.json().get("data", {}).get("access_token") or res.json().get("access_token")
+                SQLBotClient._cached_token = token
+                return token
+        except (httpx.HTTPError, ValueError, AttributeError): pass  # unreachable or malformed; cancellation propagates
+        return None
+
+    async def _get_headers(self):
+        token = self.static_token or SQLBotClient._cached_token or await self._login()
+        if token and not token.startswith("Bearer "): token = f"Bearer {token}"
+        return {"X-SQLBOT-TOKEN": token, "Content-Type": "application/json"}
+
+    async def _start_chat(self, prompt: str, headers: dict, deadline: Deadline = UNBOUNDED) -> dict:
+        res = await self._get_http().post(
+            f"{self.endpoint}/api/v1/chat/start",
+            json={"question": prompt, "datasource": self.datasource_id},
+            headers=headers, timeout=deadline.timeout(settings.SQLBOT_START_TIMEOUT)
+        )
+        if res.status_code >= 500: res.raise_for_status()
+        if res.status_code != 200: return {}
+        data: dict = res.json().get("data", res.json())
+        return data
+
+    @retry(stop=stop_after_attempt(3) | _stop_when_open | _stop_when_out_of_budget, wait=wait_fixed(RETRY_WAIT),
+           retry=retry_if_exception_type(httpx.TransportError), after=_record_attempt, reraise=True)
+    async def _ask_ai_once(self, prompt: str, deadline: Deadline = UNBOUNDED) -> str:
+        headers = await self._get_headers()
+        async with sqlbot_bulkhead.acquire(deadline.timeout()):
+            data = await self._start_chat(prompt, headers, deadline)
+            if not data: return ""
+            chat_id = data.get("id")
+            if not chat_id: return str(data.get("records", [{}])[0].get("content", ""))
+
+            full = ""
+            async with self._get_http().stream(
+                "POST", f"{self.endpoint}/api/v1/chat/question",
+                json={"question": prompt, "chat_id": chat_id},
+                headers=headers, timeout=deadline.timeout(settings.SQLBOT_QUESTION_TIMEOUT)
+            ) as res:
+                if res.status_code >= 500: res.raise_for_status()
+                async for line in res.aiter_lines():
+                    content = parse_sse_line(line)
+                    if content is None: break
+                    full += content
+            return full
+
+    async def _ask_ai(self, prompt: str, deadline: Deadline = UNBOUNDED) -> str:
+        if not sqlbot_breaker.allow(): return ""
+        try:
+            # Per-call timeouts bound each step; this bounds the whole exchange, retries included.
+            answer = await asyncio.wait_for(self._ask_ai_once(prompt, deadline=deadline), deadline.timeout())
+            sqlbot_breaker.record_success()
+            return answer
+        except BulkheadFull: raise
+        except asyncio.TimeoutError:
+            deadline.degrade("sqlbot_call")  # out of budget, not necessarily SQLBot's fault
+            return ""
+        except httpx.HTTPStatusError as e:
+            sqlbot_breaker.record_failure(e)
+            return ""
+        except Exception: return ""  # cancellation (client gone, outer wait_for) propagates
+
+    async def generate_summary(self, question: str, data: list, history: list = [], deadline: Deadline = UNBOUNDED) -> str:
+        if not data: return "线索已断，数据库中未发现匹配记录。"
+
+        if not deadline.allows(settings.SQLBOT_MIN_BUDGET):
+            deadline.degrade("summary")
+            return self._generate_fallback_report(question, data)
+        if not sqlbot_breaker.allow():
+            return self._generate_fallback_report(question, data)
+        await charge_request(settings.RATE_LIMIT_SQLBOT_COST)
+        try:
+            ans = await self._ask_ai(self._build_summary_prompt(question, data), deadline)
+        except BulkheadFull:
+            ans = ""  # SQLBot saturated: serve the local fallback report
+        return self._finalize_summary(question, data, ans)
+
+    async def _ask_ai_stream(self, prompt: str, deadline: Deadline = UNBOUNDED):
+        if not sqlbot_breaker.allow(): return
+        try:
+            headers = await self._get_headers()
+            async with sqlbot_bulkhead.acquire(deadline.timeout()):
+                data = await self._start_chat(prompt, headers, deadline)
+                if not data: return
+                chat_id = data.get("id")
+                if not chat_id:
+                    yield data.get("records", [{}])[0].get("content", "")
+                    return
+
+                async with self._get_http().stream(
+                    "POST", f"{self.endpoint}/api/v1/chat/question",
+                    json={"question": prompt, "chat_id": chat_id},
+                    headers=headers, timeout=deadline.timeout(settings.SQLBOT_QUESTION_TIMEOUT)
+                ) as res:
+                    if res.status_code >= 500: res.raise_for_status()
+                    async for line in res.aiter_lines():
+                        content = parse_sse_line(line)
+                        if content is None: break
+                        if content: yield content
+            sqlbot_breaker.record_success()
+        except httpx.HTTPError as e:
+            sqlbot_breaker.record_failure(e)
+
+    async def generate_summary_stream(self, question: str, data: list, history: list = [], deadline: Deadline = UNBOUNDED):
+        """Streams the LLM summary token by token, switching to the fallback report on refusal or when the budget runs out."""
+        if not data:
+            yield "线索已断，数据库中未发现匹配记录。"
+            return
+
+        if not deadline.allows(settings.SQLBOT_MIN_BUDGET):
+            deadline.degrade("summary")
+            yield self._generate_fallback_report(question, data)
+            return
+        if not sqlbot_breaker.allow():
+            yield self._generate_fallback_report(question, data)
+            return
+        await charge_request(settings.RATE_LIMIT_SQLBOT_COST)
+        sanitizer = SummaryStreamSanitizer()
+        cut = False
+        try:
+            async with aclosing(self._ask_ai_stream(self._build_summary_prompt(question, data), deadline)) as stream:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline.timeout())
+                    except StopAsyncIteration:
+                        break
+                    text = sanitizer.feed(chunk)
+                    if text: yield text
+                    if sanitizer.rejected: break
+        except BulkheadFull:
+            pass  # SQLBot saturated: fall through to the local fallback report
+        except asyncio.TimeoutError:
+            deadline.degrade("summary")
+            cut = True  # budget spent mid-answer: complete it with the rule-based report
+        tail = sanitizer.finish()
+        if tail: yield tail
+        if sanitizer.rejected or not sanitizer.emitted or cut:
+            yield self._fallback_suffix(question, data, sanitizer)
+
+    async def generate_sql(self, question: str, history: list = [], deadline: Deadline = UNBOUNDED) -> Optional[str]:
+        cache_key = build_sql_cache_key(question, history, get_repo_index().version)
+        cached: Optional[str] = await sql_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if not deadline.allows(settings.SQLBOT_MIN_BUDGET):
+            deadline.degrade("generate_sql")
+            return mock_text_to_sql(question)
+        if not sqlbot_breaker.allow():
+            return mock_text_to_sql(question)
+
+        await charge_request(settings.RATE_LIMIT_SQLBOT_COST)
+        answer = await self._ask_ai(self._build_sql_prompt(question, history), deadline)
+        result = self.repair_sql(self._extract_sql(answer))
+        if result:
+            await sql_cache.set(cache_key, result)
+        elif sqlbot_breaker.is_open or deadline.expired:
+            return mock_text_to_sql(question)  # this call tripped the breaker or used up the budget
+        return result
+
+    @classmethod
+    async def probe(cls) -> bool:
+        """Half-open check: SQLBot answers its public config endpoint."""
+        try:
+            res = await cls._get_http().get(
+                f"{settings.SQLBOT_ENDPOINT}/api/v1/system/config/key", timeout=settings.SQLBOT_CONNECT_TIMEOUT
+            )
+            return res.status_code < 500
+        except httpx.HTTPError:
+            return False
+
+sqlbot_breaker.probe = AsyncSQLBotClient.probe
+
 def sqlbot_text_to_sql(text: str) -> str:
-    return SQLBotClient().generate_sql(text)
+    return SQLBotClient().generate_sql(text) or ""
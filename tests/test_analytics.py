@@ -0,0 +1,80 @@
+import pytest
+from src.backend.services.analytics import forecast_next_months, detect_anomalies, detect_changes
+
+def _series(repo, values, metric="stars"):
+    return [{"repo_name": repo, "metric_type": metric, "month": f"2023-{i+1:02d}", "value": v} for i, v in enumerate(values)]
+
+def test_forecast_is_per_series():
+    # Interleaved by month, as returned by "ORDER BY month" for a comparison query.
+    rows = sorted(_series("vuejs/core", [10, 20, 30]) + _series("facebook/react", [300, 200, 100]), key=lambda r: r["month"])
+    forecast = forecast_next_months(rows, months=2)
+
+    vue = [f for f in forecast if f["repo_name"] == "vuejs/core"]
+    react = [f for f in forecast if f["repo_name"] == "facebook/react"]
+    assert [f["month"] for f in vue] == ["2023-04", "2023-05"]
+    assert [round(f["value"], 6) for f in vue] == [40.0, 50.0]
+    assert [round(f["value"], 6) for f in react] == [0.0, 0.0]
+    assert all(f["is_forecast"] for f in forecast)
+
+def test_forecast_skips_short_series():
+    rows = _series("vuejs/core", [1, 2, 3]) + _series("golang/go", [5])
+    assert {f["repo_name"] for f in forecast_next_months(rows)} == {"vuejs/core"}
+
+def test_zscore_anomalies_use_each_series_baseline():
+    # Without grouping, react's normal level would look like an outlier against vue.
+    rows = _series("vuejs/core", [10, 11, 9, 10, 10, 11, 9, 10, 10, 60]) + _series("facebook/react", [1000, 1010, 990, 1000, 1005, 995, 1000, 1000, 1002, 998])
+    anomalies = detect_anomalies(rows, threshold=2.0)
+    assert [(a["repo_name"], a["month"]) for a in anomalies] == [("vuejs/core", "2023-10")]
+
+def test_changes_ignore_cross_series_jumps():
+    rows = sorted(_series("vuejs/core", [10, 11, 30]) + _series("facebook/react", [1000, 1001, 1002]), key=lambda r: r["month"])
+    changes = detect_changes(rows, threshold=0.5)
+    assert [(c["repo_name"], c["month"]) for c in changes] == [("vuejs/core", "2023-03")]
+
+def test_materialize_compute_rows():
+    from data.etl_scripts.materialize import compute
+    rows = _series("vuejs/core", [10, 20, 30, 90])
+    out = compute(rows)
+    assert [r[2] for r in out["metric_forecasts"]] == ["2023-05-01", "2023-06-01", "2023-07-01"]
+    assert out["repo_metric_snapshots"] == [("vuejs/core", "stars", "2023-04-01", 90.0, 0.1)]
+    repo, metric, months, first, last, lo, hi, avg, total, change = out["metric_rollups"][0]
+    assert (months, first, last, lo, hi, total, change) == (4, "2023-01-01", "2023-04-01", 10.0, 90.0, 150.0, 8.0)
+    # 10 -> 20 (+100%) and 30 -> 90 (+200%) exceed the 0.1 change floor
+    assert {(r[2], r[6]) for r in out["metric_anomalies"]} >= {("2023-02-01", "SPIKE"), ("2023-04-01", "SPIKE")}
+
+def test_chat_reads_materialized_analytics():
+    from src.backend.services import chat_service
+    from src.backend.services.materialized import MaterializedAnalytics
+    store = MaterializedAnalytics()
+    store.load_rows(
+        forecasts=[{"repo_name": "vuejs/core", "metric_type": "stars", "month": "2023-04-01", "value": 7.0}],
+        anomalies=[{"repo_name": "vuejs/core", "metric_type": "stars", "month": "2023-02-01",
+                    "change_ratio": -0.9, "z_score": 2.5, "kind": "DROP"}],
+        snapshots=[{"repo_name": "vuejs/core", "metric_type": "stars", "change_floor": 0.1}]
+    )
+    data = _series("vuejs/core", [10, 1, 1], metric=None)
+    sql = "SELECT month, value, repo_name FROM open_digger_metrics WHERE repo_name IN ('vuejs/core') AND metric_type = 'stars' ORDER BY month ASC"
+    original = chat_service.materialized
+    chat_service.materialized = store
+    try:
+        assert chat_service.add_forecast(data, sql) == [
+            {"repo_name": "vuejs/core", "metric_type": "stars", "month": "2023-04", "value": 7.0, "is_forecast": True}
+        ]
+        clues = chat_service.detect_anomalies(data, sql)
+        assert [(c["month"], c["type"], c["z_score"]) for c in clues] == [("2023-02", "DROP", 2.5)]
+        # LIMITed result sets and unknown series are computed from the rows instead
+        assert chat_service.add_forecast(data, sql.replace("ASC", "ASC LIMIT 3"))[0]["value"] != 7.0
+        assert chat_service.add_forecast(data, sql.replace("'stars'", "'openrank'"))[0]["value"] != 7.0
+    finally:
+        chat_service.materialized = original
+
+def test_materialized_changes_fall_back_below_stored_floor():
+    from src.backend.services.materialized import MaterializedAnalytics
+    store = MaterializedAnalytics()
+    anomalies = [{"repo_name": "vuejs/core", "metric_type": "stars", "month": "2023-02-01",
+                  "change_ratio": 0.6, "z_score": None, "kind": "SPIKE"}]
+    store.load_rows([], anomalies, [{"repo_name": "vuejs/core", "metric_type": "stars", "change_floor": 0.5}])
+    assert [c["change"] for c in store.changes(["vuejs/core"], "stars", 0.5)] == [0.6]
+    assert store.changes(["vuejs/core"], "stars", 0.3) is None  # 0.3-0.5 changes were never stored
+    store.load_rows([], anomalies, [{"repo_name": "vuejs/core", "metric_type": "stars", "change_floor": None}])
+    assert store.changes(["vuejs/core"], "stars", 0.5) is None
@@ -22,7 +22,9 @@ mock_cursor.fetchone = AsyncMock(return_value={"count": 0})
 # 3. Mock Connection
 mock_conn = MagicMock()
 mock_conn.cursor = MagicMock(return_value=AsyncContextManager(mock_cursor))
+mock_conn.begin = AsyncMock()
 mock_conn.commit = AsyncMock()
+mock_conn.rollback = AsyncMock()
 mock_conn.ping = AsyncMock()
 
 # 4. Mock Pool
@@ -71,3 +73,62 @@ def test_list_sessions():
     assert response.status_code == 200
     assert len(response.json()) == 1
     assert response.json()[0]["title"] == "Test"
+
+def test_list_sessions_keyset_page():
+    mock_cursor.fetchall.return_value = [
+        {"id": f"s{i}", "title": "T", "created_at": f"2023-01-0{9 - i} 00:00:00"} for i in range(3)
+    ]
+    response = client.get("/api/v1/sessions?limit=2")
+    assert response.status_code == 200
+    assert [s["id"] for s in response.json()] == ["s0", "s1"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    mock_cursor.fetchall.return_value = []
+    response = client.get(f"/api/v1/sessions?limit=2&cursor={cursor}")
+    sql, params = mock_cursor.execute.call_args.args
+    assert "created_at < %s OR (created_at = %s AND id < %s)" in sql
+    assert params == ("2023-01-08 00:00:00", "2023-01-08 00:00:00", "s1", 3)
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get("/api/v1/sessions?cursor=@@").status_code == 400
+
+def test_unpaged_messages_return_everything():
+    mock_cursor.fetchall.return_value = [{"id": i, "role": "user", "content": "q"} for i in range(300)]
+    response = client.get("/api/v1/sessions/s1/messages", headers={"Origin": "http://localhost:8080"})
+    sql, params = mock_cursor.execute.call_args.args
+    assert len(response.json()) == 300 and "LIMIT" not in sql and params == ("s1", 0)
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_unpaged_sessions_default_to_first_page():
+    mock_cursor.fetchall.return_value = [{"id": f"s{i}", "title": "T", "created_at": "2023-01-01 00:00:00"} for i in range(51)]
+    response = client.get("/api/v1/sessions")
+    sql, params = mock_cursor.execute.call_args.args
+    assert sql.endswith("LIMIT %s") and params == (51,)
+    assert len(response.json()) == 50 and "X-Next-Cursor" in response.headers
+
+def test_next_cursor_is_readable_cross_origin():
+    mock_cursor.fetchall.return_value = [{"id": f"s{i}", "title": "T", "created_at": "2023-01-01 00:00:00"} for i in range(2)]
+    response = client.get("/api/v1/sessions?limit=1", headers={"Origin": "http://localhost:8080"})
+    assert "x-next-cursor" in response.headers["access-control-expose-headers"].lower()
+
+def test_session_messages_projection():
+    mock_cursor.fetchall.return_value = [{"id": 7, "role": "user", "content": "vue stars"}]
+    response = client.get("/api/v1/sessions/s1/messages?after_id=5&limit=10&fields=role,content")
+    assert response.status_code == 200
+    assert response.json() == [{"id": 7, "role": "user", "content": "vue stars"}]
+    sql, params = mock_cursor.execute.call_args.args
+    assert sql.startswith("SELECT id, role, content FROM messages") and "evidence_data" not in sql
+    assert params == ("s1", 5, 11)
+
+    assert client.get("/api/v1/sessions/s1/messages?fields=password").status_code == 400
+
+def test_export_message_csv_stream():
+    mock_cursor.fetchone.return_value = {"evidence_data": json.dumps([
+        {"month": "2023-01", "value": 1}, {"month": "2023-02", "value": 2, "is_forecast": True}
+    ])}
+    response = client.get("/api/v1/messages/99/export?format=csv")
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["month,value,is_forecast", "2023-01,1,", "2023-02,2,True"]
+    assert client.get("/api/v1/messages/99/export?format=xlsx").status_code == 400
+    mock_cursor.fetchone.return_value = {"count": 0}
@@ -0,0 +1,53 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from src.backend.core.bulkhead import Bulkhead, BulkheadFull
+from src.backend.main import app
+
+async def test_caps_concurrency():
+    bulkhead = Bulkhead("test", max_concurrent=2, max_queue=10, max_wait=1.0)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with bulkhead.acquire():
+            peak = max(peak, bulkhead.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[call() for _ in range(8)])
+    assert peak == 2 and bulkhead.in_flight == 0 and bulkhead.waiting == 0
+
+async def test_rejects_when_queue_full_or_wait_expires():
+    bulkhead = Bulkhead("test", max_concurrent=1, max_queue=1, max_wait=0.05)
+    release = asyncio.Event()
+
+    async def hold():
+        async with bulkhead.acquire():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+
+    with pytest.raises(BulkheadFull) as exc:
+        async with bulkhead.acquire():
+            pass
+    assert exc.value.retry_after >= 1
+    with pytest.raises(BulkheadFull):
+        await waiter  # timed out after max_wait
+    release.set()
+    await holder
+
+def test_saturation_returns_503_with_retry_after():
+    client = TestClient(app)
+    with patch("src.backend.services.chat_service.ChatService.process_request", side_effect=BulkheadFull("generated_sql", 3)):
+        response = client.post("/api/v1/chat", json={"message": "vue stars"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+async def test_free_slot_is_taken_without_wait_budget():
+    bulkhead = Bulkhead("test", max_concurrent=1, max_queue=1, max_wait=1.0)
+    async with bulkhead.acquire(0.0):
+        assert bulkhead.in_flight == 1
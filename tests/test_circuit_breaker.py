@@ -0,0 +1,67 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi.testclient import TestClient
+from src.backend.core.circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from src.backend.main import app
+from src.backend.services.sqlbot_client import AsyncSQLBotClient, sqlbot_breaker
+
+@pytest.fixture
+def breaker():
+    sqlbot_breaker._transition(CLOSED)
+    yield sqlbot_breaker
+    if sqlbot_breaker._probe_task is not None:
+        sqlbot_breaker._probe_task.cancel()
+        sqlbot_breaker._probe_task = None
+    sqlbot_breaker._transition(CLOSED)
+
+def test_trips_after_threshold_and_closes_on_trial_success():
+    cb = CircuitBreaker("test", failure_threshold=3, recovery_timeout=0)
+    for _ in range(2):
+        cb.record_failure("timeout")
+    assert cb.state == CLOSED and cb.allow()
+    cb.record_failure("timeout")
+    assert cb.state == OPEN
+    assert cb.allow() and cb.state == HALF_OPEN  # recovery_timeout elapsed: trial call
+    cb.record_success()
+    assert cb.state == CLOSED and cb.failures == 0
+
+def test_failed_trial_reopens():
+    cb = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+    cb.record_failure("boom")
+    assert cb.allow()
+    cb.record_failure("boom again")
+    assert cb.state == OPEN and cb.snapshot()["last_failure"] == "boom again"
+
+async def test_background_probe_closes_breaker():
+    probe = AsyncMock(side_effect=[False, True])
+    cb = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.01, probe=probe)
+    cb.record_failure("down")
+    assert cb.state == OPEN and not cb.allow()  # probe task owns recovery
+    await asyncio.wait_for(cb._probe_task, 1)
+    assert cb.state == CLOSED and probe.await_count == 2
+
+async def test_open_breaker_routes_to_mock_and_fallback(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure("timeout")
+    client = AsyncSQLBotClient()
+    data = [{"month": "2023-01", "value": 10, "repo_name": "vuejs/core"}]
+    with patch.object(AsyncSQLBotClient, "_ask_ai", new=AsyncMock()) as ask, \
+         patch("src.backend.services.sqlbot_client.sql_cache.get", new=AsyncMock(return_value=None)), \
+         patch("src.backend.services.sqlbot_client.mock_text_to_sql", return_value="SELECT 1") as mock_sql:
+        assert await client.generate_sql("vue stars") == "SELECT 1"
+        summary = await client.generate_summary("vue stars", data)
+    assert summary == client._generate_fallback_report("vue stars", data)
+    mock_sql.assert_called_once_with("vue stars")
+    ask.assert_not_awaited()
+
+def test_sqlbot_health_exposes_breaker(breaker):
+    breaker.record_failure("timeout")
+    http = AsyncMock()
+    http.get.side_effect = OSError("refused")
+    with patch.object(AsyncSQLBotClient, "_get_http", return_value=http):
+        response = TestClient(app).get("/api/v1/sqlbot-health")
+    body = response.json()
+    assert body["status"] == "unreachable"
+    assert body["breaker"]["state"] == CLOSED
+    assert body["breaker"]["consecutive_failures"] == 1
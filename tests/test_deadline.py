@@ -0,0 +1,75 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+import httpx
+import pytest
+from src.backend.core.circuit_breaker import CLOSED
+from src.backend.core.deadline import Deadline, UNBOUNDED
+from src.backend.services.chat_service import ChatService
+from src.backend.services.query_guard import with_max_execution_time
+from src.backend.services.sqlbot_client import AsyncSQLBotClient, sqlbot_breaker
+
+DATA = [{"month": "2023-01", "value": 10, "repo_name": "vuejs/core"}, {"month": "2023-02", "value": 30, "repo_name": "vuejs/core"}]
+
+@pytest.fixture(autouse=True)
+def closed_breaker():
+    sqlbot_breaker._transition(CLOSED)
+    yield
+    sqlbot_breaker._transition(CLOSED)
+
+def test_timeout_is_capped_by_remaining_budget():
+    deadline = Deadline(1.0)
+    assert deadline.timeout(30) <= 1.0
+    assert deadline.timeout(0.2) == 0.2
+    assert UNBOUNDED.timeout(30) == 30 and UNBOUNDED.timeout() is None
+    assert Deadline(0).expired and not Deadline(0).allows(0.1)
+
+def test_max_execution_time_hint():
+    assert with_max_execution_time("select month from t", 1.5) == "SELECT /*+ MAX_EXECUTION_TIME(1500) */ month from t"
+    assert with_max_execution_time("WITH x AS (SELECT 1) SELECT * FROM x", 1) == "WITH x AS (SELECT 1) SELECT * FROM x"
+
+async def test_short_budget_skips_sqlbot_retries():
+    client = AsyncSQLBotClient()
+    with patch.object(AsyncSQLBotClient, "_get_headers", new=AsyncMock(return_value={})), \
+         patch.object(AsyncSQLBotClient, "_start_chat", new=AsyncMock(side_effect=httpx.ConnectError("down"))) as start:
+        started = time.monotonic()
+        assert await client._ask_ai("prompt", Deadline(3.0)) == ""
+    assert start.await_count == 1  # a 2s wait plus another attempt does not fit
+    assert time.monotonic() - started < 1
+
+async def test_short_budget_degrades_to_fallback_report():
+    client = AsyncSQLBotClient()
+    with patch.object(AsyncSQLBotClient, "_ask_ai_stream") as stream:
+        chunks = [c async for c in client.generate_summary_stream("vue trend", DATA, deadline=Deadline(0.5))]
+    stream.assert_not_called()
+    assert chunks == [client._generate_fallback_report("vue trend", DATA)]
+
+async def test_stalled_summary_stream_is_cut_at_deadline():
+    async def stalled(self, prompt, deadline=UNBOUNDED):
+        yield "Vue grew quickly "
+        await asyncio.sleep(10)
+        yield "never"
+
+    client = AsyncSQLBotClient()
+    with patch.object(AsyncSQLBotClient, "_ask_ai_stream", new=stalled), \
+         patch("src.backend.services.sqlbot_client.settings.SQLBOT_MIN_BUDGET", 0.1):
+        started = time.monotonic()
+        text = "".join([c async for c in client.generate_summary_stream("vue trend", DATA, deadline=Deadline(0.3))])
+    assert time.monotonic() - started < 1
+    assert text.startswith("Vue grew quickly") and "never" not in text
+    assert client._generate_fallback_report("vue trend", DATA) in text
+
+async def test_answer_stream_skips_pause_when_budget_is_short():
+    started = time.monotonic()
+    chunks = [c async for c in ChatService.generate_answer_stream("vue pause", DATA, [], "mock", "", Deadline(1.0))]
+    assert time.monotonic() - started < 0.4
+    assert any("NEURAL DEDUCTION" in c for c in chunks)
+
+async def test_spent_budget_skips_execution_instead_of_rejecting():
+    pool = AsyncMock()
+    with patch("src.backend.services.chat_service.settings.METRICS_STORE_ENABLED", False), \
+         patch("src.backend.services.result_cache.settings.RESULT_CACHE_ENABLED", False), \
+         patch("src.backend.services.chat_service.settings.SQL_ENGINE_TYPE", "mock"):
+        sql, data, _, error, _ = await ChatService.process_request("budget spent vue stars", [], pool, Deadline(0))
+    assert sql and data == [] and "budget" in error
+    pool.acquire.assert_not_called()
@@ -26,3 +26,94 @@ def test_load_repos_content():
     actual_repos = load_repos()
     # Check if our default/config repos are present
     assert "vuejs/core" in actual_repos
+
+def test_transform_keeps_monthly_points():
+    from data.etl_scripts.fetch_opendigger import transform
+    records = transform("vuejs/core", "stars", {"2023-01": 10, "2023": 100, "2023-02": "12.5", "2023Q1": 3})
+    assert records == {"2023-01": 10.0, "2023-02": 12.5}
+
+def test_diff_records_only_touches_changed_months():
+    from data.etl_scripts.fetch_opendigger import diff_records
+    existing = {"2023-01": 10.0, "2023-02": 12.0, "2023-03": 7.0}
+    incoming = {"2023-01": 10.0, "2023-02": 15.0, "2023-04": 9.0}
+    inserts, updates, deletes = diff_records(existing, incoming)
+    assert inserts == [("2023-04", 9.0)]
+    assert updates == [("2023-02", 15.0)]
+    assert deletes == ["2023-03"]
+
+def test_diff_records_ignores_float_column_rounding():
+    from data.etl_scripts.fetch_opendigger import diff_records
+    # 12.34 read back from a FLOAT column
+    inserts, updates, deletes = diff_records({"2023-01": 12.340000152587891, "2023-02": None}, {"2023-01": 12.34, "2023-02": 1.0})
+    assert (inserts, updates, deletes) == ([], [("2023-02", 1.0)], [])
+
+def test_run_etl_keeps_fetches_in_a_bounded_window(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from unittest.mock import MagicMock
+    from data.etl_scripts import fetch_opendigger as etl
+
+    outstanding, peak = set(), 0
+    class CountingPool(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            nonlocal peak
+            future = super().submit(*args, **kwargs)
+            outstanding.add(future)
+            peak = max(peak, len(outstanding))
+            return future
+
+    real_wait = etl.wait
+    def tracking_wait(fs, **kwargs):
+        done, pending = real_wait(fs, **kwargs)
+        outstanding.difference_update(done)
+        return done, pending
+
+    monkeypatch.setattr(etl, "ThreadPoolExecutor", CountingPool)
+    monkeypatch.setattr(etl, "wait", tracking_wait)
+    monkeypatch.setattr(etl, "fetch_metric_conditional", lambda repo, metric, validators=None: etl.FetchResult(repo, metric, "not_modified"))
+    monkeypatch.setattr(etl, "get_db_connection", MagicMock)
+    monkeypatch.setattr(etl, "load_state", dict)
+    monkeypatch.setattr(etl, "save_state", lambda state: None)
+    repos = [f"org/repo{i}" for i in range(20)]
+    totals = etl.run_etl(repos, workers=2)
+    assert totals["not_modified"] == len(repos) * len(etl.METRICS)
+    assert peak <= 2 * etl.ETL_WINDOW_PER_WORKER
+
+def test_snapshot_store_roundtrip_and_replay(tmp_path):
+    from data.etl_scripts.snapshot_store import SnapshotStore
+    from data.etl_scripts.fetch_opendigger import fetch_from_snapshot
+
+    raw = json.dumps({"2023-01": 10, "2023-02": 12}).encode()
+    store = SnapshotStore(str(tmp_path))
+    digest = store.put("vuejs/core", "stars", raw, {"etag": '"abc"'})
+    store.put("facebook/react", "stars", raw)
+    store.save()
+
+    reopened = SnapshotStore(str(tmp_path))
+    assert reopened.get("vuejs/core", "stars") == {"2023-01": 10, "2023-02": 12}
+    assert len(list((tmp_path / "objects").rglob("*.json.gz"))) == 1
+    assert reopened.entry("facebook/react", "stars")["sha256"] == digest
+
+    result = fetch_from_snapshot(reopened, "vuejs/core", "stars")
+    assert result.status == "changed"
+    assert result.data["2023-02"] == 12
+    assert fetch_from_snapshot(reopened, "vuejs/core", "stars", {"etag": '"abc"'}).status == "not_modified"
+    assert fetch_from_snapshot(reopened, "golang/go", "stars").status == "missing"
+
+def test_bump_dataset_version_survives_missing_redis():
+    from unittest.mock import patch
+    from data.etl_scripts import fetch_opendigger
+    with patch.object(fetch_opendigger, "redis") as redis:
+        redis.Redis.from_url.return_value.incr.return_value = 7
+        assert fetch_opendigger.bump_dataset_version() == 7
+        redis.Redis.from_url.return_value.incr.assert_called_once_with(fetch_opendigger.DATASET_VERSION_KEY)
+        redis.Redis.from_url.side_effect = ConnectionError("refused")
+        assert fetch_opendigger.bump_dataset_version() is None
+
+@pytest.mark.parametrize("name", ["schema.sql", "session_schema.sql"])
+def test_schema_splits_into_whole_statements(name):
+    # apply_migration.py and mock_data.py run the schema statement by statement, split on ';'
+    path = os.path.join(os.path.dirname(__file__), "../data/sql", name)
+    with open(path) as f:
+        statements = [s.strip() for s in f.read().split(";") if s.strip()]
+    for statement in statements:
+        assert statement.count("(") == statement.count(")"), statement[:80]
@@ -0,0 +1,62 @@
+from unittest.mock import AsyncMock, MagicMock
+from src.backend.services import evidence_store
+from src.backend.services.evidence_store import encode_evidence, decode_payload, store_blobs, resolve_evidence, parse_evidence
+from src.backend.services.message_writer import message_row, write_messages, INSERT_MESSAGE
+
+SERIES = [{"month": f"2023-{i:02d}", "value": float(i * 10), "repo_name": "vuejs/core"} for i in range(1, 13)]
+
+def test_identical_results_share_one_compressed_blob():
+    a, b = encode_evidence(SERIES), encode_evidence([dict(r) for r in SERIES])
+    assert a.hash == b.hash
+    assert len(a.payload) < a.raw_size
+    assert decode_payload(a.payload) == SERIES
+    assert encode_evidence([]) is None
+
+async def test_write_references_blob_and_skips_known_hashes():
+    evidence_store._stored.clear()
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.executemany = AsyncMock()
+    rows = [message_row("s1", "assistant", "answer", "SELECT 1", SERIES) for _ in range(2)]
+    await write_messages(cur, rows)
+    await write_messages(cur, [message_row("s2", "assistant", "again", "SELECT 1", SERIES)])
+
+    blob_writes = [c for c in cur.executemany.call_args_list if "evidence_blobs" in c.args[0]]
+    assert len(blob_writes) == 1 and len(blob_writes[0].args[1]) == 1
+    message_insert = [c for c in cur.executemany.call_args_list if c.args[0] == INSERT_MESSAGE][0]
+    assert [r[4] for r in message_insert.args[1]] == [rows[0][4]] * 2
+
+async def test_resolve_loads_each_blob_once():
+    evidence_store._parsed.clear()
+    blob = encode_evidence(SERIES)
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchall = AsyncMock(return_value=[{"hash": blob.hash, "payload": blob.payload}])
+    rows = [
+        {"id": 1, "evidence_hash": blob.hash, "evidence_data": None},
+        {"id": 2, "evidence_hash": blob.hash, "evidence_data": None},
+        {"id": 3, "evidence_hash": None, "evidence_data": '[{"value": 1}]'},
+    ]
+    await resolve_evidence(cur, rows)
+    assert rows[0]["evidence_data"] == SERIES and rows[1]["evidence_data"] == SERIES
+    assert rows[2] == {"id": 3, "evidence_data": [{"value": 1}]}
+    assert cur.execute.await_count == 1
+
+    await resolve_evidence(cur, [{"id": 4, "evidence_hash": blob.hash}])
+    assert cur.execute.await_count == 1
+
+def test_legacy_evidence_parsed_once_per_message():
+    first = parse_evidence(424242, '[{"value": 1}]')
+    assert first == [{"value": 1}]
+    assert parse_evidence(424242, '[{"value": 1}]') is first
+    assert parse_evidence(None, "not json") == "not json"
+
+def test_hash_ignores_key_order_like_the_migration():
+    import importlib.util, os
+    path = os.path.join(os.path.dirname(__file__), "../src/backend/alembic/versions/8d2a6c9e4f13_content_addressed_evidence.py")
+    spec = importlib.util.spec_from_file_location("evidence_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    reordered = [{"value": r["value"], "repo_name": r["repo_name"], "month": r["month"]} for r in SERIES]  # MySQL JSON order
+    assert encode_evidence(reordered).hash == encode_evidence(SERIES).hash
+    assert migration.canonical_json(reordered) == evidence_store.canonical_json(SERIES)
@@ -0,0 +1,49 @@
+import io
+import json
+import zipfile
+import pytest
+from src.backend.services.exporters import iter_csv, iter_ndjson, iter_arrow, iter_parquet, iter_zip
+
+ROWS = [{"month": f"2023-{i % 12 + 1:02d}", "value": float(i), "repo_name": "vuejs/core"} for i in range(25)]
+ROWS.append({"month": "2024-02", "value": 30.0, "repo_name": "vuejs/core", "is_forecast": True})
+
+def test_csv_streams_in_chunks_with_all_columns():
+    chunks = list(iter_csv(ROWS, chunk_rows=10))
+    assert len(chunks) == 3
+    lines = "".join(chunks).splitlines()
+    assert lines[0] == "month,value,repo_name,is_forecast"
+    assert len(lines) == len(ROWS) + 1
+
+def test_ndjson_round_trip():
+    text = "".join(iter_ndjson(ROWS, chunk_rows=7))
+    assert [json.loads(line) for line in text.splitlines()] == ROWS
+
+def test_columnar_exports_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    arrow = list(iter_arrow(ROWS, chunk_rows=10))
+    assert len(arrow) > 1
+    table = pa.ipc.open_stream(b"".join(arrow)).read_all()
+    assert table.num_rows == len(ROWS) and table.column("value").to_pylist()[-1] == 30.0
+
+    parquet = b"".join(iter_parquet(ROWS, chunk_rows=10))
+    table = pq.read_table(io.BytesIO(parquet))
+    assert table.num_rows == len(ROWS)
+    assert table.column("is_forecast").to_pylist()[-1] is True
+
+async def test_zip_streams_entries():
+    async def chunks(n):
+        for i in range(n):
+            yield f"line {i}\n"
+
+    async def entries():
+        yield "session-a.md", chunks(3)
+        yield "session-b.md", chunks(1)
+
+    data = b""
+    async for part in iter_zip(entries()):
+        data += part
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.namelist() == ["session-a.md", "session-b.md"]
+    assert archive.read("session-a.md") == b"line 0\nline 1\nline 2\n"
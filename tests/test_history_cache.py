@@ -0,0 +1,55 @@
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+from src.backend.services import history_cache as history_module
+from src.backend.services.history_cache import HistoryCache
+from src.backend.services.chat_service import ChatService
+
+class AsyncContextManager:
+    def __init__(self, return_value=None):
+        self.return_value = return_value
+    async def __aenter__(self):
+        return self.return_value
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+def make_pool(rows):
+    cursor = MagicMock()
+    cursor.execute = AsyncMock()
+    cursor.fetchall = AsyncMock(return_value=rows)
+    conn = MagicMock()
+    conn.cursor = MagicMock(return_value=AsyncContextManager(cursor))
+    conn.begin, conn.commit, conn.rollback = AsyncMock(), AsyncMock(), AsyncMock()
+    pool = MagicMock()
+    pool.acquire = MagicMock(return_value=AsyncContextManager(conn))
+    return pool, cursor
+
+@pytest.fixture
+def cache(monkeypatch):
+    # Redis is unreachable in tests, so this exercises the local tier.
+    fresh = HistoryCache(limit=3, ttl=60, local_size=16)
+    monkeypatch.setattr(history_module, "history_cache", fresh)
+    monkeypatch.setattr("src.backend.services.chat_service.history_cache", fresh)
+    return fresh
+
+async def test_append_only_extends_cached_sessions(cache):
+    await cache.append("s1", "user", "hi")
+    assert await cache.get("s1") is None
+
+    await cache.fill("s1", [{"role": "user", "content": "a", "id": 1}])
+    await cache.append("s1", "assistant", "b")
+    await cache.append("s1", "user", "c")
+    await cache.append("s1", "assistant", "d")
+    assert [m["content"] for m in await cache.get("s1")] == ["b", "c", "d"]
+
+async def test_follow_up_history_needs_no_query(cache):
+    pool, cursor = make_pool([{"role": "user", "content": "vue stars"}])
+    first = await ChatService.get_history(pool, "s1")
+    assert first == [{"role": "user", "content": "vue stars"}]
+    assert cursor.execute.await_count == 1
+
+    await ChatService.save_assistant_message(pool, "s1", "Vue is growing", "SELECT 1", [])
+    await ChatService.save_user_message(pool, "s1", "and react?")
+    cursor.execute.reset_mock()
+    history = await ChatService.get_history(pool, "s1")
+    assert [m["content"] for m in history] == ["vue stars", "Vue is growing", "and react?"]
+    assert cursor.execute.await_count == 0
@@ -0,0 +1,44 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from src.backend.core.limiter import TokenBucketLimiter, parse_rate, charge_request, _current_charge, _Charge, limiter
+from src.backend.main import app
+
+def test_parse_rate():
+    rule = parse_rate("10/minute")
+    assert rule.capacity == 10 and rule.rate == pytest.approx(10 / 60)
+    with pytest.raises(ValueError):
+        parse_rate("10/fortnight")
+
+async def test_bucket_limits_and_refills():
+    bucket = TokenBucketLimiter()
+    rule = parse_rate("2/second")
+    assert (await bucket.take("k", rule))[0]
+    assert (await bucket.take("k", rule))[0]
+    allowed, retry_after = await bucket.take("k", rule)
+    assert not allowed and 0 < retry_after <= 0.5
+    await asyncio.sleep(retry_after + 0.05)
+    assert (await bucket.take("k", rule))[0]
+
+async def test_extra_cost_is_billed_to_current_request():
+    bucket = TokenBucketLimiter()
+    rule = parse_rate("3/minute")
+    await bucket.take("chat:1.2.3.4", rule)
+    token = _current_charge.set(_Charge(bucket, "chat:1.2.3.4", rule, "/chat"))
+    try:
+        await charge_request(2)  # e.g. an SQLBot round trip
+    finally:
+        _current_charge.reset(token)
+    assert not (await bucket.take("chat:1.2.3.4", rule))[0]
+
+def test_limited_endpoint_returns_retry_after():
+    client = TestClient(app)
+    key = "/api/v1/chat:testclient"
+    limiter._local.set(key, (0.0, time.monotonic()))
+    try:
+        response = client.post("/api/v1/chat", json={"message": "vue stars"})
+    finally:
+        limiter._local.delete(key)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
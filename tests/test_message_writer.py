@@ -0,0 +1,94 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from src.backend.services import message_writer
+from src.backend.services.message_writer import MessageWriter, message_row
+
+class RecordingCursor:
+    def __init__(self, log, fail_sessions=()):
+        self.log = log
+        self.fail_sessions = fail_sessions
+
+    async def executemany(self, sql, rows):
+        if any(r[0] in self.fail_sessions for r in rows):
+            raise Exception("Cannot add or update a child row: a foreign key constraint fails")
+        self.log.append(("executemany", sql, list(rows)))
+
+    async def execute(self, sql, params=None):
+        if sql.startswith("INSERT"):
+            return await self.executemany(sql, [params])
+        self.log.append(("execute", sql, params))
+
+class RecordingPool:
+    def __init__(self, fail_sessions=(), cursor_class=RecordingCursor):
+        self.log = []
+        self.fail_sessions = fail_sessions
+        self.cursor_class = cursor_class
+
+    @asynccontextmanager
+    async def acquire(self):
+        log, fail, cursor_class = self.log, self.fail_sessions, self.cursor_class
+
+        class Conn:
+            @asynccontextmanager
+            async def cursor(self):
+                yield cursor_class(log, fail)
+
+            async def begin(self):
+                log.append(("begin",))
+
+            async def commit(self):
+                log.append(("commit",))
+
+            async def rollback(self):
+                log.append(("rollback",))
+        yield Conn()
+
+@pytest.fixture(autouse=True)
+def fresh_titles():
+    message_writer._titled.clear()
+
+async def test_batches_rows_and_titles_once():
+    pool = RecordingPool()
+    writer = MessageWriter(pool, batch_size=100, flush_interval=0.05)
+    writer.start()
+    writer.enqueue(message_row("s1", "user", "how many stars does vue have in 2023?"))
+    writer.enqueue(message_row("s1", "assistant", "plenty", "SELECT 1", [{"value": 1}]))
+    writer.enqueue(message_row("s1", "user", "and react?"))
+    assert [m["role"] for m in writer.pending_for("s1")] == ["user", "assistant", "user"]
+    await writer.close()
+
+    assert pool.log[0] == ("begin",) and pool.log[-1] == ("commit",)
+    inserts = [entry for entry in pool.log if entry[0] == "executemany" and entry[1] == message_writer.INSERT_MESSAGE]
+    titles = [entry for entry in pool.log if entry[0] == "execute"]
+    assert len(inserts) == 1 and len(inserts[0][2]) == 3
+    assert titles == [("execute", message_writer.SET_TITLE, ("how many stars does vue have i..", "s1", "New Investigation"))]
+    assert writer.pending_for("s1") == []
+    assert not writer.enqueue(message_row("s1", "user", "late"))
+
+async def test_bad_row_does_not_sink_batch():
+    pool = RecordingPool(fail_sessions={"gone"})
+    writer = MessageWriter(pool, batch_size=100, flush_interval=0.05, max_attempts=2)
+    writer.start()
+    writer.enqueue(message_row("s1", "user", "hello"))
+    writer.enqueue(message_row("gone", "user", "hello"))
+    await writer.close()
+
+    written = [row[0] for entry in pool.log if entry[1:2] == (message_writer.INSERT_MESSAGE,) for row in entry[2]]
+    assert written == ["s1"]
+    assert writer.pending_for("gone") == []
+
+async def test_failed_title_rolls_back_message():
+    class FailingTitleCursor(RecordingCursor):
+        async def execute(self, sql, params=None):
+            if sql == message_writer.SET_TITLE:
+                raise Exception("Lock wait timeout exceeded")
+            await super().execute(sql, params)
+
+    pool = RecordingPool(cursor_class=FailingTitleCursor)
+    async with pool.acquire() as conn:
+        with pytest.raises(Exception):
+            await message_writer.commit_messages(conn, [message_row("s1", "user", "hello")])
+    assert [entry[0] for entry in pool.log] == ["begin", "executemany", "rollback"]
+    # Not remembered as titled, so the retry sets the title again
+    assert message_writer._titled.get("s1") is None
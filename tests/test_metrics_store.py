@@ -0,0 +1,72 @@
+import pytest
+import aiomysql
+from unittest.mock import AsyncMock, MagicMock
+from src.backend.core.config import settings
+from src.backend.services.metrics_store import MetricsStore, parse_series_query
+from src.backend.services.sql_engine import mock_text_to_sql
+
+ROWS = [
+    {"repo_name": "vuejs/core", "metric_type": "stars", "month": "2023-02", "value": 20.0},
+    {"repo_name": "vuejs/core", "metric_type": "stars", "month": "2023-01", "value": 10.0},
+    {"repo_name": "facebook/react", "metric_type": "stars", "month": "2023-01", "value": 30.0},
+    {"repo_name": "facebook/react", "metric_type": "activity", "month": "2023-01", "value": 5.0},
+]
+
+def test_parse_mock_engine_shape():
+    query = parse_series_query(mock_text_to_sql("compare vue and react stars"))
+    assert query is not None
+    assert query.columns == ["month", "value", "repo_name"]
+    assert {"vuejs/core", "facebook/react"} <= set(query.repos)
+    assert query.metric == "stars"
+
+def test_parse_examples_shape_and_rejects_others():
+    assert parse_series_query("SELECT value, month, repo_name FROM open_digger_metrics WHERE repo_name='vuejs/core' AND metric_type='stars' ORDER BY month ASC LIMIT 5").limit == 5
+    assert parse_series_query("SELECT AVG(value) FROM open_digger_metrics WHERE repo_name='vuejs/core' AND metric_type='stars' ORDER BY month") is None
+    assert parse_series_query("SELECT month, value FROM open_digger_metrics WHERE repo_name='vuejs/core' AND metric_type='stars' AND month > '2023-01-01' ORDER BY month") is None
+    assert parse_series_query("SELECT month, value FROM users WHERE repo_name='x' AND metric_type='stars' ORDER BY month") is None
+
+def test_store_answers_sorted_by_month():
+    store = MetricsStore()
+    assert store.try_answer("SELECT month, value, repo_name FROM open_digger_metrics WHERE repo_name IN ('vuejs/core') AND metric_type = 'stars' ORDER BY month ASC") is None
+
+    store.load_rows(ROWS)
+    rows = store.try_answer("SELECT month, value, repo_name FROM open_digger_metrics WHERE repo_name IN ('vuejs/core', 'facebook/react') AND metric_type = 'stars' ORDER BY month ASC")
+    assert rows == [
+        {"month": "2023-01", "value": 10.0, "repo_name": "vuejs/core"},
+        {"month": "2023-01", "value": 30.0, "repo_name": "facebook/react"},
+        {"month": "2023-02", "value": 20.0, "repo_name": "vuejs/core"},
+    ]
+    assert store.try_answer("SELECT month, value FROM open_digger_metrics WHERE repo_name = 'golang/go' AND metric_type = 'stars' ORDER BY month") == []
+
+def test_store_matches_repo_and_metric_case_insensitively():
+    store = MetricsStore()
+    store.load_rows(ROWS)
+    rows = store.try_answer("SELECT month, value, repo_name, metric_type FROM open_digger_metrics WHERE repo_name IN ('VueJS/Core', 'vuejs/core') AND metric_type = 'Stars' ORDER BY month DESC LIMIT 1")
+    assert rows == [{"month": "2023-02", "value": 20.0, "repo_name": "vuejs/core", "metric_type": "stars"}]
+
+def _streaming_pool(batches):
+    cur = AsyncMock()
+    cur.fetchmany.side_effect = batches + [[]]
+    conn = MagicMock()
+    conn.cursor.return_value.__aenter__.return_value = cur
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = conn
+    return pool, conn, cur
+
+async def test_load_streams_in_batches(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_STORE_MAX_ROWS", 10)
+    pool, conn, cur = _streaming_pool([ROWS[:2], ROWS[2:]])
+    store = MetricsStore()
+    assert await store.load(pool) == 4
+    assert conn.cursor.call_args.args == (aiomysql.SSDictCursor,)
+    assert cur.execute.call_args.args[1] == (11,)
+    assert store.loaded
+
+async def test_load_over_max_rows_disables_store(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_STORE_MAX_ROWS", 3)
+    store = MetricsStore()
+    store.load_rows(ROWS)
+    pool, _, _ = _streaming_pool([ROWS[:2], ROWS[2:]])
+    assert await store.load(pool) == 0
+    assert not store.loaded
+    assert store.try_answer("SELECT month, value FROM open_digger_metrics WHERE repo_name = 'vuejs/core' AND metric_type = 'stars' ORDER BY month") is None
@@ -0,0 +1,50 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+from src.backend.core.pools import create_mysql_pool, create_query_pool, query_session_init
+from src.backend.main import app
+
+def mock_pool():
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchone = AsyncMock(return_value={"EXPLAIN": json.dumps({"query_block": {"cost_info": {"query_cost": "5"}}})})
+    cur.fetchall = AsyncMock(return_value=[{"month": "2023-01", "value": 1.0, "repo_name": "vuejs/core"}])
+    conn = MagicMock()
+    conn.cursor.return_value.__aenter__.return_value = cur
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = conn
+    return pool, cur
+
+def test_query_session_is_read_only_with_statement_timeout():
+    with patch("src.backend.core.pools.settings.QUERY_GUARD_MAX_EXECUTION_TIME", 2.5):
+        assert query_session_init() == "SET SESSION transaction_read_only = ON, SESSION max_execution_time = 2500"
+
+async def test_create_pool_retries_then_gives_up():
+    with patch("src.backend.core.pools.aiomysql.create_pool", new=AsyncMock(side_effect=OSError("refused"))) as create:
+        assert await create_mysql_pool("test", "db", 1, 2, attempts=3, retry_delay=0) is None
+    assert create.await_count == 3
+
+async def test_query_pool_uses_its_own_account_and_limits():
+    with patch("src.backend.core.pools.aiomysql.create_pool", new=AsyncMock(return_value="pool")) as create, \
+         patch.multiple("src.backend.core.pools.settings", DB_QUERY_USER="reader", DB_QUERY_PASSWORD="secret", DB_QUERY_POOL_MAX=3):
+        assert await create_query_pool() == "pool"
+    kwargs = create.await_args.kwargs
+    assert kwargs["user"] == "reader" and kwargs["password"] == "secret" and kwargs["maxsize"] == 3
+    assert kwargs["init_command"].startswith("SET SESSION transaction_read_only = ON")
+
+def test_generated_sql_runs_on_query_pool():
+    primary, primary_cur = mock_pool()
+    query_pool, query_cur = mock_pool()
+    previous = getattr(app.state, "pool", None)
+    app.state.pool, app.state.query_pool = primary, query_pool
+    try:
+        with patch.multiple("src.backend.services.chat_service.settings",
+                            METRICS_STORE_ENABLED=False, RESULT_CACHE_ENABLED=False, SQL_ENGINE_TYPE="mock"):
+            response = TestClient(app).post("/api/v1/chat", json={"message": "query pool vue stars"})
+    finally:
+        del app.state.query_pool
+        app.state.pool = previous
+    assert response.status_code == 200
+    statements = [c.args[0] for c in query_cur.execute.await_args_list]
+    assert any(s.startswith("SELECT") for s in statements)
+    primary_cur.execute.assert_not_awaited()
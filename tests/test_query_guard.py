@@ -0,0 +1,72 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from src.backend.services.chat_service import ChatService
+from src.backend.services.query_guard import (
+    QueryRejected, _plans, guard_query, parse_plan, with_row_limit
+)
+
+def explain_row(cost: float, rows: int, access_type: str = "ref") -> dict:
+    return {"EXPLAIN": json.dumps({"query_block": {
+        "cost_info": {"query_cost": str(cost)},
+        "ordering_operation": {"nested_loop": [
+            {"table": {"table_name": "m", "access_type": access_type, "rows_examined_per_scan": rows, "rows_produced_per_join": rows}},
+            {"table": {"table_name": "r", "access_type": "eq_ref", "rows_examined_per_scan": 1, "rows_produced_per_join": rows}},
+        ]}
+    }})}
+
+def fake_cursor(row: dict):
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchone = AsyncMock(return_value=row)
+    return cur
+
+@pytest.fixture(autouse=True)
+def empty_plan_cache():
+    _plans.clear()
+    yield
+    _plans.clear()
+
+def test_parse_plan_walks_nested_tables():
+    plan = parse_plan(explain_row(1234.5, 800, "ALL")["EXPLAIN"])
+    assert plan.cost == 1234.5 and plan.rows == 800 and plan.full_scans == ["m"]
+
+def test_row_limit_injection():
+    assert with_row_limit("SELECT * FROM t", 100) == "SELECT * FROM t LIMIT 100"
+    assert with_row_limit("SELECT * FROM t LIMIT 10", 100) == "SELECT * FROM t LIMIT 10"
+    assert with_row_limit("SELECT * FROM t LIMIT 500 OFFSET 20", 100) == "SELECT * FROM t LIMIT 100 OFFSET 20"
+    assert with_row_limit("SELECT * FROM t LIMIT 20, 500", 100) == "SELECT * FROM t LIMIT 20, 100"
+    assert with_row_limit("SELECT * FROM t WHERE id IN (SELECT id FROM u LIMIT 5)", 100).endswith(") LIMIT 100")
+
+async def test_rejects_expensive_query():
+    cur = fake_cursor(explain_row(5e7, 10_000_000, "ALL"))
+    with pytest.raises(QueryRejected) as exc:
+        await guard_query(cur, "SELECT * FROM open_digger_metrics a JOIN open_digger_metrics b")
+    assert "full scan of m" in exc.value.note
+
+async def test_caps_large_results_and_adds_hint():
+    cur = fake_cursor(explain_row(900, 20_000))
+    guarded = await guard_query(cur, "SELECT month, value FROM open_digger_metrics WHERE metric_type = 'stars';")
+    assert guarded.sql.startswith("SELECT /*+ MAX_EXECUTION_TIME(")
+    assert guarded.sql.endswith("LIMIT 5000")
+    assert guarded.notes and "capped" in guarded.notes[0]
+
+async def test_plans_are_cached_per_normalized_sql():
+    cur = fake_cursor(explain_row(10, 12))
+    first = await guard_query(cur, "SELECT value FROM t")
+    second = await guard_query(cur, "SELECT  value\nFROM t;")
+    assert cur.execute.await_count == 1
+    assert first.sql == second.sql and first.notes == []
+
+async def test_rejection_is_reported_in_repair_logs():
+    cur = fake_cursor(explain_row(5e7, 10_000_000, "ALL"))
+    conn = MagicMock()
+    conn.cursor.return_value.__aenter__.return_value = cur
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = conn
+    with patch("src.backend.services.chat_service.settings.METRICS_STORE_ENABLED", False), \
+         patch("src.backend.services.result_cache.settings.RESULT_CACHE_ENABLED", False), \
+         patch("src.backend.services.chat_service.settings.SQL_ENGINE_TYPE", "mock"):
+        sql, data, _, error, logs = await ChatService.process_request("guard cost check vue stars", [], pool)
+    assert data == [] and "too expensive" in error
+    assert any("Query Guard" in line for line in logs)
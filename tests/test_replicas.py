@@ -0,0 +1,62 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+from src.backend.core.pools import ReplicaSet, parse_replica_hosts, read_pool
+from src.backend.main import app
+from src.backend.services.result_cache import ResultCache
+
+def mock_pool(status=None, fetchall=()):
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchone = AsyncMock(return_value=status)
+    cur.fetchall = AsyncMock(return_value=list(fetchall))
+    conn = MagicMock()
+    conn.cursor.return_value.__aenter__.return_value = cur
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = conn
+    return pool, cur
+
+def test_parse_replica_hosts():
+    assert parse_replica_hosts(" db-r1, db-r2:3307 ,") == [("db-r1", 3306), ("db-r2", 3307)]
+    assert parse_replica_hosts("") == []
+
+async def test_routes_only_to_replicas_within_max_lag():
+    fresh, _ = mock_pool({"Seconds_Behind_Source": 1})
+    lagging, _ = mock_pool({"Seconds_Behind_Source": 60})
+    stopped, _ = mock_pool({"Seconds_Behind_Source": None})
+    replicas = ReplicaSet({"fresh": fresh, "lagging": lagging, "stopped": stopped}, max_lag=5, check_interval=5)
+    assert replicas.pick() is None  # nothing checked yet
+    for name in replicas.replicas:
+        await replicas.check(name)
+    assert replicas.lag == {"fresh": 1.0, "lagging": 60.0, "stopped": None}
+    assert {id(replicas.pick()) for _ in range(4)} == {id(fresh)}
+
+async def test_falls_back_to_legacy_status_and_primary():
+    old, cur = mock_pool({"Seconds_Behind_Master": 9})
+    cur.execute.side_effect = [Exception("syntax"), None]
+    replicas = ReplicaSet({"old": old}, max_lag=5, check_interval=5)
+    assert await replicas.check("old") == 9.0
+    state = MagicMock(replicas=replicas)
+    assert read_pool(state, "test", "primary") == "primary"
+
+def test_profile_reads_from_replica():
+    primary, primary_cur = mock_pool()
+    replica, replica_cur = mock_pool(fetchall=[{"metric_type": "stars", "value": 10}])
+    replicas = ReplicaSet({"r1": replica}, max_lag=5, check_interval=5)
+    replicas.lag["r1"] = 0.0
+    previous = getattr(app.state, "pool", None)
+    app.state.pool, app.state.replicas = primary, replicas
+    try:
+        response = TestClient(app).post("/api/v1/analytics/profile", json={"repo": "vuejs/core"})
+    finally:
+        del app.state.replicas
+        app.state.pool = previous
+    assert response.status_code == 200
+    replica_cur.execute.assert_awaited()
+    primary_cur.execute.assert_not_awaited()
+
+async def test_result_cache_pauses_while_replicas_catch_up():
+    cache = ResultCache()
+    with patch.multiple("src.backend.services.result_cache.settings", DB_REPLICA_HOSTS="db-r1", DB_REPLICA_MAX_LAG=60):
+        cache.on_dataset_changed()
+        await cache.set("SELECT 1", [{"n": 1}], [])
+        assert await cache.get("SELECT 1") is None
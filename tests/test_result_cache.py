@@ -0,0 +1,65 @@
+import json
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from src.backend.core.metrics import RESULT_CACHE_BYTES_SAVED
+from src.backend.services.chat_service import ChatService
+from src.backend.services.query_guard import _plans
+from src.backend.services.result_cache import ResultCache, jsonable_rows
+
+ROWS = [{"month": "2023-01", "value": 10.0, "repo_name": "vuejs/core"}, {"month": "2023-02", "value": 12.0, "repo_name": "vuejs/core"}]
+
+def mock_pool(rows):
+    cur = MagicMock()
+    cur.execute = AsyncMock()
+    cur.fetchone = AsyncMock(return_value={"EXPLAIN": json.dumps({"query_block": {"cost_info": {"query_cost": "5"}}})})
+    cur.fetchall = AsyncMock(return_value=rows)
+    conn = MagicMock()
+    conn.cursor.return_value.__aenter__.return_value = cur
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = conn
+    return pool, cur
+
+def executed(cur) -> list:
+    return [c.args[0] for c in cur.execute.await_args_list if not c.args[0].startswith("EXPLAIN")]
+
+@pytest.fixture
+def cache():
+    fresh = ResultCache()
+    _plans.clear()
+    with patch("src.backend.services.chat_service.result_cache", fresh), \
+         patch("src.backend.services.chat_service.settings.METRICS_STORE_ENABLED", False), \
+         patch("src.backend.services.chat_service.settings.SQL_ENGINE_TYPE", "mock"):
+        yield fresh
+
+async def test_identical_sql_is_served_from_cache(cache):
+    pool, cur = mock_pool([dict(r) for r in ROWS])
+    saved = RESULT_CACHE_BYTES_SAVED._value.get()
+    first = await ChatService.process_request("result cache vue stars", [], pool)
+    second = await ChatService.process_request("result cache vue stars?", [{"role": "user", "content": "hi"}], pool)
+    assert len(executed(cur)) == 1
+    assert second[1] == first[1]
+    assert RESULT_CACHE_BYTES_SAVED._value.get() > saved
+
+async def test_dataset_change_invalidates_results(cache):
+    pool, cur = mock_pool([dict(r) for r in ROWS])
+    await ChatService.process_request("result cache react stars", [], pool)
+    cache.on_dataset_changed()
+    await ChatService.process_request("result cache react stars", [], pool)
+    assert len(executed(cur)) == 2
+
+async def test_forecast_rows_do_not_leak_into_cache(cache):
+    pool, _ = mock_pool([dict(r) for r in ROWS])
+    sql, data, *_ = await ChatService.process_request("result cache vue stars trend", [], pool)
+    assert any(d.get("is_forecast") for d in data)
+    cached = await cache.get(sql)
+    assert cached.rows == ROWS
+
+async def test_oversized_results_are_not_cached():
+    cache = ResultCache()
+    with patch("src.backend.services.result_cache.settings.RESULT_CACHE_MAX_BYTES", 10):
+        await cache.set("SELECT 1", ROWS, [])
+    assert await cache.get("SELECT 1") is None
+
+def test_rows_are_json_shaped():
+    assert jsonable_rows([{"value": Decimal("1.5"), "n": 2}]) == [{"value": 1.5, "n": 2}]
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from src.backend.core.singleflight import SingleFlight
+
+async def test_do_runs_once_for_concurrent_callers():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "SELECT 1"
+
+    results = await asyncio.gather(*[flight.do("q", work) for _ in range(10)])
+    assert calls == 1
+    assert results == ["SELECT 1"] * 10
+
+async def test_do_survives_leader_cancellation():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return 42
+
+    leader = asyncio.ensure_future(flight.do("q", work))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("q", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == 42
+
+async def test_stream_fans_out_chunks():
+    flight = SingleFlight("test")
+    runs = 0
+
+    async def produce():
+        nonlocal runs
+        runs += 1
+        for token in ["a", "b", "c"]:
+            await asyncio.sleep(0.01)
+            yield token
+
+    async def consume():
+        return [chunk async for chunk in flight.stream("q", produce)]
+
+    results = await asyncio.gather(*[consume() for _ in range(5)])
+    assert runs == 1
+    assert all(r == ["a", "b", "c"] for r in results)
+
+async def test_answers_are_not_shared_across_different_evidence():
+    from src.backend.services.chat_service import ChatService
+    old = [{"month": "2023-01", "value": 10, "repo_name": "vuejs/core"}, {"month": "2023-02", "value": 30, "repo_name": "vuejs/core"}]
+    new = old + [{"month": "2023-03", "value": 35, "repo_name": "vuejs/core"}]
+
+    async def answer(data):
+        return "".join([c async for c in ChatService.generate_answer_stream("flight vue stars", data, [], "mock", "SELECT 1")])
+
+    first, second = await asyncio.gather(answer(old), answer(new))
+    assert "2 records" in first and "3 records" in second
@@ -0,0 +1,37 @@
+import time
+import pytest
+from src.backend.core.cache import LocalLRU, TieredCache
+from src.backend.services.sql_cache import build_sql_cache_key
+from src.backend.services.repo_index import RepoIndex
+
+VERSION = RepoIndex(["vuejs/core", "facebook/react"]).version
+
+def test_cache_key_normalizes_question():
+    a = build_sql_cache_key("Compare vue and react stars?", [], VERSION)
+    b = build_sql_cache_key("  compare VUE and react   stars ", [], VERSION)
+    assert a == b
+
+def test_cache_key_depends_on_repos_history_and_version():
+    base = build_sql_cache_key("vue stars", [], VERSION)
+    assert base != build_sql_cache_key("react stars", [], VERSION)
+    assert base != build_sql_cache_key("vue stars", [{"role": "user", "content": "hi"}], VERSION)
+    assert base != build_sql_cache_key("vue stars", [], RepoIndex(["vuejs/core", "facebook/react", "golang/go"]).version)
+
+def test_local_lru_evicts_and_expires():
+    lru = LocalLRU(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+
+    lru.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert lru.get("d") is None
+
+async def test_tiered_cache_survives_unreachable_redis():
+    cache = TieredCache("test", maxsize=8, local_ttl=60, remote_ttl=60)
+    await cache.set("k", "SELECT 1")
+    assert await cache.get("k") == "SELECT 1"
+    assert await cache.get("missing") is None
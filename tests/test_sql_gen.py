@@ -1,5 +1,6 @@
 import sys
 import os
+import re
 import pytest
 
 # Add src to python path so we can import modules
@@ -43,4 +44,27 @@ def test_sql_gen_ollama():
 def test_sql_gen_rust():
     sql = mock_text_to_sql("activity of rust-lang/rust")
     assert "repo_name IN" in sql
-    assert "'rust-lang/rust'" in sql
\ No newline at end of file
+    assert "'rust-lang/rust'" in sql
+def test_repo_index_scales_and_keeps_prefix_rules():
+    from src.backend.services.repo_index import RepoIndex
+    repos = [f"owner{i}/project{i}" for i in range(20000)] + ["vuejs/core", "preactjs/preact", "facebook/react"]
+    index = RepoIndex(repos)
+    assert index.resolve_text("compare vue and react") == ["vuejs/core", "facebook/react"]
+    assert index.resolve_text("owner19999/project19999 stars") == ["owner19999/project19999"]
+    assert index.resolve_text("k8s activity") == ["kubernetes/kubernetes"]
+    assert index.resolve_literal("React") == "facebook/react"
+    assert index.resolve_literal("stars") is None
+
+def test_repo_index_matches_per_repo_scan():
+    from src.backend.services.repo_index import IGNORE_KEYWORDS, RepoIndex
+    repos = ["vuejs/core", "vuejs/vue", "facebook/react", "reactjs/react.dev", "preactjs/preact", "go-gitea/gitea", "ant-design/ant-design"]
+
+    def scan(text):  # the original per-repo matching rules
+        words = [w for w in re.sub(r'[/\-_,.?!]', ' ', text.lower()).split() if w not in IGNORE_KEYWORDS]
+        segments = {r: re.sub(r'[/\-_]', ' ', r.lower()).split() for r in repos}
+        return [r for r in repos if r.lower() in text.lower()
+                or any(w in segments[r] or len(w) >= 3 and any(s.startswith(w) for s in segments[r]) for w in words)]
+
+    index = RepoIndex(repos)
+    for text in ["vue stars", "react", "compare vue and react", "ant design", "gitea activity", "go", "preact vs react.dev"]:
+        assert index.resolve_text(text) == scan(text), text
@@ -0,0 +1,58 @@
+import pytest
+from src.backend.services.sql_validator import _verdicts, analyze_sql, fingerprint, normalize_literals, validate_sql
+
+@pytest.mark.parametrize("sql", [
+    "SELECT month, value FROM open_digger_metrics WHERE repo_name = 'vuejs/core' AND metric_type = 'stars' ORDER BY month",
+    "WITH latest AS (SELECT repo_name, MAX(month) AS month FROM open_digger_metrics GROUP BY repo_name) SELECT * FROM latest",
+    "SELECT title FROM issues WHERE body = ' delete from users '",  # keywords inside literals are data
+    "SELECT a FROM t LEFT JOIN (SELECT b FROM u) d ON d.b = t.a;",
+])
+def test_allows_read_only_selects(sql):
+    assert validate_sql(sql)
+
+@pytest.mark.parametrize("sql, reason", [
+    ("SELECT * INTO OUTFILE '/tmp/x' FROM open_digger_metrics", "INTO"),
+    ("SELECT * FROM t INTO DUMPFILE '/tmp/x'", "INTO"),
+    ("SELECT 1; DROP TABLE open_digger_metrics", "one statement"),
+    ("WITH x AS (SELECT 1) DELETE FROM open_digger_metrics", "only SELECT"),
+    ("SELECT * FROM t FOR UPDATE", "UPDATE"),
+    ("SELECT SLEEP(10)", "SLEEP"),
+    ("SELECT user, authentication_string FROM mysql.user", "system schema"),
+    ("SELECT /*!50000 1 */", "executable comments"),
+    ("", "empty"),
+])
+def test_rejects_unsafe_statements(sql, reason):
+    analysis = analyze_sql(sql)
+    assert not analysis.allowed and reason in analysis.reason
+
+def test_extracts_tables_and_columns():
+    analysis = analyze_sql(
+        "WITH x AS (SELECT repo_name FROM open_digger_metrics) "
+        "SELECT COUNT(*) AS c, x.repo_name FROM x JOIN repos r ON r.name = x.repo_name"
+    )
+    assert analysis.tables == ("open_digger_metrics", "repos")
+    assert analysis.columns == ("name", "repo_name")
+
+def test_fingerprint_ignores_literals_only():
+    a = "SELECT value FROM m WHERE repo_name IN ('vuejs/core', 'facebook/react') AND value > 10"
+    b = "SELECT  value FROM m WHERE repo_name IN ('a''b') AND value > 2.5;"
+    assert normalize_literals(a) == "SELECT value FROM m WHERE repo_name IN (?+) AND value > ?"
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint("SELECT value FROM `m2` WHERE repo_name IN ('x') AND value > 1")
+
+def test_verdicts_are_cached_by_fingerprint():
+    _verdicts.clear()
+    first = analyze_sql("SELECT value FROM m WHERE repo_name = 'vuejs/core'")
+    assert len(_verdicts) == 1
+    second = analyze_sql("SELECT value FROM m WHERE repo_name = 'facebook/react'")
+    assert second is first and len(_verdicts) == 1
+
+def test_cached_allow_never_covers_different_query_text():
+    _verdicts.clear()
+    safe = "SELECT \"it's\", 1 FROM open_digger_metrics WHERE repo_name = 'x'"
+    unsafe = "SELECT \"it's\", SLEEP(100), authentication_string FROM mysql.user WHERE repo_name = 'x'"
+    assert fingerprint(safe) != fingerprint(unsafe)
+    assert analyze_sql(safe).allowed
+    assert not analyze_sql(unsafe).allowed
+    commented = "SELECT value FROM m -- 'x\nWHERE repo_name = 'y'"
+    assert fingerprint(commented) != fingerprint("SELECT value FROM m -- 'x WHERE repo_name = 'y'")
@@ -1,6 +1,8 @@
+import asyncio
+import httpx
 import pytest
 from unittest.mock import MagicMock, patch
-from src.backend.services.sqlbot_client import SQLBotClient
+from src.backend.services.sqlbot_client import SQLBotClient, AsyncSQLBotClient
 
 def test_extract_sql_markdown():
     client = SQLBotClient()
@@ -65,4 +67,90 @@ def test_generate_summary_refusal_fallback(mock_ask):
     
     # Assert fallback was triggered (checking for unique string in fallback report)
     assert "核心仓库活动分析报告" in result
-    assert "数据概览" in result
\ No newline at end of file
+    assert "数据概览" in result
+
+async def test_async_generate_sql_uses_shared_pool():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/chat/start"):
+            return httpx.Response(200, json={"data": {"id": "chat_456"}})
+        body = (
+            'data: {"content": "```sql\\nSELECT repo_name, month, value "}\n\n'
+            'data: {"content": "FROM open_digger_metrics```"}\n\n'
+            'data: [DONE]\n\n'
+        )
+        return httpx.Response(200, text=body)
+
+    AsyncSQLBotClient._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    AsyncSQLBotClient._http_loop = asyncio.get_running_loop()
+    try:
+        client = AsyncSQLBotClient()
+        client.static_token = "fake_token"
+        results = await asyncio.gather(*[client.generate_sql(f"async question {i}") for i in range(4)])
+    finally:
+        await AsyncSQLBotClient.aclose()
+
+    for result in results:
+        assert "SELECT repo_name, month, value FROM open_digger_metrics" in result
+
+async def test_async_ask_ai_lets_cancellation_through():
+    async def hang(self, prompt, deadline=None):
+        await asyncio.sleep(10)
+
+    with patch.object(AsyncSQLBotClient, "_ask_ai_once", new=hang), \
+         patch("src.backend.services.sqlbot_client.sqlbot_breaker.allow", return_value=True):
+        task = asyncio.ensure_future(AsyncSQLBotClient()._ask_ai("prompt"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+@patch("src.backend.services.sqlbot_client.SQLBotClient._ask_ai_stream")
+def test_generate_summary_stream_is_incremental(mock_stream):
+    report = "# 数据分析报告\n\n## 趋势\nvuejs/core 的 stars 在观测期内稳步增长，峰值出现在 2023-05。\n"
+    mock_stream.return_value = iter([report[i:i+8] for i in range(0, len(report), 8)])
+
+    client = SQLBotClient()
+    data = [{"repo_name": "vuejs/core", "month": "2023-01", "value": 100}]
+    chunks = list(client.generate_summary_stream("Analyze this", data))
+
+    assert len(chunks) > 2
+    assert "".join(chunks).strip() == report.strip()
+
+@patch("src.backend.services.sqlbot_client.SQLBotClient._ask_ai_stream")
+def test_generate_summary_stream_refusal_mid_stream(mock_stream):
+    mock_stream.return_value = iter(["# 数据分析报告\n\n前面是一段正常的分析内容，", "足够长以便开始输出。然后", "I can", "not continue"])
+
+    client = SQLBotClient()
+    data = [{"repo_name": "vuejs/core", "month": "2023-01", "value": 100}]
+    result = "".join(client.generate_summary_stream("Analyze this", data))
+
+    assert "I can" not in result
+    assert "核心仓库活动分析报告" in result
+
+def test_stream_sanitizer_drops_chart_block_streamed_char_by_char():
+    from src.backend.services.sqlbot_client import SummaryStreamSanitizer
+    answer = (
+        "Vue core kept a steady growth rate through the whole period.\n"
+        "```json\n{\"type\": \"line\", \"series\": [1, 2, 3]}\n```\n"
+        "Peak activity came in March after the major release."
+    )
+    for size in (1, 5):
+        sanitizer = SummaryStreamSanitizer()
+        text = "".join(sanitizer.feed(answer[i:i+size]) for i in range(0, len(answer), size)) + sanitizer.finish()
+        assert not sanitizer.rejected
+        assert "steady growth rate" in text and "Peak activity came in March" in text
+        assert "series" not in text
+        assert SQLBotClient().sanitize_text(answer) != ""
+
+async def test_async_login_lets_cancellation_through():
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    http = MagicMock()
+    http.get = hang
+    with patch.object(AsyncSQLBotClient, "_get_http", return_value=http):
+        task = asyncio.ensure_future(AsyncSQLBotClient()._login())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task